@@ -34,9 +34,19 @@ function App() {
   const [answer, setAnswer] = useState('');
   const [sources, setSources] = useState([]);
   const [summary, setSummary] = useState('');
+  const [sessionIds, setSessionIds] = useState({});
   const [loading, setLoading] = useState(false);
   const [status, setStatus] = useState({ process: '', question: '' });
 
+  // Retrieve for the draft question once typing pauses, so asking it skips straight to generation
+  useEffect(() => {
+    if (!selectedVideo || question.trim().length < 8) return;
+    const timer = setTimeout(() => {
+      questionAPI.prefetchQuestion(selectedVideo.id, question).catch(() => {});
+    }, 400);
+    return () => clearTimeout(timer);
+  }, [question, selectedVideo]);
+
   // Functions to handle video processing
   const processVideo = async () => {
     if (!videoUrl.trim()) {
@@ -87,7 +97,10 @@ function App() {
     setStatus({ ...status, question: '🤔 Generating answer...' });
 
     try {
-      const result = await questionAPI.askQuestion(selectedVideo.id, question);
+      const result = await questionAPI.askQuestion(selectedVideo.id, question, sessionIds[selectedVideo.id]);
+      if (result.session_id) {
+        setSessionIds((prev) => ({ ...prev, [selectedVideo.id]: result.session_id }));
+      }
 
       setAnswer(result.answer || 'No answer generated');
 
@@ -132,18 +145,28 @@ function App() {
     setLoading(true);
 
     try {
-      const result = await summaryAPI.generateSummary(selectedVideo.id);
+      const formatHighlights = (highlights) => {
+        let text = '\n\nKey Highlights:\n';
+        highlights.forEach(h => {
+          text += `\n• [${h.timestamp}] ${h.main_point}`;
+          if (h.sub_points) {
+            h.sub_points.forEach(sp => text += `\n  - ${sp}`);
+          }
+        });
+        return text;
+      };
+
+      // Render highlights as they stream in, ordered by segment
+      const partial = [];
+      const result = await summaryAPI.generateSummaryStream(selectedVideo.id, (highlight) => {
+        partial[highlight.index] = highlight;
+        setSummary('⏳ Generating overall summary...' + formatHighlights(partial.filter(Boolean)));
+      });
 
       let formattedSummary = result.overall_summary || 'No summary generated';
 
       if (result.highlights && result.highlights.length > 0) {
-        formattedSummary += '\n\nKey Highlights:\n';
-        result.highlights.forEach(h => {
-          formattedSummary += `\n• [${h.timestamp}] ${h.main_point}`;
-          if (h.sub_points) {
-            h.sub_points.forEach(sp => formattedSummary += `\n  - ${sp}`);
-          }
-        });
+        formattedSummary += formatHighlights(result.highlights);
       }
 
       setSummary(formattedSummary);
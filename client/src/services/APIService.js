@@ -61,14 +61,15 @@ export const questionAPI = {
   /**
    * Ask a question about a processed video
    * POST /questions/ask
+   * Pass the session_id from the previous answer to continue a conversation.
    */
-  askQuestion: async (videoId, question) => {
+  askQuestion: async (videoId, question, sessionId = null) => {
     const response = await fetch(`${API_BASE_URL}/questions/ask`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ video_id: videoId, question }),
+      body: JSON.stringify({ video_id: videoId, question, session_id: sessionId }),
     });
     if (!response.ok) {
       throw new Error(`Failed to ask question: ${response.statusText}`);
@@ -76,6 +77,24 @@ export const questionAPI = {
     return response.json();
   },
 
+  /**
+   * Embed and search a draft question ahead of askQuestion (best effort)
+   * POST /questions/prefetch
+   */
+  prefetchQuestion: async (videoId, question) => {
+    const response = await fetch(`${API_BASE_URL}/questions/prefetch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ video_id: videoId, question }),
+    });
+    if (!response.ok) {
+      throw new Error(`Failed to prefetch question: ${response.statusText}`);
+    }
+    return response.json();
+  },
+
   /**
    * Get conversation history for a video
    * GET /questions/history/{video_id}
@@ -111,6 +130,59 @@ export const summaryAPI = {
     return response.json();
   },
 
+  /**
+   * Generate a summary, receiving highlights as soon as they are ready
+   * POST /summaries/generate/stream (Server-Sent Events)
+   * onHighlight is called with each highlight (with its segment index);
+   * resolves with the full summary.
+   */
+  generateSummaryStream: async (videoId, onHighlight) => {
+    const response = await fetch(`${API_BASE_URL}/summaries/generate/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ video_id: videoId }),
+    });
+    if (!response.ok) {
+      throw new Error(`Failed to generate summary: ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let summary = null;
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      const events = buffer.split('\n\n');
+      buffer = events.pop();
+      for (const raw of events) {
+        const eventLine = raw.split('\n').find(line => line.startsWith('event: '));
+        const dataLine = raw.split('\n').find(line => line.startsWith('data: '));
+        if (!eventLine || !dataLine) continue;
+
+        const event = eventLine.slice('event: '.length);
+        const data = JSON.parse(dataLine.slice('data: '.length));
+        if (event === 'highlight' && onHighlight) {
+          onHighlight(data);
+        } else if (event === 'summary') {
+          summary = data;
+        } else if (event === 'error') {
+          throw new Error(data.error);
+        }
+      }
+    }
+
+    if (!summary) {
+      throw new Error('Summary stream ended unexpectedly');
+    }
+    return summary;
+  },
+
   /**
    * Get stored summary for a video
    * GET /summaries/{video_id}
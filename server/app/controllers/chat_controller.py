@@ -1,67 +1,224 @@
 """Question answering routes"""
-from fastapi import APIRouter, HTTPException, Body
-from app.models.models import QuestionRequest, AnswerResponse, ConversationMessage
-from app.services.chat_service import answer_question
-from app.core.storage import conversation_sessions
-from app.core.config import MAX_CONVERSATION_HISTORY
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Header
+from app.models.models import (
+    QuestionRequest, AnswerResponse, SessionRequest, SessionResponse, BatchQuestionRequest, BatchAnswerResponse,
+    PrefetchRequest, PrefetchResponse
+)
+from app.services.chat_service import (
+    answer_question, answer_questions_batch, resolve_video_id, get_prompt_prefix, compact_answer
+)
+from app.services.precompute_service import get_precomputed_answer
+from app.services.prefetch_service import prefetch
+from app.services.memory_service import (
+    get_session_messages, build_history_text, record_turn, update_conversation_summary,
+    create_session, get_session, get_video_sessions, delete_session
+)
+from app.core.scheduler import scheduler
+from app.core.storage import conversation_memories
+from app.core.config import BATCH_ASK_MAX_QUESTIONS, BATCH_ASK_TIMEOUT_SECONDS, REQUEST_DEADLINE_SECONDS
+from app.core.deadline import Deadline
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
 
 @router.post("/ask", response_model=AnswerResponse)
-async def ask_question_endpoint(request: QuestionRequest):
+def ask_question_endpoint(request: QuestionRequest, background_tasks: BackgroundTasks,
+                          x_request_timeout: Optional[float] = Header(None)):
     """
     Ask a question about a processed video using RAG.
     
+    Conversation state lives server-side in a session: pass the session_id
+    returned by a previous answer to continue it, or omit it to start a new
+    one. Follow-up context comes from the session memory (a running summary
+    of older turns plus the latest turn verbatim), refreshed in the
+    background after the response is sent.
+    
+    The request has a time budget (a positive X-Request-Timeout header in
+    seconds, else REQUEST_DEADLINE_SECONDS): as it runs low, web pages or the web search
+    are skipped, LLM compression becomes truncation and the answer length
+    is capped. The response lists these under `shortcuts`.
+    
     Args:
-        request: QuestionRequest containing the question and video ID.
+        request: QuestionRequest containing the question, video ID and session ID;
+            compact=true returns sources as chunk IDs and timestamps without text.
+        x_request_timeout: Optional time budget in seconds; values <= 0 are ignored.
         
     Returns:
-        AnswerResponse: The answer, sources, and context used.
+        AnswerResponse: The answer, sources, context used and session ID.
+        Responds 429 with Retry-After when too many questions are in progress,
+        and 504 when the budget runs out during generation.
     """
-    try:
-        result = answer_question(
-            question=request.question,
-            video_id=request.video_id,
-            conversation_history=request.conversation_history
-        )
-        
-        # Store conversation
-        video_id = result["video_id"]
-        if video_id not in conversation_sessions:
-            conversation_sessions[video_id] = []
-        
-        conversation_sessions[video_id].append(ConversationMessage(role="user", content=request.question))
-        conversation_sessions[video_id].append(ConversationMessage(role="assistant", content=result["answer"]))
-        
-        # Keep only recent messages
-        if len(conversation_sessions[video_id]) > MAX_CONVERSATION_HISTORY:
-            conversation_sessions[video_id] = conversation_sessions[video_id][-MAX_CONVERSATION_HISTORY:]
+    # A non-positive header would start the request already expired (or unbounded), so it is no override
+    has_timeout = x_request_timeout is not None and x_request_timeout > 0
+    deadline = Deadline(x_request_timeout if has_timeout else REQUEST_DEADLINE_SECONDS)
+    with scheduler.admit("interactive"):
+        try:
+            video_id = resolve_video_id(request.video_id)
+            
+            session = get_session(request.session_id) if request.session_id else None
+            if session is not None and session["video_id"] != video_id:
+                raise ValueError("Session belongs to a different video")
+            if session is None:
+                session_id = create_session(video_id, get_prompt_prefix(video_id), request.conversation_history)
+                session = get_session(session_id)
+            else:
+                session_id = request.session_id
+            
+            messages = get_session_messages(session_id)
+            # Opening standard questions may have been answered ahead of time
+            result = get_precomputed_answer(video_id, request.question) if not messages else None
+            if result is None:
+                result = answer_question(
+                    question=request.question,
+                    video_id=video_id,
+                    history_text=build_history_text(session_id, messages),
+                    prompt_prefix=session["prompt_prefix"],
+                    deadline=deadline
+                )
+            
+            # Store conversation and fold older turns into the summary off the request path
+            record_turn(session_id, request.question, result["answer"])
+            background_tasks.add_task(update_conversation_summary, session_id)
+            
+            if request.compact:
+                result = compact_answer(result)
+            return AnswerResponse(**result, session_id=session_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            if deadline.expired:
+                raise HTTPException(status_code=504, detail=f"Request deadline exceeded: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error generating answer: {str(e)}")
+
+
+@router.post("/prefetch", response_model=PrefetchResponse)
+def prefetch_endpoint(request: PrefetchRequest):
+    """
+    Embed and search a question while it is being typed.
+    
+    Call on debounced keystrokes with the draft question. The embedding and
+    search results are cached under the normalized text, so a matching
+    /questions/ask goes straight to generation (its response then has
+    prefetched=true). Best effort: drafts shorter than PREFETCH_MIN_CHARS,
+    and drafts arriving while PREFETCH_MAX_IN_FLIGHT prefetches are running,
+    are skipped.
+    
+    Args:
+        request: PrefetchRequest with the draft question and video ID.
         
-        return AnswerResponse(**result)
+    Returns:
+        PrefetchResponse: Whether the draft was prefetched, already cached or skipped.
+    """
+    started = time.perf_counter()
+    try:
+        video_id = resolve_video_id(request.video_id)
+        status = prefetch(video_id, request.question)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating answer: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error prefetching: {str(e)}")
+    
+    return PrefetchResponse(video_id=video_id, status=status, took_ms=round(1000 * (time.perf_counter() - started), 2))
+
+
+@router.post("/ask/batch", response_model=BatchAnswerResponse)
+def ask_batch_endpoint(request: BatchQuestionRequest):
+    """
+    Answer a fixed list of questions about a video in one request.
+    
+    The questions are embedded in one call and searched in one batched
+    FAISS search, then generated with bounded concurrency. Questions are
+    independent: no session is created or used. When timeout_seconds runs
+    out, finished answers are returned and the rest have status "timeout".
+    
+    Args:
+        request: BatchQuestionRequest with the questions, video ID, compact flag and timeout.
+        
+    Returns:
+        BatchAnswerResponse: One AnswerResponse-shaped entry per question, in order.
+        Responds 429 with Retry-After when too many batches or summaries are in progress.
+    """
+    questions = [question.strip() for question in request.questions]
+    if not questions or not all(questions):
+        raise HTTPException(status_code=400, detail="questions must be a non-empty list of non-empty strings")
+    if len(questions) > BATCH_ASK_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_ASK_MAX_QUESTIONS} questions per batch")
+    
+    # Bulk generation like a summary run, so it shares that class's admission limit
+    with scheduler.admit("summary"):
+        try:
+            video_id = resolve_video_id(request.video_id)
+            results = answer_questions_batch(questions, video_id, timeout=request.timeout_seconds or BATCH_ASK_TIMEOUT_SECONDS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error generating answers: {str(e)}")
+    
+    if request.compact:
+        results = [compact_answer(result) for result in results]
+    return BatchAnswerResponse(video_id=video_id, answers=results)
+
+
+@router.post("/sessions", response_model=SessionResponse)
+async def create_session_endpoint(request: SessionRequest):
+    """Start a new chat session for a video"""
+    try:
+        video_id = resolve_video_id(request.video_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    session_id = create_session(video_id, get_prompt_prefix(video_id))
+    return SessionResponse(session_id=session_id, video_id=video_id, conversation=[])
+
+
+@router.get("/sessions/{session_id}", response_model=SessionResponse)
+async def get_session_endpoint(session_id: str):
+    """Get a session's messages and running summary"""
+    session = get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    
+    return SessionResponse(
+        session_id=session_id,
+        video_id=session["video_id"],
+        conversation=get_session_messages(session_id),
+        summary=conversation_memories.get(session_id, {}).get("summary") or None
+    )
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session_endpoint(session_id: str):
+    """End a chat session"""
+    if get_session(session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    
+    delete_session(session_id)
+    return {"message": f"Session {session_id} deleted"}
 
 
 @router.get("/conversation/{video_id}")
 async def get_conversation(video_id: str):
-    """Get conversation history for a video"""
-    if video_id not in conversation_sessions:
+    """Get conversation history of the most recent session for a video"""
+    session_ids = get_video_sessions(video_id)
+    if not session_ids:
         return {"video_id": video_id, "conversation": []}
     
     return {
         "video_id": video_id,
-        "conversation": conversation_sessions[video_id]
+        "session_id": session_ids[-1],
+        "conversation": get_session_messages(session_ids[-1])
     }
 
 
 @router.delete("/conversation/{video_id}")
 async def clear_conversation(video_id: str):
-    """Clear conversation history for a video"""
-    if video_id in conversation_sessions:
-        conversation_sessions[video_id] = []
+    """Clear every chat session for a video"""
+    session_ids = get_video_sessions(video_id)
+    if session_ids:
+        for session_id in session_ids:
+            delete_session(session_id)
         return {"message": f"Conversation cleared for video {video_id}"}
     else:
         raise HTTPException(status_code=404, detail="No conversation found for this video")
@@ -1,7 +1,13 @@
 """Summary generation routes"""
+import json
+import weakref
 from fastapi import APIRouter, HTTPException, Body
-from app.models.models import SummaryResponse
-from app.services.summary_service import generate_summary
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.models.models import SummaryResponse, HighlightPoint
+from app.services.summary_service import generate_summary, iter_summary_events
+from app.core.scheduler import scheduler
+from app.core.storage import video_summaries, video_transcripts
 from typing import Dict
 
 router = APIRouter(prefix="/summaries", tags=["summary"])
@@ -11,7 +17,7 @@ router = APIRouter(prefix="/summaries", tags=["summary"])
 # This endpoint matches the frontend requirement to POST to /summaries/generate
 
 @router.post("/generate", response_model=SummaryResponse)
-async def generate_summary_endpoint(payload: Dict[str, str] = Body(...)):
+def generate_summary_endpoint(payload: Dict[str, str] = Body(...)):
     """
     Generate comprehensive timestamped summary for a processed video.
     
@@ -20,24 +26,75 @@ async def generate_summary_endpoint(payload: Dict[str, str] = Body(...)):
         
     Returns:
         SummaryResponse: Structured summary with timestamps.
+        Responds 429 with Retry-After when too many summaries are in progress.
     """
     video_id = payload.get("video_id")
     if not video_id:
         raise HTTPException(status_code=400, detail="video_id is required")
         
-    try:
-        result = generate_summary(video_id)
-        return SummaryResponse(**result)
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
+    with scheduler.admit("summary"):
+        try:
+            result = generate_summary(video_id)
+            return SummaryResponse(**result)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
 
 
-@router.get("/{video_id}")
+@router.post("/generate/stream")
+def generate_summary_stream_endpoint(payload: Dict[str, str] = Body(...)):
+    """
+    Generate a summary as Server-Sent Events.
+
+    Emits a `highlight` event for each segment as soon as its LLM call
+    returns (payload: HighlightPoint plus `index` and `total`), then a
+    `summary` event with the full SummaryResponse. Failures are reported
+    as an `error` event. Responds 429 with Retry-After (before streaming)
+    when too many summaries are in progress.
+
+    Args:
+        payload: Dict containing 'video_id'.
+    """
+    video_id = payload.get("video_id")
+    if not video_id:
+        raise HTTPException(status_code=400, detail="video_id is required")
+    if video_id not in video_transcripts:
+        raise HTTPException(status_code=404, detail="Video not found. Please process the video first.")
+
+    # Admitted here so a full queue is a 429, released when the stream ends. A client that
+    # disconnects before the body starts never runs the generator, so the response's
+    # background task and the generator's finalizer release it too (finish() is idempotent).
+    job = scheduler.admit("summary")
+
+    def event_stream():
+        try:
+            for event, data in iter_summary_events(video_id):
+                if event == "highlight":
+                    data = {"index": data["index"], "total": data["total"],
+                            **HighlightPoint(**data).model_dump()}
+                else:
+                    data = SummaryResponse(**data).model_dump()
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': f'Error generating summary: {str(e)}'})}\n\n"
+        finally:
+            job.finish()
+
+    stream = event_stream()
+    weakref.finalize(stream, job.finish)
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(job.finish)
+    )
+
+
+@router.get("/{video_id}", response_model=SummaryResponse)
 async def get_summary_endpoint(video_id: str):
-    """Get summary if exists (placeholder if needed)"""
-    # Previously implemented?
-    # Logic same as generate mostly if caching is used.
-    # For now just generate.
-    pass
+    """Get a previously generated summary without calling the LLM"""
+    if video_id not in video_summaries:
+        raise HTTPException(status_code=404, detail="No summary generated for this video yet")
+
+    return SummaryResponse(**video_summaries[video_id])
@@ -1,31 +1,57 @@
 """Video processing routes"""
-from fastapi import APIRouter, HTTPException
-from app.models.models import VideoRequest, VideoResponse
-from app.services.video_service import process_video
-from app.core.storage import vector_stores, video_info
+import hashlib
+import json
+from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request, Response
+from app.models.models import (
+    VideoRequest, VideoResponse, ChunksResponse, TranscriptSearchResponse, TranscriptCompletionResponse
+)
+from app.services.video_service import process_video, get_chunks
+from app.services.bundle_service import export_video, import_bundle
+from app.services.precompute_service import schedule_precompute
+from app.services.search_service import search_transcript, complete_transcript_terms, drop_transcript_index
+from app.services.prefetch_service import drop_prefetched
+from app.core.scheduler import scheduler
+from app.core.config import CHUNK_CACHE_MAX_AGE
+from app.services.memory_service import get_video_sessions, delete_session
+from app.core.storage import (
+    vector_stores, video_info, video_transcripts, video_metadata, web_vector_stores,
+    summary_segments, video_summaries, precomputed_answers
+)
 
 # Router configuration
 router = APIRouter(prefix="/videos", tags=["videos"])
 
 
 @router.post("/process", response_model=VideoResponse)
-async def process_video_endpoint(request: VideoRequest):
+def process_video_endpoint(request: VideoRequest):
     """
     Process a YouTube video and create vector store.
     
+    With embedding_mode "lazy" or "background" the response comes as soon
+    as the transcript is stored: summaries and keyword search work right
+    away, and the vector index is built on the first question (or in the
+    background at low priority).
+    
     Args:
-        request: VideoRequest object containing the YouTube URL.
+        request: VideoRequest object containing the YouTube URL and optional embedding_mode.
         
     Returns:
         VideoResponse: Details of the processed video including processing stats.
+        Responds 429 with Retry-After when too many videos are being processed.
+        Newly processed videos are queued for idle-time precomputation of
+        their summary and standard answers.
     """
-    try:
-        result = process_video(request.video_url)
-        return VideoResponse(**result)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    with scheduler.admit("embed"):
+        try:
+            result = process_video(request.video_url, embedding_mode=request.embedding_mode)
+            if result["status"] == "processed":
+                schedule_precompute(result["video_id"])
+            return VideoResponse(**result)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
 @router.get("/list")
@@ -41,7 +67,8 @@ async def get_processed_videos():
             {
                 "video_id": vid,
                 "info": info,
-                "processed": True
+                "processed": True,
+                "indexed": vid in vector_stores
             }
             for vid, info in video_info.items()
         ]
@@ -50,10 +77,133 @@ async def get_processed_videos():
 
 @router.delete("/{video_id}")
 async def delete_video(video_id: str):
-    """Delete a processed video from memory"""
-    if video_id in vector_stores:
-        del vector_stores[video_id]
+    """Delete a processed video and everything held for it (index, transcript, summaries, sessions)"""
+    if video_id in video_info:
+        vector_stores.pop(video_id, None)  # Absent if embedding was deferred
         del video_info[video_id]
+        video_transcripts.pop(video_id, None)
+        video_metadata.pop(video_id, None)
+        web_vector_stores.pop(video_id, None)
+        summary_segments.pop(video_id, None)
+        video_summaries.pop(video_id, None)
+        precomputed_answers.pop(video_id, None)
+        drop_transcript_index(video_id)
+        drop_prefetched(video_id)
+        for session_id in get_video_sessions(video_id):
+            delete_session(session_id)
         return {"message": f"Video {video_id} deleted successfully"}
     else:
         raise HTTPException(status_code=404, detail="Video not found")
+
+
+@router.get("/{video_id}/chunks", response_model=ChunksResponse)
+def get_chunks_endpoint(video_id: str, ids: str, request: Request, response: Response):
+    """
+    Text of transcript chunks referenced by a compact answer.
+    
+    Responses carry Cache-Control and an ETag of their content, so browsers
+    and proxies reuse them and revalidate with If-None-Match (304) once they
+    expire; reprocessing a video changes the ETag.
+    
+    Args:
+        video_id: ID of a processed video
+        ids: Comma-separated chunk IDs, e.g. ?ids=3,4,7
+    """
+    try:
+        chunk_ids = [int(chunk_id) for chunk_id in ids.split(",") if chunk_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    
+    try:
+        chunks = get_chunks(video_id, chunk_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    etag = '"' + hashlib.sha1(json.dumps(chunks, sort_keys=True).encode("utf-8")).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CHUNK_CACHE_MAX_AGE}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    response.headers.update(headers)
+    return ChunksResponse(video_id=video_id, chunks=chunks)
+
+
+@router.get("/{video_id}/search", response_model=TranscriptSearchResponse)
+def search_transcript_endpoint(video_id: str, q: str, prefix: bool = False, limit: int = 50):
+    """
+    Find where words are said in a video, without calling the LLM.
+    
+    Matches the words of q as an exact phrase (case and punctuation
+    ignored, across caption snippet boundaries) and returns every
+    occurrence with snippet timestamps in milliseconds.
+    
+    Args:
+        video_id: ID of a processed video
+        q: Words to find, e.g. ?q=gradient descent
+        prefix: Treat the last word as a prefix, for search-as-you-type
+        limit: Maximum matches returned (total counts all of them)
+    """
+    try:
+        result = search_transcript(video_id, q, prefix=prefix, limit=max(1, min(limit, 500)))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return TranscriptSearchResponse(video_id=video_id, query=q, **result)
+
+
+@router.get("/{video_id}/search/complete", response_model=TranscriptCompletionResponse)
+def complete_transcript_endpoint(video_id: str, q: str, limit: int = 10):
+    """Autocomplete: transcript words starting with the last word of q, most frequent first"""
+    try:
+        result = complete_transcript_terms(video_id, q, limit=max(1, min(limit, 100)))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return TranscriptCompletionResponse(video_id=video_id, prefix=q, **result)
+
+
+@router.get("/{video_id}/export")
+def export_video_endpoint(video_id: str):
+    """
+    Download a processed video as a portable bundle.
+    
+    The bundle (.npz) contains the index vectors, docstore, transcript,
+    metadata, cached summary and embedding model ID, so another node can
+    import it without re-running ingestion.
+    """
+    try:
+        bundle = export_video(video_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return Response(
+        content=bundle,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{video_id}.ytqa.npz"'}
+    )
+
+
+@router.post("/import")
+def import_videos_endpoint(files: List[UploadFile] = File(...), overwrite: bool = False):
+    """
+    Import one or more exported bundles (multipart upload, field "files").
+    
+    No Ollama calls are made. Bundles built with a different embedding
+    model are refused. Each file gets its own result, so one bad bundle
+    does not fail the others.
+    
+    Args:
+        files: Bundle files from /videos/{video_id}/export
+        overwrite: Replace videos that are already processed
+    """
+    results = []
+    for upload in files:
+        try:
+            result = import_bundle(upload.file.read(), overwrite=overwrite)
+            if result["status"] == "imported":
+                schedule_precompute(result["video_id"])
+            results.append({"filename": upload.filename, **result})
+        except ValueError as e:
+            results.append({"filename": upload.filename, "status": "error", "error": str(e)})
+    
+    return {"results": results}
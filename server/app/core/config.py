@@ -13,29 +13,146 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
 # The embedding model used for vectorizing text chunks
 OLLAMA_EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
+# Comma-separated Ollama servers to load-balance chat and embedding requests over
+OLLAMA_BASE_URLS = [u.strip() for u in os.getenv("OLLAMA_BASE_URLS", OLLAMA_BASE_URL).split(",") if u.strip()]
+OLLAMA_EMBEDDING_BASE_URLS = [
+    u.strip() for u in os.getenv("OLLAMA_EMBEDDING_BASE_URLS", ",".join(OLLAMA_BASE_URLS)).split(",") if u.strip()
+]
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))  # In-flight requests per backend
+OLLAMA_ACQUIRE_TIMEOUT = float(os.getenv("OLLAMA_ACQUIRE_TIMEOUT", "120"))  # Max wait for a free backend slot
+OLLAMA_EJECT_AFTER_FAILURES = 3  # Consecutive failures before a backend is ejected
+OLLAMA_EJECT_SECONDS = 30  # How long an ejected backend is skipped (unless a health check restores it)
+OLLAMA_HEALTH_CHECK_SECONDS = 10  # Interval of the /api/tags health check (multi-backend pools only)
+# Scheduler: concurrent Ollama calls across all backends, and jobs allowed in flight per
+# priority class before new ones get 429 (0 = unbounded)
+SCHEDULER_MAX_CONCURRENCY = int(os.getenv(
+    "SCHEDULER_MAX_CONCURRENCY",
+    str(len(set(OLLAMA_BASE_URLS + OLLAMA_EMBEDDING_BASE_URLS)) * OLLAMA_MAX_CONCURRENCY)
+))
+SCHEDULER_QUEUE_LIMITS = {
+    "interactive": int(os.getenv("SCHEDULER_INTERACTIVE_LIMIT", "64")),
+    "embed": int(os.getenv("SCHEDULER_EMBED_LIMIT", "4")),
+    "summary": int(os.getenv("SCHEDULER_SUMMARY_LIMIT", "4")),
+    "background": int(os.getenv("SCHEDULER_BACKGROUND_LIMIT", "32")),
+}
+# How long Ollama keeps the chat model (and its cached prompt prefix) loaded between requests
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Storage settings
+# "memory": in-process dicts (single worker); "sqlite": SQLite + FAISS files shared by all workers
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")
+STORAGE_DIR = os.getenv("STORAGE_DIR", "data")
+INDEX_CACHE_SIZE = int(os.getenv("INDEX_CACHE_SIZE", "8"))  # Loaded FAISS indexes kept per worker
+TRANSCRIPT_INDEX_CACHE_SIZE = int(os.getenv("TRANSCRIPT_INDEX_CACHE_SIZE", "32"))  # Keyword search indexes kept per worker
+
+# Server settings
+WORKERS = int(os.getenv("WORKERS", "1"))  # uvicorn worker processes (use STORAGE_BACKEND=sqlite when > 1)
+# Import heavy dependencies in a background thread once the server is up ("0" loads them on first use)
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+WARMUP_RETRY_AFTER = 2  # Retry-After (seconds) of the 503 answered while the warm-up is running
+# Responses larger than this many bytes are gzip-compressed when the client accepts it
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1000"))
+# Browser cache lifetime of chunk text (revalidated by ETag after that)
+CHUNK_CACHE_MAX_AGE = int(os.getenv("CHUNK_CACHE_MAX_AGE", "3600"))
 
 # YouTube API Key (optional)
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
+# On-disk cache of raw transcripts and metadata, so re-ingestion runs offline (TTL 0 disables it)
+SOURCE_CACHE_DIR = os.getenv("SOURCE_CACHE_DIR", "cache")
+SOURCE_CACHE_TTL_SECONDS = int(os.getenv("SOURCE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
 
 # RAG parameters
 # RAG (Retrieval-Augmented Generation) parameters
+# "snippet": chunks follow caption snippets, end at sentence/pause boundaries, no overlap;
+# "recursive": character splitter over the joined transcript with CHUNK_OVERLAP
+CHUNKER = os.getenv("CHUNKER", "snippet")
 CHUNK_SIZE = 600       # Number of characters per text chunk
-CHUNK_OVERLAP = 100    # Overlap between chunks to maintain context
+CHUNK_OVERLAP = 100    # Overlap between chunks to maintain context (recursive chunker)
+CHUNK_MIN_CHARS = 300  # Snippet chunker: shortest chunk that may end at a boundary
+CHUNK_PAUSE_SECONDS = 1.0  # Snippet chunker: silence between snippets treated as a boundary
+CHUNK_WINDOW_SIZE = 1  # Neighbouring chunks added on each side of a retrieved chunk
+# When /videos/process builds the vector index: "eager" before responding, "lazy" on the first
+# question, "background" at background priority after responding (summaries never need it)
+INGEST_EMBEDDING_MODE = os.getenv("INGEST_EMBEDDING_MODE", "eager")
+# Pre-embedding cleaning: strip caption noise ([Music], ♪, >>) and embed one chunk per near-duplicate cluster
+CAPTION_CLEANING = os.getenv("CAPTION_CLEANING", "1") == "1"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))  # Estimated Jaccard similarity of duplicates (0 disables)
+DEDUP_SHINGLE_WORDS = 3    # Words per shingle
+DEDUP_PERMUTATIONS = 64    # MinHash signature length
 DEFAULT_K = 3          # Default number of documents to retrieve
 MAX_K = 6              # Maximum number of documents to retrieve for complex queries
 MIN_K = 2              # Minimum number of documents to retrieve
 
+# Context packing settings (token counts are estimated for OLLAMA_MODEL)
+CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "0"))  # 0 = infer from the model family
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "800"))  # Video context in the answer prompt
+HYBRID_VIDEO_TOKEN_BUDGET = int(os.getenv("HYBRID_VIDEO_TOKEN_BUDGET", "300"))  # Video context in hybrid answers
+WEB_CONTEXT_TOKEN_BUDGET = int(os.getenv("WEB_CONTEXT_TOKEN_BUDGET", "600"))  # Web context in hybrid answers
+
 # Context compression settings
-MAX_CONTEXT_LENGTH = 1500
+# "extractive": keep the sentences most similar to the question (no LLM call)
+# "llm": summarize the retrieved chunks with an extra LLM generation
+COMPRESSION_MODE = os.getenv("COMPRESSION_MODE", "extractive")
+EXTRACTIVE_SENTENCE_WORDS = 30        # Caption text without punctuation is split into windows of this size
+MAX_CONTEXT_TOKENS = 400              # Target size of compressed context
+COMPRESSION_INPUT_TOKEN_BUDGET = 800  # Context handed to the compression LLM
 COMPRESSION_ENABLED = True
 
+# Question routing settings
+# "embedding": route by intent centroids and video coverage; "keyword": phrase lists only
+ROUTER_MODE = os.getenv("ROUTER_MODE", "embedding")
+# Coverage is relative to the video's own scores: how many standard deviations the question's best
+# chunk stands above its median chunk (calibrated with scripts/retrieval_eval.py --routing)
+ROUTER_COVERAGE_THRESHOLD = float(os.getenv("ROUTER_COVERAGE_THRESHOLD", "1.5"))  # Below this the video covers the question poorly
+ROUTER_MIN_COVERAGE = float(os.getenv("ROUTER_MIN_COVERAGE", "0.5"))  # Below this the video does not cover it at all
+ROUTER_MIN_CHUNKS = 8  # Fewer transcript chunks give no usable score distribution (keyword routing instead)
+ROUTER_INTENT_MARGIN = float(os.getenv("ROUTER_INTENT_MARGIN", "0.03"))  # External-vs-video centroid similarity margin
+
 # Conversation settings
 MAX_CONVERSATION_MESSAGES = 5
 MAX_CONVERSATION_HISTORY = 10
+CONVERSATION_SUMMARY_MAX_WORDS = 120  # Running summary of turns older than the latest one
+CONVERSATION_MESSAGE_TOKENS = 300     # Cap per message included verbatim in the prompt
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))  # Idle chat sessions are evicted after this
+SESSION_SWEEP_INTERVAL_SECONDS = int(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "300"))  # Minimum time between scans for expired sessions
 
 # Summary settings
-SUMMARY_INTERVAL_SECONDS = 480  # 8 minutes
-MAX_SUMMARY_SEGMENTS = 10
+SUMMARY_INTERVAL_SECONDS = 480  # 8 minutes (minimum segment length; widened for long videos)
+MAX_SUMMARY_SEGMENTS = 10       # Highlights per video; the whole transcript is always covered
+SUMMARY_SEGMENT_MAX_CHARS = 6000  # Longer segments are condensed piece by piece before highlighting
+SUMMARY_REDUCE_FAN_IN = 6       # Partial summaries combined per reduce step
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "4"))  # Parallel LLM calls per summary
+
+# Idle-time precomputation after ingestion: the summary plus answers to standard questions,
+# run at background priority once no higher-priority work has been seen for PRECOMPUTE_IDLE_SECONDS
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "1") == "1"
+PRECOMPUTE_QUESTIONS = [
+    question.strip() for question in os.getenv(
+        "PRECOMPUTE_QUESTIONS",
+        "What is this video about?|What are the key takeaways?|What examples are given in the video?"
+    ).split("|") if question.strip()
+]
+PRECOMPUTE_IDLE_SECONDS = float(os.getenv("PRECOMPUTE_IDLE_SECONDS", "5"))
+
+# Request deadlines for /questions/ask (a positive X-Request-Timeout header in seconds overrides the default;
+# 0 or a missing header keeps it, and REQUEST_DEADLINE_SECONDS=0 means no deadline)
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "60"))
+DEADLINE_WEB_SEARCH_SECONDS = 15.0  # Budget needed to search the web; below it the answer is video-only
+DEADLINE_WEB_PAGE_SECONDS = 8.0     # Budget needed to fetch another result page; below it snippets only
+DEADLINE_COMPRESSION_SECONDS = 10.0  # Budget needed for LLM compression; below it context is truncated
+DEADLINE_FULL_ANSWER_SECONDS = 20.0  # Below this budget the answer is capped at SHORT_ANSWER_TOKENS
+SHORT_ANSWER_TOKENS = 200
+
+# Batch question answering
+BATCH_ASK_MAX_QUESTIONS = int(os.getenv("BATCH_ASK_MAX_QUESTIONS", "50"))
+BATCH_ASK_MAX_WORKERS = int(os.getenv("BATCH_ASK_MAX_WORKERS", "4"))  # Parallel generations per batch
+BATCH_ASK_TIMEOUT_SECONDS = float(os.getenv("BATCH_ASK_TIMEOUT_SECONDS", "300"))  # Unfinished answers are reported as timed out
+
+# Retrieval-as-you-type: /questions/prefetch embeds and searches the draft question ahead of /ask
+PREFETCH_CACHE_SIZE = int(os.getenv("PREFETCH_CACHE_SIZE", "512"))  # Prefetched questions kept per worker
+PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "120"))
+PREFETCH_MIN_CHARS = int(os.getenv("PREFETCH_MIN_CHARS", "8"))  # Shorter drafts are not worth an embedding call
+PREFETCH_MAX_IN_FLIGHT = int(os.getenv("PREFETCH_MAX_IN_FLIGHT", "8"))  # Beyond this, prefetches are skipped
 
 # Web search settings
 WEB_SEARCH_RESULTS = 5
@@ -0,0 +1,46 @@
+"""Per-request time budget.
+
+A Deadline is created when a request arrives and handed to every stage that
+can block (web search, page fetches, context compression, LLM calls). Each
+stage checks the remaining budget, bounds its network timeouts by it, and
+takes a cheaper path when too little is left; the shortcuts taken are
+recorded so the response can report them.
+"""
+import math
+import time
+from typing import List, Optional
+
+
+class Deadline:
+    """Time budget of one request; seconds=None (or 0) means unbounded"""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self.shortcuts: List[str] = []
+
+    def remaining(self) -> float:
+        """Seconds left (infinite when unbounded)"""
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, seconds: float) -> bool:
+        """At least this many seconds are left"""
+        return self.remaining() >= seconds
+
+    def timeout(self, cap: Optional[float] = None) -> Optional[float]:
+        """Network timeout for the next call: the remaining budget, at most cap (None when unbounded)"""
+        remaining = self.remaining()
+        if math.isinf(remaining):
+            return cap
+        remaining = max(remaining, 0.1)
+        return min(cap, remaining) if cap is not None else remaining
+
+    def shortcut(self, name: str) -> None:
+        """Record a degraded path taken to stay within the budget"""
+        if name not in self.shortcuts:
+            self.shortcuts.append(name)
@@ -0,0 +1,223 @@
+"""Load-balanced pools of Ollama backends.
+
+Chat and embedding requests go through an httpx transport that sends each
+HTTP request to the backend of its pool with the fewest outstanding
+requests. Each backend has a concurrency cap; when every backend is at its
+cap, requests wait for a free slot. Backends that fail repeatedly (connection
+errors or 5xx responses) are ejected for a while, and a background health
+check (GET /api/tags) brings them back once they respond again. Before
+that, each request waits for a slot from the priority scheduler
+(app/core/scheduler.py).
+
+The transport itself lives in app/core/ollama_transport.py. Use
+chat_model() and embedding_model() instead of constructing ChatOllama or
+OllamaEmbeddings directly so every call is routed through the pools.
+"""
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from app.core.config import (
+    OLLAMA_BASE_URLS, OLLAMA_EMBEDDING_BASE_URLS, OLLAMA_MODEL, OLLAMA_EMBEDDING_MODEL,
+    OLLAMA_KEEP_ALIVE, OLLAMA_MAX_CONCURRENCY, OLLAMA_ACQUIRE_TIMEOUT,
+    OLLAMA_EJECT_AFTER_FAILURES, OLLAMA_EJECT_SECONDS, OLLAMA_HEALTH_CHECK_SECONDS
+)
+from app.core.scheduler import PRIORITY_CLASSES
+
+
+class OllamaBackend:
+    """One Ollama server and its routing state (guarded by the pool's lock)"""
+
+    def __init__(self, url: str, max_concurrency: int):
+        self.url = url.rstrip("/")
+        parts = urlsplit(self.url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port
+        self.max_concurrency = max_concurrency
+        self.outstanding = 0
+        self.served = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def is_ejected(self, now: float) -> bool:
+        return self.ejected_until > now
+
+    def status(self, now: float) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": not self.is_ejected(now),
+            "outstanding": self.outstanding,
+            "max_concurrency": self.max_concurrency,
+            "served": self.served,
+            "consecutive_failures": self.consecutive_failures
+        }
+
+
+class OllamaPool:
+    """Least-outstanding-requests routing over a set of Ollama backends"""
+
+    def __init__(self, name: str, urls: List[str], max_concurrency: int = OLLAMA_MAX_CONCURRENCY,
+                 acquire_timeout: float = OLLAMA_ACQUIRE_TIMEOUT,
+                 eject_after_failures: int = OLLAMA_EJECT_AFTER_FAILURES,
+                 eject_seconds: float = OLLAMA_EJECT_SECONDS,
+                 health_check_seconds: float = OLLAMA_HEALTH_CHECK_SECONDS):
+        if not urls:
+            raise ValueError(f"Ollama pool '{name}' needs at least one URL")
+        self.name = name
+        self.backends = [OllamaBackend(url, max_concurrency) for url in urls]
+        self.acquire_timeout = acquire_timeout
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        self.health_check_seconds = health_check_seconds
+        self._cond = threading.Condition()
+        self._health_thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return self.backends[0].url
+
+    def acquire(self, exclude: Optional[set] = None, timeout: Optional[float] = None) -> OllamaBackend:
+        """
+        Reserve a slot on the least busy healthy backend, waiting while all are at their cap.
+
+        Ejected backends are only used when no healthy one remains, so a full
+        outage surfaces as request errors rather than an empty pool.
+        Raises httpx.PoolTimeout if no slot frees up within acquire_timeout
+        (or timeout, if shorter).
+        """
+        self._ensure_health_checks()
+        exclude = exclude or set()
+        wait = self.acquire_timeout if timeout is None else min(timeout, self.acquire_timeout)
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while True:
+                now = time.time()
+                candidates = [b for b in self.backends if b.url not in exclude] or self.backends
+                healthy = [b for b in candidates if not b.is_ejected(now)] or candidates
+                free = [b for b in healthy if b.outstanding < b.max_concurrency]
+                if free:
+                    # Ties go to the backend that has served the fewest requests
+                    backend = min(free, key=lambda b: (b.outstanding / b.max_concurrency, b.served))
+                    backend.outstanding += 1
+                    backend.served += 1
+                    return backend
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    import httpx
+                    raise httpx.PoolTimeout(f"No free Ollama backend in pool '{self.name}'")
+                self._cond.wait(remaining)
+
+    def release(self, backend: OllamaBackend, ok: bool) -> None:
+        """Free a slot and record whether the request succeeded"""
+        with self._cond:
+            backend.outstanding -= 1
+            if ok:
+                backend.consecutive_failures = 0
+            else:
+                backend.consecutive_failures += 1
+                if backend.consecutive_failures >= self.eject_after_failures and not backend.is_ejected(time.time()):
+                    backend.ejected_until = time.time() + self.eject_seconds
+                    print(f"Ollama pool '{self.name}': ejected {backend.url} for {self.eject_seconds:.0f}s")
+            self._cond.notify_all()
+
+    def check_health(self) -> None:
+        """Probe every backend once; eject the ones that do not answer, restore the ones that do"""
+        import httpx
+
+        for backend in self.backends:
+            try:
+                ok = httpx.get(f"{backend.url}/api/tags", timeout=2.0).status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            with self._cond:
+                if ok:
+                    if backend.is_ejected(time.time()):
+                        print(f"Ollama pool '{self.name}': {backend.url} is healthy again")
+                    backend.consecutive_failures = 0
+                    backend.ejected_until = 0.0
+                else:
+                    backend.ejected_until = time.time() + self.eject_seconds
+                self._cond.notify_all()
+
+    def _health_loop(self) -> None:
+        while True:
+            time.sleep(self.health_check_seconds)
+            self.check_health()
+
+    def _ensure_health_checks(self) -> None:
+        # Started on first use so importing the module has no side effects
+        if self._health_thread is not None or len(self.backends) < 2 or self.health_check_seconds <= 0:
+            return
+        with self._cond:
+            if self._health_thread is None:
+                self._health_thread = threading.Thread(
+                    target=self._health_loop, name=f"ollama-health-{self.name}", daemon=True)
+                self._health_thread.start()
+
+    def status(self) -> List[Dict]:
+        now = time.time()
+        with self._cond:
+            return [backend.status(now) for backend in self.backends]
+
+
+chat_pool = OllamaPool("chat", OLLAMA_BASE_URLS)
+embedding_pool = OllamaPool("embedding", OLLAMA_EMBEDDING_BASE_URLS)
+
+# Per pool: one shared connection pool and one PoolTransport per priority class
+_transports: Dict[str, Dict] = {}
+_transports_lock = threading.Lock()
+
+
+def _transport(pool: OllamaPool, priority: str):
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {priority}")
+    # httpx is imported on first use to keep application startup fast
+    import httpx
+    from app.core.ollama_transport import PoolTransport
+
+    with _transports_lock:
+        transports = _transports.setdefault(pool.name, {"http": httpx.HTTPTransport()})
+        if priority not in transports:
+            transports[priority] = PoolTransport(pool, transports["http"], priority)
+        return transports[priority]
+
+
+def chat_model(temperature: float = 0.1, priority: str = "interactive", timeout: Optional[float] = None, **kwargs):
+    """
+    ChatOllama routed through the chat pool, scheduled in the given priority class.
+
+    timeout bounds each HTTP request to Ollama end to end, including the
+    wait for a scheduler slot (e.g. by a request deadline).
+    """
+    from langchain_ollama import ChatOllama
+
+    kwargs.setdefault("keep_alive", OLLAMA_KEEP_ALIVE)
+    client_kwargs = {"transport": _transport(chat_pool, priority)}
+    if timeout is not None:
+        client_kwargs["timeout"] = timeout
+    return ChatOllama(
+        model=OLLAMA_MODEL,
+        temperature=temperature,
+        base_url=chat_pool.base_url,
+        sync_client_kwargs=client_kwargs,
+        **kwargs
+    )
+
+
+def embedding_model(priority: str = "interactive"):
+    """OllamaEmbeddings routed through the embedding pool, scheduled in the given priority class"""
+    from langchain_ollama import OllamaEmbeddings
+
+    return OllamaEmbeddings(
+        model=OLLAMA_EMBEDDING_MODEL,
+        base_url=embedding_pool.base_url,
+        sync_client_kwargs={"transport": _transport(embedding_pool, priority)}
+    )
+
+
+def pool_status() -> Dict[str, List[Dict]]:
+    """Routing state of every backend, for the health endpoint"""
+    return {"chat": chat_pool.status(), "embedding": embedding_pool.status()}
@@ -0,0 +1,107 @@
+"""httpx transport that routes Ollama requests over an OllamaPool under the priority scheduler"""
+import time
+from typing import Optional
+import httpx
+from app.core.ollama_pool import OllamaPool
+from app.core.scheduler import scheduler
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """
+    Response body that frees the backend slot once fully read or closed.
+
+    With expires_at set, reading past it raises httpx.ReadTimeout, so a
+    streamed generation cannot outlive the caller's total time budget.
+    """
+
+    def __init__(self, stream: httpx.SyncByteStream, on_close, ok: bool, expires_at: Optional[float] = None):
+        self._stream = stream
+        self._on_close = on_close
+        self._ok = ok
+        self._expires_at = expires_at
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                if self._expires_at is not None and time.monotonic() > self._expires_at:
+                    raise httpx.ReadTimeout("Ollama response exceeded the request deadline")
+                yield chunk
+        except httpx.ReadTimeout:
+            raise  # Our deadline, not the backend's fault
+        except Exception:
+            self._ok = False  # Backend dropped the connection mid-response
+            raise
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close:
+                on_close(self._ok)
+
+
+class PoolTransport(httpx.BaseTransport):
+    """
+    httpx transport that sends each request to a backend chosen by an OllamaPool.
+
+    Every request first waits for a scheduler slot in its priority class;
+    the slot and the backend are released once the response is closed.
+    A client timeout (set from a request deadline) bounds the whole
+    exchange, not just each read: waiting for the slots raises
+    httpx.PoolTimeout, and a response still streaming when it runs out
+    raises httpx.ReadTimeout.
+    """
+
+    def __init__(self, pool: OllamaPool, transport: httpx.HTTPTransport, priority: str):
+        self.pool = pool
+        self.priority = priority
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        timeouts = request.extensions.get("timeout", {})
+        pool_timeout = timeouts.get("pool")
+        started = time.monotonic()
+        try:
+            scheduler.acquire(self.priority, timeout=pool_timeout)
+        except TimeoutError as e:
+            raise httpx.PoolTimeout(str(e), request=request)
+        try:
+            remaining = None if pool_timeout is None else max(0.0, pool_timeout - (time.monotonic() - started))
+            backend, response = self._send(request, remaining)
+        except BaseException:
+            scheduler.release(self.priority)
+            raise
+
+        def on_close(ok: bool) -> None:
+            self.pool.release(backend, ok)
+            scheduler.release(self.priority)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, on_close, ok=response.status_code < 500,
+                                    expires_at=started + timeouts["read"] if timeouts.get("read") else None),
+            extensions=response.extensions
+        )
+
+    def _send(self, request: httpx.Request, timeout=None):
+        tried = set()
+        while True:
+            backend = self.pool.acquire(exclude=tried, timeout=timeout)
+            tried.add(backend.url)
+            request.url = request.url.copy_with(scheme=backend.scheme, host=backend.host, port=backend.port)
+            request.headers["Host"] = request.url.netloc.decode("ascii")
+            try:
+                return backend, self._transport.handle_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                # Nothing reached the backend, so the request can safely go elsewhere
+                self.pool.release(backend, ok=False)
+                if len(tried) >= len(self.pool.backends):
+                    raise
+            except BaseException:
+                self.pool.release(backend, ok=False)
+                raise
+
+    def close(self) -> None:
+        pass  # The underlying connection pool is shared by every client of the pool
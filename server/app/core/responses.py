@@ -0,0 +1,19 @@
+"""JSON response class rendered with orjson"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson, several times faster than the stdlib encoder.
+
+    Used as the app's default response class. Recent FastAPI versions bypass
+    it for routes with a response model, which they serialize directly in
+    pydantic-core; it still encodes plain dict responses and every response
+    on older FastAPI versions.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
@@ -0,0 +1,183 @@
+"""Admission control and priority scheduling for LLM and embedding work.
+
+Two levels:
+- Jobs (an /ask request, a video ingestion, a summary run) are admitted per
+  priority class. Each class has a bounded number of jobs in flight; beyond
+  that admit() raises SchedulerFullError, which the API turns into a
+  429 with Retry-After instead of letting requests time out.
+- Calls (every HTTP request to Ollama) wait for one of
+  SCHEDULER_MAX_CONCURRENCY slots. Waiting calls are served strictly by
+  class (interactive > embed > summary > background), then first come first
+  served, so a bulk summary run cannot starve interactive questions.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from app.core.config import SCHEDULER_MAX_CONCURRENCY, SCHEDULER_QUEUE_LIMITS
+
+# Highest priority first
+PRIORITY_CLASSES = ("interactive", "embed", "summary", "background")
+
+# Recent samples kept per class for wait-time and duration metrics
+_SAMPLE_WINDOW = 500
+
+
+class SchedulerFullError(Exception):
+    """Raised when a priority class already has its maximum number of jobs in flight"""
+
+    def __init__(self, priority: str, retry_after: int):
+        super().__init__(f"Server busy: too many {priority} requests in progress, retry in {retry_after}s")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class _ClassStats:
+    def __init__(self, queue_limit: int):
+        self.queue_limit = queue_limit
+        self.jobs = 0
+        self.waiting = 0
+        self.running = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.waits = deque(maxlen=_SAMPLE_WINDOW)      # Seconds a call waited for a slot
+        self.durations = deque(maxlen=_SAMPLE_WINDOW)  # Seconds a job took end to end
+
+
+class Job:
+    """An admitted unit of work; use as a context manager (or call finish()) to release it"""
+
+    def __init__(self, scheduler: "Scheduler", priority: str):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.started = time.monotonic()
+        self._finished = False
+
+    def finish(self) -> None:
+        if not self._finished:
+            self._finished = True
+            self.scheduler._finish(self)
+
+    def __enter__(self) -> "Job":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.finish()
+
+
+class Scheduler:
+    """Bounded per-class admission plus priority-ordered concurrency slots"""
+
+    def __init__(self, max_concurrency: int = SCHEDULER_MAX_CONCURRENCY,
+                 queue_limits: Dict[str, int] = SCHEDULER_QUEUE_LIMITS):
+        self.max_concurrency = max_concurrency
+        self._stats = {name: _ClassStats(queue_limits.get(name, 0)) for name in PRIORITY_CLASSES}
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (class rank, sequence)
+        self._sequence = itertools.count()
+        self._running = 0
+
+    def _class(self, priority: str) -> _ClassStats:
+        if priority not in self._stats:
+            raise ValueError(f"Unknown priority class: {priority}")
+        return self._stats[priority]
+
+    def admit(self, priority: str) -> Job:
+        """
+        Admit a job of the given class or raise SchedulerFullError.
+
+        A limit of 0 means unbounded.
+        """
+        stats = self._class(priority)
+        with self._cond:
+            if stats.queue_limit and stats.jobs >= stats.queue_limit:
+                stats.rejected += 1
+                raise SchedulerFullError(priority, self._retry_after(stats))
+            stats.jobs += 1
+            stats.admitted += 1
+        return Job(self, priority)
+
+    def _finish(self, job: Job) -> None:
+        stats = self._stats[job.priority]
+        with self._cond:
+            stats.jobs -= 1
+            stats.durations.append(time.monotonic() - job.started)
+
+    def _retry_after(self, stats: _ClassStats) -> int:
+        """Rough time until a job of this class completes, from recent durations"""
+        if not stats.durations:
+            return 1
+        average = sum(stats.durations) / len(stats.durations)
+        return max(1, min(60, math.ceil(average * stats.jobs / max(1, self.max_concurrency))))
+
+    def acquire(self, priority: str, timeout: Optional[float] = None) -> None:
+        """
+        Block until a call slot is free and no higher-priority call is waiting.
+
+        Raises TimeoutError if no slot is granted within timeout seconds.
+        """
+        stats = self._class(priority)
+        entry = (PRIORITY_CLASSES.index(priority), next(self._sequence))
+        queued = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            stats.waiting += 1
+            while self._running >= self.max_concurrency or self._queue[0] != entry:
+                remaining = None if timeout is None else timeout - (time.monotonic() - queued)
+                if remaining is not None and remaining <= 0:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    stats.waiting -= 1
+                    # The next waiter may now be at the head of the queue
+                    self._cond.notify_all()
+                    raise TimeoutError(f"No {priority} call slot within {timeout:.1f}s")
+                self._cond.wait(remaining)
+            heapq.heappop(self._queue)
+            stats.waiting -= 1
+            stats.running += 1
+            stats.waits.append(time.monotonic() - queued)
+            self._running += 1
+            # The next waiter may also fit
+            self._cond.notify_all()
+
+    def release(self, priority: str) -> None:
+        with self._cond:
+            self._running -= 1
+            self._stats[priority].running -= 1
+            self._cond.notify_all()
+
+    def is_idle(self, priority: str) -> bool:
+        """True when no job of a class above priority is in flight and no such call is waiting"""
+        rank = PRIORITY_CLASSES.index(priority)
+        with self._cond:
+            return all(self._stats[name].jobs == 0 and self._stats[name].waiting == 0
+                       for name in PRIORITY_CLASSES[:rank])
+
+    def metrics(self) -> Dict:
+        """Queue depth, running calls, admissions and wait times per priority class"""
+        def percentile(samples, pct):
+            ordered = sorted(samples)
+            return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+        with self._cond:
+            classes = {}
+            for name, stats in self._stats.items():
+                waits = list(stats.waits)
+                classes[name] = {
+                    "queue_limit": stats.queue_limit,
+                    "jobs_in_flight": stats.jobs,
+                    "queued_calls": stats.waiting,
+                    "running_calls": stats.running,
+                    "admitted": stats.admitted,
+                    "rejected": stats.rejected,
+                    "wait_ms_avg": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                    "wait_ms_p95": round(1000 * percentile(waits, 0.95), 1)
+                }
+            return {"max_concurrency": self.max_concurrency, "running_calls": self._running, "classes": classes}
+
+
+scheduler = Scheduler()
@@ -1,12 +1,53 @@
-"""In-memory storage for vector stores and video data"""
+"""Storage for vector stores, video data and chat sessions.
+
+STORAGE_BACKEND selects where state lives:
+- "memory": plain dicts in the worker process (single worker only).
+- "sqlite": a SQLite database (WAL) for metadata, transcripts, summaries and
+  sessions plus FAISS index files under STORAGE_DIR, so several uvicorn
+  workers on one node serve the same library.
+
+Values read from the sqlite backend are copies; assign a mutated value back
+to the mapping to persist it.
+"""
+import os
 from typing import Dict, Any, List
 from app.models.models import ConversationMessage
+from app.core.config import (
+    STORAGE_BACKEND, STORAGE_DIR, INDEX_CACHE_SIZE
+)
+
+
+def _decode_messages(value: List[Dict]) -> List[ConversationMessage]:
+    return [ConversationMessage(**message) for message in value]
+
+
+if STORAGE_BACKEND == "sqlite":
+    from app.core.storage_backends import SQLiteDict, FaissIndexStore
+    from app.core.ollama_pool import embedding_model
+
+    _db_path = os.path.join(STORAGE_DIR, "library.db")
 
-# Global storage (in production, use a database)
-# Global storage dictionaries (in production, these should be replaced by a persistent database like PostgreSQL/Redis/Milvus)
-vector_stores: Dict[str, Any] = {}  # In-memory FAISS vector stores keyed by video_id
-video_info: Dict[str, Dict] = {}    # Basic video information (title, length, etc.) keyed by video_id
-video_transcripts: Dict[str, List[Dict]] = {}  # Full transcripts with timestamp data keyed by video_id
-video_metadata: Dict[str, Dict] = {}  # Raw YouTube metadata (view count, author, etc.) keyed by video_id
-web_vector_stores: Dict[str, Any] = {}  # (Optional) Vector stores for web search results, keyed by video_id
-conversation_sessions: Dict[str, List[ConversationMessage]] = {}  # Chat history for context-aware RAG, keyed by session/video_id
+    vector_stores = FaissIndexStore(os.path.join(STORAGE_DIR, "indexes"), embedding_model, INDEX_CACHE_SIZE)
+    video_info = SQLiteDict(_db_path, "video_info")
+    video_transcripts = SQLiteDict(_db_path, "video_transcripts")
+    video_metadata = SQLiteDict(_db_path, "video_metadata")
+    web_vector_stores: Dict[str, Any] = {}  # Not shared: web results are per request
+    summary_segments = SQLiteDict(_db_path, "summary_segments")
+    video_summaries = SQLiteDict(_db_path, "video_summaries")
+    precomputed_answers = SQLiteDict(_db_path, "precomputed_answers")
+    chat_sessions = SQLiteDict(_db_path, "chat_sessions")
+    conversation_sessions = SQLiteDict(_db_path, "conversation_sessions", decode=_decode_messages)
+    conversation_memories = SQLiteDict(_db_path, "conversation_memories")
+else:
+    # Global storage dictionaries (in production, these should be replaced by a persistent database like PostgreSQL/Redis/Milvus)
+    vector_stores: Dict[str, Any] = {}  # In-memory FAISS vector stores keyed by video_id
+    video_info: Dict[str, Dict] = {}    # Basic video information (title, length, etc.) keyed by video_id
+    video_transcripts: Dict[str, List[Dict]] = {}  # Full transcripts with timestamp data keyed by video_id
+    video_metadata: Dict[str, Dict] = {}  # Raw YouTube metadata (view count, author, etc.) keyed by video_id
+    web_vector_stores: Dict[str, Any] = {}  # (Optional) Vector stores for web search results, keyed by video_id
+    chat_sessions: Dict[str, Dict[str, Any]] = {}  # Chat session state (video_id, prompt_prefix, created_at, last_access) keyed by session_id
+    conversation_sessions: Dict[str, List[ConversationMessage]] = {}  # Chat history for context-aware RAG, keyed by session_id
+    conversation_memories: Dict[str, Dict[str, Any]] = {}  # Running summary of older turns ("summary", "covered" message count), keyed by session_id
+    summary_segments: Dict[str, Dict[str, Dict]] = {}  # Cached per-segment highlights keyed by video_id, then "interval:start"
+    video_summaries: Dict[str, Dict] = {}  # Completed summaries keyed by video_id
+    precomputed_answers: Dict[str, Dict[str, Dict]] = {}  # Answers to standard questions keyed by video_id, then normalized question
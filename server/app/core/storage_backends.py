@@ -0,0 +1,191 @@
+"""Storage backends shared by all worker processes on a node.
+
+SQLiteDict keeps JSON values in a SQLite table (WAL mode, so many readers
+and one writer work concurrently across processes). FaissIndexStore keeps
+each video's FAISS index in its own directory and caches recently used
+indexes in the worker, reloading them only when the files change.
+
+Both behave like dicts. Values are copies: after mutating a value read
+from a SQLiteDict it must be assigned back to persist the change.
+"""
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+def _encode(value: Any) -> str:
+    def default(obj):
+        if hasattr(obj, "model_dump"):
+            return obj.model_dump()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    return json.dumps(value, default=default)
+
+
+class SQLiteDict(MutableMapping):
+    """Dict-like JSON key/value table in a SQLite database"""
+
+    def __init__(self, db_path: str, table: str, decode: Optional[Callable[[Any], Any]] = None):
+        self.db_path = db_path
+        self.table = table
+        self.decode = decode
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, raw: str) -> Any:
+        value = json.loads(raw)
+        return self.decode(value) if self.decode else value
+
+    def __getitem__(self, key: str) -> Any:
+        row = self._connection().execute(
+            f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return self._load(row[0])
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                f"INSERT INTO {self.table} (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                (key, _encode(value), time.time())
+            )
+
+    def __delitem__(self, key: str) -> None:
+        with self._connection() as conn:
+            cursor = conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return self._connection().execute(
+            f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        # Insertion order, like a dict
+        rows = self._connection().execute(f"SELECT key FROM {self.table} ORDER BY rowid").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self._connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def items(self):
+        rows = self._connection().execute(f"SELECT key, value FROM {self.table} ORDER BY rowid").fetchall()
+        return [(key, self._load(raw)) for key, raw in rows]
+
+
+class FaissIndexStore(MutableMapping):
+    """
+    Dict-like store of FAISS vector stores saved as files, one directory per video.
+
+    Writes go to a temporary directory that is renamed into place, so other
+    workers never see a half-written index. Reads are served from a per-worker
+    LRU cache of loaded indexes, refreshed when the files on disk change.
+    Cached indexes must be treated as read-only.
+    """
+
+    def __init__(self, directory: str, embeddings_factory: Callable[[], Any], cache_size: int = 8):
+        self.directory = directory
+        self.embeddings_factory = embeddings_factory
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # video_id -> (mtime, vector store)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _mtime(self, key: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(os.path.join(self._path(key), "index.faiss"))
+        except OSError:
+            return None
+
+    def __getitem__(self, key: str) -> Any:
+        mtime = self._mtime(key)
+        if mtime is None:
+            with self._lock:
+                self._cache.pop(key, None)
+            raise KeyError(key)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] == mtime:
+                self._cache.move_to_end(key)
+                return cached[1]
+
+        from langchain_community.vectorstores import FAISS
+
+        # The files are written by this application only
+        vector_store = FAISS.load_local(self._path(key), self.embeddings_factory(),
+                                        allow_dangerous_deserialization=True)
+        self._remember(key, mtime, vector_store)
+        return vector_store
+
+    def loaded(self) -> Dict[str, Any]:
+        """Vector stores currently held in this worker's cache, by key"""
+        with self._lock:
+            return {key: vector_store for key, (_, vector_store) in self._cache.items()}
+
+    def _remember(self, key: str, mtime: float, vector_store: Any) -> None:
+        with self._lock:
+            self._cache[key] = (mtime, vector_store)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def __setitem__(self, key: str, vector_store: Any) -> None:
+        final_path = self._path(key)
+        tmp_path = f"{final_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        vector_store.save_local(tmp_path)
+
+        old_path = None
+        if os.path.exists(final_path):
+            old_path = f"{final_path}.old-{os.getpid()}-{threading.get_ident()}"
+            os.replace(final_path, old_path)
+        os.replace(tmp_path, final_path)
+        if old_path:
+            shutil.rmtree(old_path, ignore_errors=True)
+
+        self._remember(key, self._mtime(key), vector_store)
+
+    def __delitem__(self, key: str) -> None:
+        if self._mtime(key) is None:
+            raise KeyError(key)
+        shutil.rmtree(self._path(key), ignore_errors=True)
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._mtime(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        # Oldest first, so the last key is the most recently processed video
+        keys = [name for name in os.listdir(self.directory) if "." not in name and self._mtime(name)]
+        return iter(sorted(keys, key=self._mtime))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -0,0 +1,101 @@
+"""Background warm-up of heavy dependencies.
+
+The application imports LangChain, FAISS, the Ollama client and the web
+scraping libraries on first use, so a worker starts answering /health
+quickly. warm_up() then imports them in a background thread, so the first
+real request does not pay for them, and records how long each import took.
+
+Two threads importing the same interdependent packages (LangChain in
+particular) can hand one of them a partially initialized module, so code
+that imports heavy dependencies must not run alongside the warm-up: until
+it finishes the app answers 503 with Retry-After (except health checks).
+"""
+import importlib
+import threading
+import time
+from typing import Dict, Optional
+
+# Slowest first: the first questions need the Ollama client and FAISS
+WARMUP_MODULES = [
+    "langchain_ollama",
+    "httpx",
+    "faiss",
+    "langchain_community.vectorstores.faiss",
+    "langchain_community.docstore.in_memory",
+    "langchain_core.prompts",
+    "langchain_core.runnables",
+    "langchain_text_splitters",
+    "youtube_transcript_api",
+    "requests",
+    "bs4",
+    "duckduckgo_search",
+]
+
+_lock = threading.Lock()
+_finished = threading.Event()
+_report = {
+    "app_import_ms": None,
+    "warmup_started": False,
+    "warmup_finished": False,
+    "warmup_ms": None,
+    "modules_ms": {},
+    "errors": {}
+}
+
+
+def record_app_import(milliseconds: float) -> None:
+    """Store how long importing app.main took"""
+    with _lock:
+        _report["app_import_ms"] = round(milliseconds, 1)
+
+
+def warm_up() -> None:
+    """Import every module in WARMUP_MODULES, recording the time each one took"""
+    started = time.perf_counter()
+    try:
+        for name in WARMUP_MODULES:
+            module_started = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                # A missing optional dependency only matters to the feature using it
+                with _lock:
+                    _report["errors"][name] = str(e)
+                continue
+            with _lock:
+                _report["modules_ms"][name] = round(1000 * (time.perf_counter() - module_started), 1)
+    finally:
+        with _lock:
+            _report["warmup_finished"] = True
+            _report["warmup_ms"] = round(1000 * (time.perf_counter() - started), 1)
+        _finished.set()
+    print(f"Warm-up finished in {_report['warmup_ms']:.0f} ms")
+
+
+def start_warmup() -> Optional[threading.Thread]:
+    """Run warm_up() in a daemon thread (once per process)"""
+    with _lock:
+        if _report["warmup_started"]:
+            return None
+        _report["warmup_started"] = True
+    thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def warmup_pending() -> bool:
+    """True while a started warm-up is still importing"""
+    with _lock:
+        return _report["warmup_started"] and not _report["warmup_finished"]
+
+
+def wait_for_warmup() -> None:
+    """Block until a started warm-up has finished (returns at once if none was started)"""
+    if warmup_pending():
+        _finished.wait()
+
+
+def import_report() -> Dict:
+    """App import time, warm-up progress and per-module import times"""
+    with _lock:
+        return {**_report, "modules_ms": dict(_report["modules_ms"]), "errors": dict(_report["errors"])}
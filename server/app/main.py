@@ -1,14 +1,40 @@
 """Main FastAPI application entry point"""
-from fastapi import FastAPI
+import time
+from typing import Optional
+
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from app.controllers import video_controller, chat_controller, summary_controller
+from app.core.ollama_pool import pool_status
+from app.core.scheduler import scheduler, SchedulerFullError
+from app.core.config import WARMUP_ON_STARTUP, WARMUP_RETRY_AFTER, GZIP_MINIMUM_SIZE
+from app.core.warmup import record_app_import, start_warmup, import_report, warmup_pending
+from app.core.responses import FastJSONResponse
+from app.services.precompute_service import precompute_status
+from app.services.prefetch_service import prefetch_status
+from app.services.footprint_service import memory_report
 
 app = FastAPI(
     title="YT-AI-QA",
     description="Fast API for YouTube video analysis using Ollama",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Registered before CORS so that CORS headers are added to the 503 as well
+@app.middleware("http")
+async def refuse_until_warm(request: Request, call_next):
+    """Turn requests away while the background warm-up imports the dependencies they would race"""
+    path = request.url.path
+    if warmup_pending() and path != "/" and not path.startswith("/health"):
+        return JSONResponse(status_code=503, content={"detail": "Server is warming up, retry shortly"},
+                            headers={"Retry-After": str(WARMUP_RETRY_AFTER)})
+    return await call_next(request)
+
 # Add CORS middleware
 # Add CORS middleware to allow cross-origin requests
 app.add_middleware(
@@ -18,6 +44,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Compress large JSON answers (event streams are never buffered for compression)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+@app.exception_handler(SchedulerFullError)
+async def scheduler_full_handler(request: Request, exc: SchedulerFullError):
+    """Reject work beyond the scheduler's queue limits quickly instead of letting it time out"""
+    return JSONResponse(status_code=429, content={"detail": str(exc)},
+                        headers={"Retry-After": str(exc.retry_after)})
+
 
 # Include routers for different functional areas
 app.include_router(video_controller.router)
@@ -25,6 +60,13 @@ app.include_router(chat_controller.router)
 app.include_router(summary_controller.router)
 
 
+@app.on_event("startup")
+def warm_up_dependencies():
+    """Import heavy dependencies in the background so /health answers right away"""
+    if WARMUP_ON_STARTUP:
+        start_warmup()
+
+
 @app.get("/")
 async def root():
     return {
@@ -37,3 +79,38 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "server is running"}
+
+
+@app.get("/health/ollama")
+async def ollama_health():
+    """Routing state of the Ollama backend pools (health, outstanding requests)"""
+    return pool_status()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Scheduler queue depth, admissions and wait times per priority class, idle-time precompute progress and prefetch cache counts"""
+    return {"scheduler": scheduler.metrics(), "precompute": precompute_status(), "prefetch": prefetch_status()}
+
+
+@app.get("/debug/memory")
+def debug_memory(video_id: Optional[str] = None, tracemalloc: Optional[str] = None, top: int = 20):
+    """
+    Memory held by this worker: RSS, bytes per video and category, cache occupancy.
+    
+    Each worker answers for itself. tracemalloc=start begins tracing
+    allocations (slows the worker), tracemalloc=snapshot adds the top
+    allocation sites, tracemalloc=stop ends tracing.
+    """
+    if tracemalloc not in (None, "start", "snapshot", "stop"):
+        raise HTTPException(status_code=400, detail="tracemalloc must be start, snapshot or stop")
+    return memory_report(video_id=video_id, tracemalloc_action=tracemalloc, top=max(1, min(top, 200)))
+
+
+@app.get("/health/startup")
+async def startup_report():
+    """App import time, background warm-up progress and per-module import times"""
+    return import_report()
+
+
+record_app_import(1000 * (time.perf_counter() - _import_started))
@@ -5,6 +5,8 @@ from typing import Optional, List, Dict, Any
 
 class VideoRequest(BaseModel):
     video_url: str
+    # When to build the vector index: "eager", "lazy" (first question) or "background"; default INGEST_EMBEDDING_MODE
+    embedding_mode: Optional[str] = None
 
 
 class ConversationMessage(BaseModel):
@@ -15,11 +17,16 @@ class ConversationMessage(BaseModel):
 class QuestionRequest(BaseModel):
     """
     Schema for question asking request.
-    Includes the question and optional context like video ID and history.
+    Includes the question and optional context like video ID and session.
+    conversation_history is only used to seed a new session.
+    compact drops chunk text from the response: sources then refer to chunks
+    by chunk_id and timestamps (text from /videos/{video_id}/chunks).
     """
     question: str
     video_id: Optional[str] = None
+    session_id: Optional[str] = None
     conversation_history: Optional[List[ConversationMessage]] = []
+    compact: bool = False
 
 
 class VideoResponse(BaseModel):
@@ -30,16 +37,104 @@ class VideoResponse(BaseModel):
     status: str
     channel: Optional[str] = None
     publish_date: Optional[str] = None
+    indexed: bool = True  # False until a deferred vector index is built
 
 
 class AnswerResponse(BaseModel):
     question: str
     answer: str
-    context: List[str]
+    context: List[str] = []  # Empty in compact mode
     sources: List[Dict[str, Any]]
     video_id: str
     answer_type: Optional[str] = "video_content"  # "video_content" or "hybrid"
     metadata_used: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
+    shortcuts: List[str] = []  # Degraded paths taken to meet the request deadline
+    prefetched: bool = False  # Retrieval came from /questions/prefetch
+
+
+class ChunkText(BaseModel):
+    chunk_id: int
+    text: str
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+
+class ChunksResponse(BaseModel):
+    video_id: str
+    chunks: List[ChunkText]
+
+
+class PrefetchRequest(BaseModel):
+    """Draft question sent while the user types (debounced by the client)"""
+    question: str
+    video_id: Optional[str] = None
+
+
+class PrefetchResponse(BaseModel):
+    video_id: str
+    status: str  # "prefetched", "cached", "skipped" or "indexing" (deferred index build started)
+    took_ms: float
+
+
+class BatchQuestionRequest(BaseModel):
+    """
+    Schema for a batch of independent questions about one video.
+    timeout_seconds bounds the whole batch; answers not finished by then
+    come back with status "timeout".
+    """
+    questions: List[str]
+    video_id: Optional[str] = None
+    compact: bool = False
+    timeout_seconds: Optional[float] = None
+
+
+class BatchAnswer(AnswerResponse):
+    status: str = "answered"  # "answered", "timeout" or "error"
+    error: Optional[str] = None
+
+
+class BatchAnswerResponse(BaseModel):
+    video_id: str
+    answers: List[BatchAnswer]
+
+
+class TranscriptMatch(BaseModel):
+    start_ms: int
+    end_ms: int
+    text: str
+    snippet_index: int
+
+
+class TranscriptSearchResponse(BaseModel):
+    video_id: str
+    query: str
+    total: int
+    matches: List[TranscriptMatch]
+    took_ms: float
+
+
+class TermCompletion(BaseModel):
+    term: str
+    count: int
+
+
+class TranscriptCompletionResponse(BaseModel):
+    video_id: str
+    prefix: str
+    completions: List[TermCompletion]
+    took_ms: float
+
+
+class SessionRequest(BaseModel):
+    video_id: Optional[str] = None
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+    video_id: str
+    conversation: List[ConversationMessage]
+    summary: Optional[str] = None
 
 
 class HighlightPoint(BaseModel):
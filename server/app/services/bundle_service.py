@@ -0,0 +1,162 @@
+"""Export and import of processed videos as portable bundles"""
+import io
+import json
+import re
+from typing import Dict, Any
+import numpy as np
+from app.core.config import OLLAMA_EMBEDDING_MODEL
+from app.core.ollama_pool import embedding_model
+from app.services.search_service import build_transcript_index
+from app.services.prefetch_service import drop_prefetched
+from app.services.video_service import get_vector_store
+from app.core.storage import (
+    vector_stores, video_info, video_transcripts, video_metadata, video_summaries, summary_segments,
+    precomputed_answers
+)
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_KEYS = ("video_id", "dimension", "docstore")  # Required beyond the format version and model
+
+
+def export_video(video_id: str) -> bytes:
+    """
+    Serialize a processed video into a single compressed bundle (.npz).
+
+    The bundle holds the raw FAISS index, the docstore, the transcript as
+    columns (start and duration arrays plus texts), metadata, video info,
+    the cached summary if any, and the embedding model the index was built
+    with. It is loaded with allow_pickle=False, so importing never
+    unpickles anything.
+
+    Args:
+        video_id: ID of a processed video
+
+    Returns:
+        bytes: The bundle file
+    """
+    import faiss
+
+    # Bundles always carry the index, so a video ingested with deferred embedding is indexed first
+    vector_store = get_vector_store(video_id)
+    docstore = []
+    for position in sorted(vector_store.index_to_docstore_id):
+        doc_id = vector_store.index_to_docstore_id[position]
+        doc = vector_store.docstore.search(doc_id)
+        docstore.append({"id": doc_id, "page_content": doc.page_content, "metadata": doc.metadata})
+
+    transcript = video_transcripts.get(video_id, [])
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "video_id": video_id,
+        "embedding_model": OLLAMA_EMBEDDING_MODEL,
+        "dimension": vector_store.index.d,
+        "video_info": video_info.get(video_id, {}),
+        "metadata": video_metadata.get(video_id, {}),
+        "summary": video_summaries.get(video_id),
+        "docstore": docstore,
+        "transcript_text": [snippet["text"] for snippet in transcript]
+    }
+
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        manifest=np.frombuffer(json.dumps(manifest).encode("utf-8"), dtype=np.uint8),
+        index=faiss.serialize_index(vector_store.index),
+        transcript_start=np.array([snippet["start"] for snippet in transcript], dtype=np.float64),
+        transcript_duration=np.array([snippet["duration"] for snippet in transcript], dtype=np.float64)
+    )
+    return buffer.getvalue()
+
+
+def import_bundle(data: bytes, overwrite: bool = False) -> Dict[str, Any]:
+    """
+    Load a bundle created by export_video without calling Ollama.
+
+    Args:
+        data: The bundle file
+        overwrite: Replace the video if it is already processed
+
+    Returns:
+        Dict: video_id, title, chunks and status ("imported" or "already_processed")
+
+    Raises:
+        ValueError: If the bundle is malformed (missing manifest keys, corrupt index or
+            docstore) or was built with a different embedding model
+    """
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    try:
+        with np.load(io.BytesIO(data), allow_pickle=False) as bundle:
+            manifest = json.loads(bundle["manifest"].tobytes().decode("utf-8"))
+            index_bytes = bundle["index"]
+            starts = bundle["transcript_start"].tolist()
+            durations = bundle["transcript_duration"].tolist()
+    except Exception as e:
+        raise ValueError(f"Not a valid video bundle: {str(e)}")
+
+    if not isinstance(manifest, dict):
+        raise ValueError("Not a valid video bundle: the manifest is not an object")
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format version: {manifest.get('format_version')}")
+    if manifest.get("embedding_model") != OLLAMA_EMBEDDING_MODEL:
+        raise ValueError(
+            f"Bundle was built with embedding model '{manifest.get('embedding_model')}', "
+            f"this server uses '{OLLAMA_EMBEDDING_MODEL}'"
+        )
+
+    missing = [key for key in MANIFEST_KEYS if key not in manifest]
+    if missing:
+        raise ValueError(f"Bundle manifest is missing: {', '.join(missing)}")
+    if not isinstance(manifest["docstore"], list):
+        raise ValueError("Bundle docstore is not a list")
+
+    video_id = manifest["video_id"]
+    # The ID becomes a file name with the sqlite storage backend
+    if not isinstance(video_id, str) or not re.fullmatch(r"[\w-]{1,64}", video_id):
+        raise ValueError(f"Invalid video ID in bundle: {video_id!r}")
+    info = manifest.get("video_info", {})
+    if video_id in video_info and not overwrite:
+        return {"video_id": video_id, "title": info.get("title", "Unknown"),
+                "chunks": len(manifest["docstore"]), "status": "already_processed"}
+
+    try:
+        index = faiss.deserialize_index(index_bytes)
+        docs = {
+            entry["id"]: Document(page_content=entry["page_content"], metadata=entry["metadata"])
+            for entry in manifest["docstore"]
+        }
+        index_to_docstore_id = {position: entry["id"] for position, entry in enumerate(manifest["docstore"])}
+    except Exception as e:
+        raise ValueError(f"Corrupt video bundle: {str(e)}")
+    if index.ntotal != len(manifest["docstore"]) or index.d != manifest["dimension"]:
+        raise ValueError("Bundle index does not match its docstore")
+
+    vector_store = FAISS(
+        embedding_function=embedding_model(),
+        index=index,
+        docstore=InMemoryDocstore(docs),
+        index_to_docstore_id=index_to_docstore_id
+    )
+
+    video_metadata[video_id] = manifest.get("metadata", {})
+    video_transcripts[video_id] = [
+        {"text": text, "start": start, "duration": duration}
+        for text, start, duration in zip(manifest.get("transcript_text", []), starts, durations)
+    ]
+    summary_segments.pop(video_id, None)
+    precomputed_answers.pop(video_id, None)
+    drop_prefetched(video_id)
+    if manifest.get("summary"):
+        video_summaries[video_id] = manifest["summary"]
+    else:
+        video_summaries.pop(video_id, None)
+    vector_stores[video_id] = vector_store
+    # Video info last: its presence marks the video as processed
+    video_info[video_id] = info
+    build_transcript_index(video_id)
+
+    return {"video_id": video_id, "title": info.get("title", "Unknown"),
+            "chunks": len(docs), "status": "imported"}
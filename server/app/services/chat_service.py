@@ -1,19 +1,78 @@
 """Chat service for RAG functionality"""
-from typing import List, Dict, Any, Optional
-from langchain_ollama import ChatOllama
-from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Tuple
+from langchain_core.documents import Document
 from app.models.models import ConversationMessage
-from app.core.config import OLLAMA_BASE_URL, OLLAMA_MODEL
-from app.core.storage import vector_stores, video_info, video_metadata
+from app.core.config import (
+    CONTEXT_TOKEN_BUDGET, MAX_CONTEXT_TOKENS, HYBRID_VIDEO_TOKEN_BUDGET, WEB_CONTEXT_TOKEN_BUDGET,
+    BATCH_ASK_MAX_WORKERS, BATCH_ASK_TIMEOUT_SECONDS, DEADLINE_FULL_ANSWER_SECONDS, SHORT_ANSWER_TOKENS
+)
+from app.core.deadline import Deadline
+from app.core.ollama_pool import chat_model, embedding_model
+from app.core.storage import video_info, video_metadata
 from app.utils.rag_utils import (
-    classify_question, get_optimal_k, format_conversation_history,
-    compress_context, get_window_chunks, create_web_documents
+    route_question, coverage_score, get_optimal_k, format_conversation_history,
+    compress_context, get_window_chunks, create_web_documents, search_by_vectors
 )
+from app.utils.context_packer import pack_context, pack_passages, build_passages, truncate_to_tokens
+from app.services.prefetch_service import get_prefetched
+from app.services.video_service import get_vector_store
+
+def get_prompt_prefix(video_id: str) -> str:
+    """
+    Build the system prompt for a video: fixed instructions plus a video header.
+    
+    Sessions store this once so it stays byte-identical across turns.
+    """
+    info = video_info.get(video_id, {})
+    header = f"Title: {info.get('title', 'Unknown')}\nChannel: {info.get('channel', 'Unknown')}"
+    if info.get("publish_date"):
+        header += f"\nPublished: {info['publish_date']}"
+    if info.get("description"):
+        header += f"\nDescription: {info['description']}"
+    
+    return f"""You are a helpful AI assistant answering questions about a YouTube video.
+Answers are grounded in excerpts from the video's transcript that are provided with each question.
+
+Video:
+{header}"""
+
+
+def generation_kwargs(deadline: Deadline) -> Dict[str, Any]:
+    """
+    chat_model arguments for an answer generation under a deadline.
+    
+    The HTTP timeout is the remaining budget; when less than
+    DEADLINE_FULL_ANSWER_SECONDS remain the answer is capped at
+    SHORT_ANSWER_TOKENS so it can finish in time.
+    """
+    kwargs = {"timeout": deadline.timeout()}
+    if not deadline.allows(DEADLINE_FULL_ANSWER_SECONDS):
+        deadline.shortcut("answer_capped")
+        kwargs["num_predict"] = SHORT_ANSWER_TOKENS
+    return kwargs
+
+
+def extractive_answer(context: List[str], deadline: Deadline) -> str:
+    """
+    Answer without the LLM once the deadline has expired.
+    
+    The first context passage is the compressed context or the best-ranked
+    chunk, so it is returned as is, cut to SHORT_ANSWER_TOKENS.
+    """
+    deadline.shortcut("answer_extractive")
+    return truncate_to_tokens(context[0], SHORT_ANSWER_TOKENS) if context else ""
+
 
 def create_rag_pipeline(video_id: str, question_type: str = "video_content", 
                        use_compression: bool = True, 
-                       conversation_history: List[ConversationMessage] = None):
+                       conversation_history: List[ConversationMessage] = None,
+                       context_text: Optional[str] = None,
+                       history_text: Optional[str] = None,
+                       prompt_prefix: Optional[str] = None,
+                       priority: str = "interactive",
+                       deadline: Optional[Deadline] = None):
     """
     Create RAG pipeline for a video.
     
@@ -22,16 +81,23 @@ def create_rag_pipeline(video_id: str, question_type: str = "video_content",
     Args:
         video_id: ID of the processed video
         question_type: Classification of question (video_content, external_knowledge)
-        use_compression: Whether to compress context using LLM
+        use_compression: Whether to pack context into CONTEXT_TOKEN_BUDGET
         conversation_history: Recent chat history for context
+        context_text: Context already built for the question; when given,
+            the prompt uses it as is instead of searching again
+        history_text: Pre-built conversation text (e.g. from session memory);
+            overrides conversation_history
+        prompt_prefix: Session's stable system prompt (defaults to get_prompt_prefix)
+        priority: Scheduler class of the generation call
+        deadline: Request time budget bounding the generation
         
     Returns:
         Tuple: (Chain, Retriever)
     """
-    if video_id not in vector_stores:
-        raise ValueError("Video not processed yet")
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
     
-    vector_store = vector_stores[video_id]
+    vector_store = get_vector_store(video_id)
     
     # Dynamically determine k
     video_length = video_info.get(video_id, {}).get("transcript_length", 10000)
@@ -42,18 +108,18 @@ def create_rag_pipeline(video_id: str, question_type: str = "video_content",
         search_kwargs={"k": optimal_k}
     )
     
-    # Create LLM using ChatOllama
-    llm = ChatOllama(
-        model=OLLAMA_MODEL,
-        temperature=0.0 if question_type == "video_content" else 0.3,
-        base_url=OLLAMA_BASE_URL
-    )
+    # Create LLM using ChatOllama (routed over the Ollama pool)
+    llm = chat_model(temperature=0.0 if question_type == "video_content" else 0.3, priority=priority,
+                     **generation_kwargs(deadline or Deadline()))
 
     # Choose prompt template
-    history_text = format_conversation_history(conversation_history) if conversation_history else ""
+    if history_text is None:
+        history_text = format_conversation_history(conversation_history) if conversation_history else ""
+    if prompt_prefix is None:
+        prompt_prefix = get_prompt_prefix(video_id)
     
     if question_type == "video_content":
-        template = f"""{history_text}Based on the following context from a YouTube video transcript, answer the question in a natural, conversational way.
+        template = f"""{{history}}Based on the following context from a YouTube video transcript, answer the question in a natural, conversational way.
 
 Instructions:
 - Provide a helpful, well-explained answer
@@ -67,9 +133,7 @@ Question: {{question}}
 
 Answer:"""
     else:
-        template = f"""{history_text}You are a helpful AI assistant analyzing a YouTube video.
-
-You are given:
+        template = """{history}You are given:
 1. A YouTube video transcript and metadata (partial, may be incomplete).
 2. A user question.
 
@@ -78,31 +142,26 @@ If the video doesn't fully address the question, you may use general knowledge t
 Always indicate what comes from the video versus general knowledge.
 
 Video context:
-{{context}}
+{context}
 
 Question:
-{{question}}
+{question}
 
 Answer (clear, structured, and honest):"""
     
-    prompt = PromptTemplate(
-        template=template,
-        input_variables=['context', 'question']
-    )
+    # The system message is identical on every turn of a session, so Ollama
+    # can reuse its cached KV prefix; everything that changes goes after it.
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "{prefix}"),
+        ("human", template)
+    ]).partial(prefix=prompt_prefix, history=history_text)
     
-    def format_docs(retrieved_docs):
-        """Format documents with optional compression"""
-        windowed_docs = get_window_chunks(retrieved_docs, vector_store, window_size=1)
-        context_chunks = [doc.page_content for doc in windowed_docs]
-        
-        if use_compression and len(context_chunks) > 2:
-            combined = "\n\n".join(context_chunks)
-            max_context_length = 2000
-            if len(combined) > max_context_length:
-                combined = combined[:max_context_length] + "..."
-            return combined
+    def format_docs(docs):
+        """Order chunks by position, strip overlap and fit the token budget"""
+        if use_compression:
+            return pack_context(docs, CONTEXT_TOKEN_BUDGET)
         else:
-            return "\n\n".join(context_chunks)
+            return "\n\n".join(build_passages(docs))
     
     def clean_answer(output):
         """Extract clean answer from LLM output"""
@@ -121,9 +180,14 @@ Answer (clear, structured, and honest):"""
         return text.strip()
     
     # Create the chain
+    if context_text is not None:
+        context_step = RunnableLambda(lambda _: context_text)
+    else:
+        context_step = retriever | RunnableLambda(lambda docs: format_docs(get_window_chunks(docs, vector_store)))
+    
     chain = (
         RunnableParallel({
-            'context': retriever | RunnableLambda(format_docs),
+            'context': context_step,
             'question': RunnablePassthrough()
         })
         | prompt
@@ -134,15 +198,49 @@ Answer (clear, structured, and honest):"""
     return chain, retriever
 
 
+def compact_answer(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drop chunk text from an answer_question result.
+
+    Transcript sources keep their chunk_id and timestamps (the text is served
+    by /videos/{video_id}/chunks), metadata sources keep their source name,
+    and web sources keep their short excerpt since it is not stored anywhere.
+    The context list and metadata_used repeat source text and are dropped.
+    """
+    sources = []
+    for source in result["sources"]:
+        if source.get("type") != "web":
+            source = {key: value for key, value in source.items() if key != "text"}
+        sources.append(source)
+    return {**result, "context": [], "sources": sources, "metadata_used": None}
+
+
+def resolve_video_id(video_id: Optional[str] = None) -> str:
+    """Return the requested video ID, or the most recently processed video"""
+    if not video_id:
+        if not video_info:
+            raise ValueError("No videos processed yet")
+        video_id = list(video_info.keys())[-1]
+    
+    if video_id not in video_info:
+        raise ValueError("Video not found. Please process the video first.")
+    
+    return video_id
+
+
 def answer_question(question: str, video_id: str = None, 
-                    conversation_history: List[ConversationMessage] = None) -> Dict[str, Any]:
+                    conversation_history: List[ConversationMessage] = None,
+                    history_text: Optional[str] = None,
+                    prompt_prefix: Optional[str] = None,
+                    priority: str = "interactive",
+                    deadline: Optional[Deadline] = None) -> Dict[str, Any]:
     """
     Answer a question about a video using RAG.
     
     Orchestrates the entire question answering flow:
     1. Validates video existence
-    2. Classifies question type
-    3. Retrieves relevant context
+    2. Embeds the question and retrieves relevant context
+    3. Routes the question (video-only or web-augmented)
     4. Compresses context if needed
     5. Generates answer using LLM
     
@@ -150,34 +248,79 @@ def answer_question(question: str, video_id: str = None,
         question: User's question
         video_id: Target video ID
         conversation_history: Previous messages in the session
+        history_text: Pre-built conversation text; overrides conversation_history
+        prompt_prefix: Session's stable system prompt (defaults to get_prompt_prefix)
+        priority: Scheduler class of the embedding and LLM calls
+        deadline: Request time budget; stages take cheaper paths as it runs
+            low and the result lists them under "shortcuts"
         
     Returns:
         Dict: The answer and supporting metadata
     """
     # Get most recent video if not specified
-    if not video_id:
-        if not vector_stores:
-            raise ValueError("No videos processed yet")
-        video_id = list(vector_stores.keys())[-1]
-    
-    if video_id not in vector_stores:
-        raise ValueError("Video not found. Please process the video first.")
-    
-    # Classify question
-    question_type = classify_question(question)
+    video_id = resolve_video_id(video_id)
+    if prompt_prefix is None:
+        prompt_prefix = get_prompt_prefix(video_id)
     
     # Get optimal k
     video_length = video_info.get(video_id, {}).get("transcript_length", 10000)
     optimal_k = get_optimal_k(video_length, question)
     
-    # Retrieve documents
-    video_vector_store = vector_stores[video_id]
-    video_retriever = video_vector_store.as_retriever(
-        search_type="similarity",
-        search_kwargs={"k": optimal_k}
-    )
-    retrieved_docs = video_retriever.invoke(question)
-    retrieved_docs = get_window_chunks(retrieved_docs, video_vector_store, window_size=1)
+    # Embed the question once and retrieve documents by vector (unless prefetched while it was typed);
+    # the first question about a video ingested with deferred embedding builds its index
+    video_vector_store = get_vector_store(video_id, priority="background" if priority == "background" else "embed")
+    embeddings = video_vector_store.embeddings if priority == "interactive" else embedding_model(priority)
+    prefetched = get_prefetched(video_id, question, optimal_k) if priority == "interactive" else None
+    if prefetched is not None:
+        question_embedding, scored_docs = prefetched
+    else:
+        question_embedding = embeddings.embed_query(question)
+        scored_docs = search_by_vectors(video_vector_store, [question_embedding], optimal_k)[0]
+    
+    result = answer_from_retrieval(question, video_id, question_embedding, scored_docs, embeddings,
+                                   conversation_history=conversation_history, history_text=history_text,
+                                   prompt_prefix=prompt_prefix, priority=priority, deadline=deadline)
+    result["prefetched"] = prefetched is not None
+    return result
+
+
+def answer_from_retrieval(question: str, video_id: str, question_embedding: List[float],
+                          scored_docs: List[Tuple[Document, float]], embeddings,
+                          conversation_history: List[ConversationMessage] = None,
+                          history_text: Optional[str] = None,
+                          prompt_prefix: Optional[str] = None,
+                          priority: str = "interactive",
+                          deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """
+    Route, build context and generate the answer for an already retrieved question.
+    
+    Args:
+        question: User's question
+        video_id: Processed video ID
+        question_embedding: Embedding of the question
+        scored_docs: Retrieved documents with their similarity to the question
+        embeddings: Embeddings used for routing and extractive compression
+        conversation_history: Previous messages in the session
+        history_text: Pre-built conversation text; overrides conversation_history
+        prompt_prefix: Session's stable system prompt (defaults to get_prompt_prefix)
+        priority: Scheduler class of the LLM calls
+        deadline: Request time budget (unbounded if omitted); once it has expired the
+            answer is extracted from the context instead of generated
+        
+    Returns:
+        Dict: The answer and supporting metadata
+    """
+    deadline = deadline or Deadline()
+    if prompt_prefix is None:
+        prompt_prefix = get_prompt_prefix(video_id)
+    video_vector_store = get_vector_store(video_id)
+    retrieved_docs = [doc for doc, _ in scored_docs]
+    
+    # Route using the question embedding and how well the video covers it
+    coverage = coverage_score(video_vector_store, question_embedding)
+    question_type = route_question(question, question_embedding, embeddings, coverage)
+    
+    retrieved_docs = get_window_chunks(retrieved_docs, video_vector_store)
     
     # Collect metadata
     metadata_info = {}
@@ -186,10 +329,12 @@ def answer_question(question: str, video_id: str = None,
             source = doc.metadata.get("source", "unknown")
             metadata_info[source] = doc.page_content
     
-    # Extract context
-    raw_context = [doc.page_content for doc in retrieved_docs]
-    if len(raw_context) > 3 and question_type == "video_content":
-        compressed_context = compress_context(raw_context, question, max_length=1500)
+    # Extract context; the answer prompt sees exactly what the response reports
+    raw_context = pack_passages(retrieved_docs, CONTEXT_TOKEN_BUDGET)
+    if len(retrieved_docs) > 3 and question_type == "video_content":
+        compressed_context = compress_context(raw_context, question, max_tokens=MAX_CONTEXT_TOKENS,
+                                              question_embedding=question_embedding, embeddings=embeddings,
+                                              priority=priority, deadline=deadline)
         context = [compressed_context]
     else:
         context = raw_context
@@ -201,42 +346,43 @@ def answer_question(question: str, video_id: str = None,
             "type": doc.metadata.get("type", "unknown"),
             "source": doc.metadata.get("source", "unknown")
         }
+        if doc.metadata.get("chunk_index") is not None:
+            source_data["chunk_id"] = doc.metadata["chunk_index"]
         
-        # Try to recover timestamp info if available (heuristic or if stored)
-        # Note: In video_service.py we didn't explicitly store timestamp in metadata for every chunk, 
-        # but we did store chunk_index. Mapping back to timestamp would require looking up the transcript.
-        # For now, we'll return what we have.
+        # Snippet-aligned chunks carry their start/end times (seconds)
         if "start" in doc.metadata:
-             source_data["timestamp"] = str(doc.metadata["start"])
+            source_data["timestamp"] = str(doc.metadata["start"])
+            source_data["end"] = str(doc.metadata["end"])
+        # Near-duplicate chunks were merged before embedding; every place the text occurs
+        if "occurrences" in doc.metadata:
+            source_data["occurrences"] = doc.metadata["occurrences"]
         
         sources.append(source_data)
     answer_type = "video_content"
     
     # Handle external knowledge queries
-    if question_type == "external_knowledge":
+    if deadline.expired:
+        answer = extractive_answer(context, deadline)
+    elif question_type == "external_knowledge":
         video_context = ""
         if video_id in video_metadata:
             video_context = f"{video_metadata[video_id].get('title', '')} {video_metadata[video_id].get('description', '')}"
         
-        web_docs = create_web_documents(question, video_context)
+        web_docs = create_web_documents(question, video_context, deadline=deadline)
         
         if web_docs:
-            llm = ChatOllama(
-                model=OLLAMA_MODEL,
-                temperature=0.3,
-                base_url=OLLAMA_BASE_URL
-            )
+            llm = chat_model(temperature=0.3, priority=priority, **generation_kwargs(deadline))
             
-            video_context_text = "\n\n".join(context[:3])
-            if len(video_context_text) > 1000:
-                video_context_text = compress_context(context[:3], question, max_length=1000)
+            video_context_text = compress_context(context[:3], question, max_tokens=HYBRID_VIDEO_TOKEN_BUDGET,
+                                                  question_embedding=question_embedding, embeddings=embeddings,
+                                                  priority=priority, deadline=deadline)
             
-            web_context_text = "\n\n".join([doc.page_content[:800] for doc in web_docs[:3]])
-            history_text = format_conversation_history(conversation_history) if conversation_history else ""
+            web_context_text = pack_context(web_docs, WEB_CONTEXT_TOKEN_BUDGET,
+                                            max_tokens_per_doc=WEB_CONTEXT_TOKEN_BUDGET // 3)
+            if history_text is None:
+                history_text = format_conversation_history(conversation_history) if conversation_history else ""
             
-            hybrid_prompt = f"""{history_text}You are a helpful AI assistant.
-
-Context from YouTube video:
+            hybrid_prompt = f"""{history_text}Context from YouTube video:
 {video_context_text}
 
 Context from web search:
@@ -247,28 +393,40 @@ Question:
 
 Answer (clear, structured, and helpful):"""
             
-            answer_msg = llm.invoke(hybrid_prompt)
-            answer = answer_msg.content if hasattr(answer_msg, 'content') else str(answer_msg)
-            answer = answer.strip()
-            answer_type = "hybrid"
+            from langchain_core.messages import SystemMessage, HumanMessage
             
-            for doc in web_docs[:3]:
-                url = doc.metadata.get("url", "")
-                url = doc.metadata.get("url", "")
-                if url:
-                    sources.append({
-                        "text": f"[Web] {doc.page_content[:150]}...",
-                        "source": url,
-                        "type": "web"
-                    })
+            if deadline.expired:
+                # The web search and compression used up the budget
+                answer = extractive_answer(context, deadline)
+            else:
+                answer_msg = llm.invoke([SystemMessage(content=prompt_prefix), HumanMessage(content=hybrid_prompt)])
+                answer = answer_msg.content if hasattr(answer_msg, 'content') else str(answer_msg)
+                answer = answer.strip()
+                answer_type = "hybrid"
+                
+                for doc in web_docs[:3]:
+                    url = doc.metadata.get("url", "")
+                    url = doc.metadata.get("url", "")
+                    if url:
+                        sources.append({
+                            "text": f"[Web] {doc.page_content[:150]}...",
+                            "source": url,
+                            "type": "web"
+                        })
         else:
             chain, _ = create_rag_pipeline(video_id, "general", use_compression=True, 
-                                          conversation_history=conversation_history)
+                                          conversation_history=conversation_history,
+                                          context_text="\n\n".join(context), history_text=history_text,
+                                          prompt_prefix=prompt_prefix, priority=priority,
+                                          deadline=deadline)
             answer = chain.invoke(question)
             answer_type = "video_content"
     else:
         chain, _ = create_rag_pipeline(video_id, question_type, use_compression=True,
-                                      conversation_history=conversation_history)
+                                      conversation_history=conversation_history,
+                                      context_text="\n\n".join(context), history_text=history_text,
+                                      prompt_prefix=prompt_prefix, priority=priority,
+                                      deadline=deadline)
         answer = chain.invoke(question)
     
     return {
@@ -278,5 +436,68 @@ Answer (clear, structured, and helpful):"""
         "sources": sources,
         "video_id": video_id,
         "answer_type": answer_type,
-        "metadata_used": metadata_info if metadata_info else None
+        "metadata_used": metadata_info if metadata_info else None,
+        "shortcuts": deadline.shortcuts
     }
+
+
+def answer_questions_batch(questions: List[str], video_id: str = None,
+                           timeout: float = BATCH_ASK_TIMEOUT_SECONDS,
+                           max_workers: int = BATCH_ASK_MAX_WORKERS) -> List[Dict[str, Any]]:
+    """
+    Answer a list of independent questions about one video.
+    
+    All questions are embedded in one embedding call and searched with one
+    batched FAISS search; the generations then run with at most max_workers
+    in parallel. Every call is scheduled in the "summary" class, so a
+    questionnaire does not hold back interactive questions.
+    
+    Args:
+        questions: Questions to answer (no conversation context is shared)
+        video_id: Target video ID (defaults to the most recent video)
+        timeout: Seconds after which unfinished answers are given up
+        max_workers: Parallel generations
+        
+    Returns:
+        List[Dict]: One answer_question-style result per question, in order,
+            with a status of "answered", "timeout" or "error" (plus error)
+    """
+    started = time.monotonic()
+    video_id = resolve_video_id(video_id)
+    prompt_prefix = get_prompt_prefix(video_id)
+    video_vector_store = get_vector_store(video_id)
+    
+    embeddings = embedding_model(priority="summary")
+    question_embeddings = embeddings.embed_documents(questions)
+    
+    # FAISS returns hits best first, so one search at the largest k serves every question
+    video_length = video_info.get(video_id, {}).get("transcript_length", 10000)
+    ks = [get_optimal_k(video_length, question) for question in questions]
+    hits = search_by_vectors(video_vector_store, question_embeddings, max(ks))
+    
+    # Each answer gets the rest of the batch budget, so late ones degrade instead of running over
+    deadline_seconds = max(0.1, timeout - (time.monotonic() - started))
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(questions))))
+    futures = [
+        executor.submit(answer_from_retrieval, question, video_id, question_embedding, scored_docs[:k],
+                        embeddings, prompt_prefix=prompt_prefix, priority="summary",
+                        deadline=Deadline(deadline_seconds))
+        for question, question_embedding, scored_docs, k in zip(questions, question_embeddings, hits, ks)
+    ]
+    wait(futures, timeout=max(0.0, timeout - (time.monotonic() - started)))
+    # Queued generations are dropped; ones already running finish in the background
+    executor.shutdown(wait=False, cancel_futures=True)
+    
+    results = []
+    for question, future in zip(questions, futures):
+        if future.done() and not future.cancelled() and future.exception() is None:
+            results.append({**future.result(), "status": "answered"})
+            continue
+        
+        result = {"question": question, "answer": "", "context": [], "sources": [], "video_id": video_id}
+        if future.done() and not future.cancelled():
+            result.update(status="error", error=str(future.exception()))
+        else:
+            result["status"] = "timeout"
+        results.append(result)
+    return results
@@ -0,0 +1,209 @@
+"""Per-video memory accounting for the /debug/memory endpoint.
+
+Sizes are deep sizes (sys.getsizeof over the object graph, each object
+counted once per category) of what this worker holds for each video:
+the FAISS index, its docstore and Document objects, transcript, metadata,
+summaries, web vector stores, chat sessions and the keyword search index.
+FAISS vectors live outside Python objects and are sized from the index
+(vectors x code size).
+
+With STORAGE_BACKEND=sqlite only the FAISS indexes in the worker's LRU
+cache (and web stores) are resident; the rest lives in the database and
+is not counted.
+"""
+import os
+import resource
+import sys
+import tracemalloc
+from typing import Dict, Any, Optional, Iterable
+
+from app.core.config import STORAGE_BACKEND, INDEX_CACHE_SIZE, TRANSCRIPT_INDEX_CACHE_SIZE
+from app.core.storage import (
+    vector_stores, video_info, video_transcripts, video_metadata, web_vector_stores,
+    video_summaries, summary_segments, precomputed_answers,
+    chat_sessions, conversation_sessions, conversation_memories
+)
+from app.services.search_service import cached_transcript_indexes
+from app.services.prefetch_service import prefetch_status
+
+TRACEMALLOC_FRAMES = 10
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """Bytes of obj and everything it references (objects already in seen are skipped)"""
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__") and not isinstance(current, type):
+            # Plain objects and pydantic models such as Document
+            stack.append(current.__dict__)
+    return total
+
+
+def faiss_index_bytes(index: Any) -> int:
+    """Vector storage of a FAISS index (flat indexes store ntotal x code_size bytes)"""
+    code_size = getattr(index, "code_size", None) or 4 * index.d
+    return int(index.ntotal) * int(code_size)
+
+
+def vector_store_bytes(vector_store: Any) -> Dict[str, int]:
+    """FAISS vectors, and docstore plus id mapping, of a LangChain FAISS vector store"""
+    seen = set()
+    return {
+        "faiss_index": faiss_index_bytes(vector_store.index),
+        "docstore": deep_sizeof(getattr(vector_store.docstore, "_dict", vector_store.docstore), seen)
+                    + deep_sizeof(vector_store.index_to_docstore_id, seen)
+    }
+
+
+def _resident_vector_stores() -> Dict[str, Any]:
+    """Vector stores held in this worker (the loaded LRU entries for the sqlite backend)"""
+    if STORAGE_BACKEND == "sqlite":
+        return vector_stores.loaded()
+    return dict(vector_stores.items())
+
+
+def _sessions_by_video() -> Dict[str, Iterable[str]]:
+    sessions: Dict[str, list] = {}
+    for session_id, session in chat_sessions.items():
+        sessions.setdefault(session.get("video_id"), []).append(session_id)
+    return sessions
+
+
+def _held_video_ids(stores: Dict[str, Any], sessions: Dict[str, Iterable[str]]) -> list:
+    """Every video ID any per-video store of this worker holds data for"""
+    held = [video_info, stores, web_vector_stores, cached_transcript_indexes(), sessions]
+    if STORAGE_BACKEND != "sqlite":
+        # Data can outlive its video_info entry, so every map is scanned
+        held += [video_transcripts, video_metadata, video_summaries, summary_segments, precomputed_answers]
+    return [vid for vid in dict.fromkeys(vid for mapping in held for vid in mapping.keys()) if vid is not None]
+
+
+def video_footprint(video_id: str, vector_store: Any, session_ids: Iterable[str]) -> Dict[str, Any]:
+    """Bytes per category for one video"""
+    sizes = {"faiss_index": 0, "docstore": 0}
+    if vector_store is not None:
+        sizes.update(vector_store_bytes(vector_store))
+
+    if STORAGE_BACKEND != "sqlite":
+        sizes["transcript"] = deep_sizeof(video_transcripts.get(video_id))
+        sizes["metadata"] = deep_sizeof([video_metadata.get(video_id), video_info.get(video_id)])
+        sizes["summaries"] = deep_sizeof([video_summaries.get(video_id), summary_segments.get(video_id),
+                                          precomputed_answers.get(video_id)])
+        seen = set()
+        sizes["sessions"] = sum(
+            deep_sizeof([chat_sessions.get(sid), conversation_sessions.get(sid), conversation_memories.get(sid)], seen)
+            for sid in session_ids
+        )
+
+    web_store = web_vector_stores.get(video_id)
+    sizes["web_vector_store"] = sum(vector_store_bytes(web_store).values()) if web_store is not None else 0
+
+    index = cached_transcript_indexes().get(video_id)
+    sizes["keyword_index"] = index.nbytes() if index is not None else 0
+
+    return {"video_id": video_id, "total_bytes": sum(sizes.values()), "bytes": sizes}
+
+
+def process_memory() -> Dict[str, Any]:
+    """Current and peak resident set size of this worker"""
+    rss = None
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass  # Not Linux: only the peak is available
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak *= 1 if sys.platform == "darwin" else 1024  # Bytes on macOS, kilobytes elsewhere
+    return {"pid": os.getpid(), "rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+def tracemalloc_report(action: str, top: int) -> Dict[str, Any]:
+    """
+    Control tracemalloc and report the top allocation sites.
+
+    Tracing slows the worker down, so it only runs between action="start"
+    and action="stop"; "snapshot" reports while it runs.
+    """
+    if action == "start" and not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    elif action == "stop" and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    if not tracemalloc.is_tracing():
+        return {"tracing": False, "top": []}
+
+    current, peak = tracemalloc.get_traced_memory()
+    statistics = tracemalloc.take_snapshot().statistics("lineno")[:top]
+    return {
+        "tracing": True,
+        "traced_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": [
+            {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+             "size_bytes": stat.size, "count": stat.count}
+            for stat in statistics
+        ]
+    }
+
+
+def memory_report(video_id: Optional[str] = None, tracemalloc_action: Optional[str] = None,
+                  top: int = 20) -> Dict[str, Any]:
+    """
+    Memory held by this worker, per video (largest first) and for the process.
+
+    Args:
+        video_id: Only account for this video
+        tracemalloc_action: "start", "snapshot" or "stop" to include top allocators
+        top: Allocation sites reported by tracemalloc
+
+    Returns:
+        Dict: process RSS, per-video and per-category byte counts, cache
+            occupancy and, on request, tracemalloc top allocators
+    """
+    stores = _resident_vector_stores()
+    sessions = _sessions_by_video() if STORAGE_BACKEND != "sqlite" else {}
+    video_ids = [video_id] if video_id else _held_video_ids(stores, sessions)
+
+    videos = sorted(
+        (video_footprint(vid, stores.get(vid), sessions.get(vid, [])) for vid in video_ids),
+        key=lambda entry: entry["total_bytes"], reverse=True
+    )
+    categories: Dict[str, int] = {}
+    for entry in videos:
+        for name, size in entry["bytes"].items():
+            categories[name] = categories.get(name, 0) + size
+
+    report = {
+        "storage_backend": STORAGE_BACKEND,
+        "process": process_memory(),
+        "total_bytes": sum(categories.values()),
+        "categories": categories,
+        "videos": videos,
+        "caches": {
+            "faiss_indexes_loaded": len(stores),
+            "faiss_index_cache_size": INDEX_CACHE_SIZE if STORAGE_BACKEND == "sqlite" else None,
+            "keyword_indexes_loaded": len(cached_transcript_indexes()),
+            "keyword_index_cache_size": TRANSCRIPT_INDEX_CACHE_SIZE,
+            "prefetch_entries": prefetch_status()["entries"],
+            "chat_sessions": len(chat_sessions)
+        }
+    }
+    if tracemalloc_action:
+        report["tracemalloc"] = tracemalloc_report(tracemalloc_action, top)
+    return report
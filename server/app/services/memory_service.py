@@ -0,0 +1,248 @@
+"""Chat sessions and conversation memory (rolling summary of older turns plus the latest turn verbatim)"""
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional
+from app.models.models import ConversationMessage
+from app.core.config import (
+    MAX_CONVERSATION_HISTORY, MAX_CONVERSATION_MESSAGES,
+    CONVERSATION_SUMMARY_MAX_WORDS, CONVERSATION_MESSAGE_TOKENS, SESSION_TTL_SECONDS,
+    SESSION_SWEEP_INTERVAL_SECONDS
+)
+from app.core.ollama_pool import chat_model
+from app.core.scheduler import scheduler, SchedulerFullError
+from app.core.storage import conversation_sessions, conversation_memories, chat_sessions
+from app.utils.context_packer import truncate_to_tokens
+
+# Longest time a background summary update may take before another may start
+SUMMARY_UPDATE_TIMEOUT_SECONDS = 300
+
+# One lock per session so background summary updates never interleave (within a worker)
+_session_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+# Expired-session sweeps scan the whole session table, so they run at most once per interval
+_next_sweep = 0.0
+_sweep_guard = threading.Lock()
+
+
+def _session_lock(session_key: str) -> threading.Lock:
+    with _locks_guard:
+        return _session_locks.setdefault(session_key, threading.Lock())
+
+
+def _format_messages(messages: List[ConversationMessage]) -> str:
+    lines = []
+    for msg in messages:
+        role = "User" if msg.role == "user" else "Assistant"
+        lines.append(f"{role}: {truncate_to_tokens(msg.content, CONVERSATION_MESSAGE_TOKENS)}")
+    return "\n".join(lines)
+
+
+def evict_expired_sessions() -> int:
+    """Drop sessions idle for longer than SESSION_TTL_SECONDS; returns how many were evicted"""
+    cutoff = time.time() - SESSION_TTL_SECONDS
+    expired = [sid for sid, session in list(chat_sessions.items()) if session["last_access"] < cutoff]
+    for session_id in expired:
+        delete_session(session_id)
+    return len(expired)
+
+
+def maybe_evict_expired_sessions() -> int:
+    """
+    Evict expired sessions if SESSION_SWEEP_INTERVAL_SECONDS passed since the last sweep.
+    
+    Sessions that expire in between are still refused by get_session; the
+    sweep only reclaims their storage.
+    """
+    global _next_sweep
+    now = time.monotonic()
+    with _sweep_guard:
+        if now < _next_sweep:
+            return 0
+        _next_sweep = now + SESSION_SWEEP_INTERVAL_SECONDS
+    return evict_expired_sessions()
+
+
+def create_session(video_id: str, prompt_prefix: str,
+                   history: Optional[List[ConversationMessage]] = None) -> str:
+    """
+    Start a chat session for a video.
+    
+    The prompt prefix (system instructions and video header) is stored with
+    the session and reused verbatim on every turn, so Ollama can serve it
+    from its KV cache. An optional client-side history seeds the session.
+    """
+    maybe_evict_expired_sessions()
+    
+    session_id = uuid.uuid4().hex
+    now = time.time()
+    chat_sessions[session_id] = {
+        "video_id": video_id,
+        "prompt_prefix": prompt_prefix,
+        "created_at": now,
+        "last_access": now
+    }
+    conversation_sessions[session_id] = list(history or [])[-MAX_CONVERSATION_HISTORY:]
+    return session_id
+
+
+def get_session(session_id: str) -> Optional[Dict[str, Any]]:
+    """Return a live session and refresh its TTL, or None if unknown or expired"""
+    session = chat_sessions.get(session_id)
+    if session is None:
+        return None
+    
+    if session["last_access"] < time.time() - SESSION_TTL_SECONDS:
+        delete_session(session_id)
+        return None
+    
+    session["last_access"] = time.time()
+    chat_sessions[session_id] = session
+    return session
+
+
+def get_video_sessions(video_id: str) -> List[str]:
+    """IDs of the sessions for a video, oldest first"""
+    sessions = [(s["created_at"], sid) for sid, s in list(chat_sessions.items()) if s["video_id"] == video_id]
+    return [sid for _, sid in sorted(sessions)]
+
+
+def delete_session(session_id: str) -> None:
+    """Forget a session entirely"""
+    with _session_lock(session_id):
+        chat_sessions.pop(session_id, None)
+        conversation_sessions.pop(session_id, None)
+        conversation_memories.pop(session_id, None)
+    with _locks_guard:
+        _session_locks.pop(session_id, None)
+
+
+def get_session_messages(session_key: str) -> List[ConversationMessage]:
+    """Messages stored server-side for a session"""
+    return conversation_sessions.get(session_key, [])
+
+
+def build_history_text(session_key: str, history: List[ConversationMessage]) -> str:
+    """
+    Build the conversation part of the prompt with a bounded size.
+
+    Turns already folded into the session's running summary are replaced
+    by that summary; the last turn (question and answer) is kept verbatim.
+    Each message is capped at CONVERSATION_MESSAGE_TOKENS, so the prompt
+    stays bounded however long the chat runs.
+
+    Args:
+        session_key: Key of the session the history belongs to
+        history: Conversation messages, oldest first
+
+    Returns:
+        str: Prompt text ("" when there is no history)
+    """
+    if not history:
+        return ""
+
+    memory = conversation_memories.get(session_key, {})
+    summary = memory.get("summary", "")
+    covered = max(0, memory.get("covered", 0))
+    if covered > len(history):
+        # History was supplied by the client or cleared; the summary does not apply
+        summary, covered = "", 0
+
+    pending = history[covered:]
+    recent = pending[-2:]
+    # Normally empty: turns not yet folded because the background update is still running
+    unfolded = pending[:-2][-MAX_CONVERSATION_MESSAGES:]
+
+    formatted = ""
+    if summary:
+        formatted += f"Summary of the earlier conversation:\n{summary}\n\n"
+    formatted += "Previous conversation:\n"
+    formatted += _format_messages(unfolded + recent) + "\n"
+
+    return formatted + "\n"
+
+
+def record_turn(session_key: str, question: str, answer: str) -> None:
+    """Append a question/answer turn to the session, keeping only recent messages"""
+    with _session_lock(session_key):
+        messages = conversation_sessions.get(session_key, [])
+        messages.append(ConversationMessage(role="user", content=question))
+        messages.append(ConversationMessage(role="assistant", content=answer))
+
+        # Keep only recent messages, shifting the summary's coverage accordingly
+        overflow = len(messages) - MAX_CONVERSATION_HISTORY
+        if overflow > 0:
+            messages = messages[overflow:]
+            memory = conversation_memories.get(session_key)
+            if memory:
+                # May go negative while an update is folding the trimmed messages
+                memory["covered"] -= overflow
+                conversation_memories[session_key] = memory
+        conversation_sessions[session_key] = messages
+
+
+def update_conversation_summary(session_key: str) -> None:
+    """
+    Fold every turn except the latest into the session's running summary.
+
+    Meant to run as a background task after the answer has been sent, so
+    the extra LLM call never sits on the request path. The session lock is
+    only held to read and apply the update, never during the LLM call.
+    Skipped when the background queue is full; the next turn's update
+    folds the same messages.
+    """
+    try:
+        job = scheduler.admit("background")
+    except SchedulerFullError:
+        return
+    with job:
+        _fold_into_summary(session_key)
+
+
+def _fold_into_summary(session_key: str) -> None:
+    with _session_lock(session_key):
+        messages = conversation_sessions.get(session_key, [])
+        memory = conversation_memories.get(session_key, {"summary": "", "covered": 0})
+        if memory.get("updating_since", 0) > time.time() - SUMMARY_UPDATE_TIMEOUT_SECONDS:
+            return  # A running update will be followed by the next turn's update
+        to_fold = messages[max(0, memory["covered"]):-2]
+        if not to_fold:
+            return
+        # A timestamp rather than a flag, so an update lost with its worker does not block later ones
+        memory["updating_since"] = time.time()
+        conversation_memories[session_key] = memory
+        current_summary = memory["summary"]
+
+    llm = chat_model(temperature=0.1, priority="background")
+
+    summary_prompt = f"""You maintain a running summary of a conversation between a user and an assistant about a YouTube video.
+
+Current summary:
+{current_summary or "(empty)"}
+
+New messages:
+{_format_messages(to_fold)}
+
+Rewrite the summary so it also covers the new messages. Keep the user's questions, the facts given in the answers and anything the user may refer back to. Max {CONVERSATION_SUMMARY_MAX_WORDS} words.
+
+Updated summary:"""
+
+    try:
+        response = llm.invoke(summary_prompt)
+        summary = response.content if hasattr(response, 'content') else str(response)
+    except Exception as e:
+        print(f"Conversation summary error: {e}")
+        summary = None
+
+    with _session_lock(session_key):
+        memory = conversation_memories.get(session_key)
+        if memory is None:
+            return  # Session was cleared meanwhile
+        memory["updating_since"] = 0
+        if summary is not None:
+            memory["summary"] = truncate_to_tokens(summary.strip(), CONVERSATION_SUMMARY_MAX_WORDS * 2)
+            # record_turn may have trimmed messages meanwhile and lowered "covered"
+            memory["covered"] = max(0, memory["covered"] + len(to_fold))
+        conversation_memories[session_key] = memory
+
@@ -0,0 +1,130 @@
+"""Idle-time precomputation of summaries and standard answers after ingestion.
+
+Almost every processed video gets summarized and asked the same opening
+questions, so once a video is ingested it is queued here. A single worker
+thread waits until no higher-priority work (questions, ingestion, summaries)
+has been seen for PRECOMPUTE_IDLE_SECONDS, then generates the summary and the
+answers to PRECOMPUTE_QUESTIONS in the "background" scheduler class. As soon
+as higher-priority work shows up again the run stops before its next LLM
+call and the video is re-queued; finished segment highlights and answers are
+kept, so the next attempt resumes where it stopped. Videos ingested with
+lazy embedding only get their summary.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+from app.core.config import PRECOMPUTE_ENABLED, PRECOMPUTE_QUESTIONS, PRECOMPUTE_IDLE_SECONDS
+from app.core.scheduler import scheduler, SchedulerFullError
+from app.core.storage import vector_stores, video_info, video_summaries, precomputed_answers
+from app.services.chat_service import answer_question
+from app.services.summary_service import generate_summary, SummaryCancelled
+from app.services.video_service import index_build_scheduled
+from app.utils.rag_utils import normalize_question
+
+_queue = deque()
+_cond = threading.Condition()
+_worker: Optional[threading.Thread] = None
+_current: Optional[str] = None
+_counts = {"completed": 0, "cancelled": 0, "failed": 0}
+
+
+def get_precomputed_answer(video_id: str, question: str) -> Optional[Dict[str, Any]]:
+    """Stored answer to a standard question, if it has been precomputed"""
+    answer = precomputed_answers.get(video_id, {}).get(normalize_question(question))
+    return {**answer, "question": question} if answer else None
+
+
+def schedule_precompute(video_id: str) -> None:
+    """Queue a processed video for idle-time precomputation"""
+    global _worker
+    if not PRECOMPUTE_ENABLED:
+        return
+    with _cond:
+        if video_id != _current and video_id not in _queue:
+            _queue.append(video_id)
+        # Started on first use so importing the module has no side effects
+        if _worker is None:
+            _worker = threading.Thread(target=_worker_loop, name="precompute", daemon=True)
+            _worker.start()
+        _cond.notify()
+
+
+def _should_stop() -> bool:
+    return not scheduler.is_idle("background")
+
+
+def _wait_until_idle() -> None:
+    """Block until no higher-priority work has been seen for PRECOMPUTE_IDLE_SECONDS"""
+    idle_since = None
+    while True:
+        if _should_stop():
+            idle_since = None
+        elif idle_since is None:
+            idle_since = time.monotonic()
+        elif time.monotonic() - idle_since >= PRECOMPUTE_IDLE_SECONDS:
+            return
+        time.sleep(0.5)
+
+
+def precompute_video(video_id: str) -> bool:
+    """
+    Generate and store the summary and standard answers for a video.
+
+    Returns:
+        bool: False if the run was cancelled by higher-priority work
+    """
+    if video_id not in video_info:
+        return True  # Deleted since it was queued
+
+    try:
+        with scheduler.admit("background"):
+            if video_id not in video_summaries:
+                generate_summary(video_id, priority="background", should_stop=_should_stop)
+
+            if video_id not in vector_stores and not index_build_scheduled(video_id):
+                return True  # Lazy embedding: answering would build an index the video may never need
+
+            answers = precomputed_answers.get(video_id, {})
+            for question in PRECOMPUTE_QUESTIONS:
+                key = normalize_question(question)
+                if key in answers:
+                    continue
+                if _should_stop():
+                    return False
+                answers[key] = answer_question(question, video_id, priority="background")
+                # Write back after each answer so a cancelled run keeps its progress
+                precomputed_answers[video_id] = answers
+    except (SummaryCancelled, SchedulerFullError):
+        return False
+    return True
+
+
+def _worker_loop() -> None:
+    global _current
+    while True:
+        with _cond:
+            while not _queue:
+                _cond.wait()
+            _current = _queue.popleft()
+        video_id = _current
+
+        _wait_until_idle()
+        try:
+            outcome = "completed" if precompute_video(video_id) else "cancelled"
+        except Exception as e:
+            print(f"Precompute failed for {video_id}: {e}")
+            outcome = "failed"
+
+        with _cond:
+            _current = None
+            _counts[outcome] += 1
+            if outcome == "cancelled":
+                _queue.append(video_id)
+
+
+def precompute_status() -> Dict[str, Any]:
+    """Queue and outcome counts, for the metrics endpoint"""
+    with _cond:
+        return {"enabled": PRECOMPUTE_ENABLED, "current": _current, "queued": list(_queue), **_counts}
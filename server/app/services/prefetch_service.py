@@ -0,0 +1,133 @@
+"""Retrieval-as-you-type: query embeddings and search results cached ahead of /ask.
+
+The client sends the draft question on debounced keystrokes. prefetch()
+embeds it and runs the FAISS search for the video at MAX_K, and caches the
+embedding and hits under the normalized question text. When the question is
+then submitted, answer_question() finds the entry and goes straight to
+routing and generation; FAISS returns hits best first, so the cached list
+is trimmed to the k the question needs.
+Drafts are admitted as "embed" scheduler jobs, so they never hold up
+submitted questions, and are dropped when that class already has
+SCHEDULER_EMBED_LIMIT jobs in flight.
+
+Entries live in a per-worker LRU bounded by PREFETCH_CACHE_SIZE and expire
+after PREFETCH_TTL_SECONDS. Abandoned drafts sit at the cold end of the LRU,
+so evicting them is a pop from the front.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from app.core.config import (
+    MAX_K, PREFETCH_CACHE_SIZE, PREFETCH_TTL_SECONDS, PREFETCH_MIN_CHARS, PREFETCH_MAX_IN_FLIGHT
+)
+from app.core.ollama_pool import embedding_model
+from app.core.scheduler import scheduler, SchedulerFullError
+from app.core.storage import vector_stores, video_info
+from app.utils.rag_utils import normalize_question, search_by_vectors
+from app.services.video_service import schedule_index_build
+
+# (video_id, normalized question) -> {"embedding", "hits", "expires"}, least recently used first
+_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+_in_flight = set()
+_lock = threading.Lock()
+_counts = {"prefetched": 0, "cached": 0, "skipped": 0, "indexing": 0, "hits": 0, "misses": 0}
+
+
+def _evict(now: float) -> None:
+    """Drop expired entries from the cold end and trim to PREFETCH_CACHE_SIZE (caller holds _lock)"""
+    while _cache:
+        key, entry = next(iter(_cache.items()))
+        if entry["expires"] > now and len(_cache) <= PREFETCH_CACHE_SIZE:
+            break
+        del _cache[key]
+
+
+def _count(outcome: str) -> str:
+    with _lock:
+        _counts[outcome] += 1
+    return outcome
+
+
+def prefetch(video_id: str, question: str) -> str:
+    """
+    Embed a draft question and cache its search results.
+
+    Args:
+        video_id: ID of a processed video
+        question: The question as typed so far
+
+    Returns:
+        str: "prefetched", "cached" (already fresh in the cache), "skipped"
+            (too short, too many prefetches already running or the embed
+            class is full) or "indexing"
+            (the video's deferred index is being built)
+    """
+    key = (video_id, normalize_question(question))
+    if len(key[1]) < PREFETCH_MIN_CHARS:
+        return _count("skipped")
+    if video_id not in video_info:
+        raise ValueError("Video not found. Please process the video first.")
+    if video_id not in vector_stores:
+        # Embedding was deferred: someone is about to ask, so start building the index now
+        schedule_index_build(video_id, priority="embed")
+        return _count("indexing")
+
+    now = time.monotonic()
+    with _lock:
+        _evict(now)
+        if key in _cache and _cache[key]["expires"] > now:
+            _cache.move_to_end(key)
+            _counts["cached"] += 1
+            return "cached"
+        # Speculative work: never queue behind other prefetches, just drop the keystroke
+        if key in _in_flight or len(_in_flight) >= PREFETCH_MAX_IN_FLIGHT:
+            _counts["skipped"] += 1
+            return "skipped"
+        _cache.pop(key, None)  # Expired but not yet evicted from the cold end
+        _in_flight.add(key)
+
+    try:
+        vector_store = vector_stores[video_id]
+        # Speculative: never competes with submitted questions for the embedder
+        with scheduler.admit("embed"):
+            embedding = embedding_model("embed").embed_query(question)
+        hits = search_by_vectors(vector_store, [embedding], MAX_K)[0]
+    except SchedulerFullError:
+        return _count("skipped")
+    finally:
+        with _lock:
+            _in_flight.discard(key)
+
+    with _lock:
+        _cache[key] = {"embedding": embedding, "hits": hits, "expires": time.monotonic() + PREFETCH_TTL_SECONDS}
+        _evict(time.monotonic())
+        _counts["prefetched"] += 1
+    return "prefetched"
+
+
+def get_prefetched(video_id: str, question: str, k: int) -> Optional[Tuple[list, list]]:
+    """Cached (question embedding, top-k scored documents) for a question, if prefetched and fresh (k <= MAX_K)"""
+    key = (video_id, normalize_question(question))
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None or entry["expires"] <= time.monotonic():
+            _counts["misses"] += 1
+            return None
+        _cache.move_to_end(key)
+        _counts["hits"] += 1
+        return entry["embedding"], entry["hits"][:k]
+
+
+def drop_prefetched(video_id: str) -> None:
+    """Forget a video's prefetches (its index was deleted or replaced)"""
+    with _lock:
+        for key in [key for key in _cache if key[0] == video_id]:
+            del _cache[key]
+
+
+def prefetch_status() -> Dict[str, Any]:
+    """Cache size and outcome counts, for the metrics endpoint"""
+    with _lock:
+        return {"entries": len(_cache), "in_flight": len(_in_flight), **_counts}
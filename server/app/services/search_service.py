@@ -0,0 +1,83 @@
+"""Keyword search over transcripts (no LLM or embedding calls)"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+from app.core.config import TRANSCRIPT_INDEX_CACHE_SIZE
+from app.core.storage import video_info, video_transcripts
+from app.utils.transcript_index import TranscriptIndex
+
+# Per worker: video_id -> (fingerprint, index), least recently used first
+_indexes: "OrderedDict[str, Tuple[Tuple, TranscriptIndex]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _fingerprint(video_id: str) -> Tuple:
+    """
+    Identifies the stored transcript without loading it.
+
+    Only transcript fields count: a deferred vector index being built later
+    updates video_info (chunks_created) but leaves the keyword index valid.
+    """
+    info = video_info.get(video_id)
+    if info is None:
+        raise ValueError("Video not found. Please process the video first.")
+    return info.get("url"), info.get("transcript_length")
+
+
+def build_transcript_index(video_id: str) -> TranscriptIndex:
+    """Index a video's transcript and cache it, replacing any previous index"""
+    index = TranscriptIndex(video_transcripts.get(video_id, []))
+    with _lock:
+        _indexes[video_id] = (_fingerprint(video_id), index)
+        _indexes.move_to_end(video_id)
+        while len(_indexes) > TRANSCRIPT_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def get_transcript_index(video_id: str) -> TranscriptIndex:
+    """Cached index of a video's transcript, built on first use in this worker"""
+    fingerprint = _fingerprint(video_id)
+    with _lock:
+        cached = _indexes.get(video_id)
+        if cached is not None and cached[0] == fingerprint:
+            _indexes.move_to_end(video_id)
+            return cached[1]
+    return build_transcript_index(video_id)
+
+
+def cached_transcript_indexes() -> Dict[str, TranscriptIndex]:
+    """Indexes currently held by this worker, by video_id"""
+    with _lock:
+        return {video_id: index for video_id, (_, index) in _indexes.items()}
+
+
+def drop_transcript_index(video_id: str) -> None:
+    with _lock:
+        _indexes.pop(video_id, None)
+
+
+def search_transcript(video_id: str, query: str, prefix: bool = False, limit: int = 50) -> Dict[str, Any]:
+    """
+    Exact phrase search over a video's transcript.
+
+    Args:
+        video_id: ID of a processed video
+        query: Words to find in order (case and punctuation are ignored)
+        prefix: Treat the last word as a prefix, for search-as-you-type
+        limit: Maximum matches returned
+
+    Returns:
+        Dict: total, matches (start_ms, end_ms, text, snippet_index) and took_ms
+    """
+    started = time.perf_counter()
+    result = get_transcript_index(video_id).search(query, prefix=prefix, limit=limit)
+    return {**result, "took_ms": round(1000 * (time.perf_counter() - started), 2)}
+
+
+def complete_transcript_terms(video_id: str, prefix: str, limit: int = 10) -> Dict[str, Any]:
+    """Words of a video's transcript starting with prefix, most frequent first"""
+    started = time.perf_counter()
+    completions = get_transcript_index(video_id).complete(prefix, limit=limit)
+    return {"completions": completions, "took_ms": round(1000 * (time.perf_counter() - started), 2)}
@@ -1,10 +1,23 @@
 """Summary generation service"""
-from typing import List, Dict
-from langchain_ollama import ChatOllama
-from app.core.config import OLLAMA_BASE_URL, OLLAMA_MODEL, SUMMARY_INTERVAL_SECONDS, MAX_SUMMARY_SEGMENTS
-from app.core.storage import video_transcripts
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Iterator, Tuple, Callable, Optional, TYPE_CHECKING
+from app.core.config import (
+    SUMMARY_INTERVAL_SECONDS, MAX_SUMMARY_SEGMENTS,
+    SUMMARY_SEGMENT_MAX_CHARS, SUMMARY_REDUCE_FAN_IN, SUMMARY_MAX_WORKERS
+)
+from app.core.ollama_pool import chat_model
+from app.core.storage import video_transcripts, summary_segments, video_summaries
 from app.utils.youtube_utils import format_timestamp
 
+if TYPE_CHECKING:
+    from langchain_ollama import ChatOllama
+
+
+class SummaryCancelled(Exception):
+    """Raised when a summary run is stopped through its should_stop callback"""
+
 
 def group_transcript_by_time(transcript_data: List[Dict], interval_seconds: int = SUMMARY_INTERVAL_SECONDS) -> List[Dict]:
     """Group transcript snippets into time-based segments"""
@@ -34,55 +47,88 @@ def group_transcript_by_time(transcript_data: List[Dict], interval_seconds: int
     return segments
 
 
-def generate_summary(video_id: str) -> Dict:
-    """
-    Generate comprehensive timestamped summary for a video.
-    
-    1. Generates an overall abstractive summary
-    2. Groups transcript into time-based segments
-    3. Generates bullet-point highlights for key segments
-    
-    Args:
-        video_id: ID of the video to summarize
-        
-    Returns:
-        Dict: Structured summary object
-    """
-    if video_id not in video_transcripts:
-        raise ValueError("Video not found. Please process the video first.")
-    
-    transcript_data = video_transcripts[video_id]
-    full_transcript = " ".join([snippet["text"] for snippet in transcript_data])
-    
-    # Create LLM
-    llm = ChatOllama(
-        model=OLLAMA_MODEL,
-        temperature=0.3,
-        base_url=OLLAMA_BASE_URL
-    )
-    
-    # Generate overall summary
-    overall_prompt = f"""Analyze the following YouTube video transcript and provide a comprehensive 2-3 sentence summary that captures the main theme and key discussion points.
+def get_summary_interval(transcript_data: List[Dict]) -> int:
+    """Segment length that covers the whole video in at most MAX_SUMMARY_SEGMENTS segments"""
+    if not transcript_data:
+        return SUMMARY_INTERVAL_SECONDS
+
+    last = transcript_data[-1]
+    duration = last["start"] + last.get("duration", 0)
+    return max(SUMMARY_INTERVAL_SECONDS, math.ceil(duration / MAX_SUMMARY_SEGMENTS))
+
+
+def invoke_llm(llm: "ChatOllama", prompt: str) -> str:
+    """Invoke the LLM and return the stripped response text"""
+    response_msg = llm.invoke(prompt)
+    response = response_msg.content if hasattr(response_msg, 'content') else str(response_msg)
+    return response.strip()
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """Split text into pieces of at most max_chars, preferring word boundaries"""
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def parse_highlight(response: str) -> Dict:
+    """Parse a MAIN:/BULLET: formatted LLM response into a highlight"""
+    main_point = ""
+    sub_points = []
+
+    for line in response.split('\n'):
+        line = line.strip()
+        if line.startswith('MAIN:'):
+            main_point = line.replace('MAIN:', '').strip()
+        elif line.startswith('BULLET:'):
+            bullet = line.replace('BULLET:', '').strip()
+            if bullet:
+                sub_points.append(bullet)
+
+    # Fallback
+    if not main_point:
+        lines = [l.strip() for l in response.split('\n') if l.strip()]
+        main_point = lines[0] if lines else "Key discussion point"
+        sub_points = lines[1:4] if len(lines) > 1 else ["Important topic covered in this section"]
+
+    return {
+        "main_point": main_point,
+        "sub_points": sub_points[:4]
+    }
+
+
+def condense_text(llm: "ChatOllama", text: str) -> str:
+    """Condense a long transcript piece into dense notes"""
+    condense_prompt = f"""Condense this part of a YouTube video transcript into dense notes (max 120 words). Keep every distinct topic, claim, name and number.
 
 Transcript:
-{full_transcript[:4000]}
+{text}
 
-Summary:"""
-    
-    overall_summary_msg = llm.invoke(overall_prompt)
-    overall_summary = overall_summary_msg.content if hasattr(overall_summary_msg, 'content') else str(overall_summary_msg)
-    overall_summary = overall_summary.strip()
-    
-    # Group transcript into segments
-    segments = group_transcript_by_time(transcript_data, interval_seconds=SUMMARY_INTERVAL_SECONDS)
-    
-    # Generate highlights
-    highlights = []
-    for segment in segments[:MAX_SUMMARY_SEGMENTS]:
-        timestamp = format_timestamp(segment["start_time"])
-        segment_text = segment["text"][:2000]
-        
-        highlight_prompt = f"""Analyze this video segment and extract:
+Notes:"""
+    return invoke_llm(llm, condense_prompt)
+
+
+def summarize_segment(llm: "ChatOllama", segment: Dict) -> Dict:
+    """
+    Map step: produce the highlight for one time segment.
+
+    Segments longer than SUMMARY_SEGMENT_MAX_CHARS are condensed piece by
+    piece first, so the highlight reflects the whole segment instead of
+    its opening minutes.
+    """
+    segment_text = segment["text"]
+    if len(segment_text) > SUMMARY_SEGMENT_MAX_CHARS:
+        pieces = split_text(segment_text, SUMMARY_SEGMENT_MAX_CHARS)
+        segment_text = "\n".join(condense_text(llm, piece) for piece in pieces)
+
+    highlight_prompt = f"""Analyze this video segment and extract:
 1. A single main point or topic (one sentence, max 25 words)
 2. 2-4 key supporting points or details (each as a separate bullet, max 20 words each)
 
@@ -94,39 +140,156 @@ MAIN: [main point here]
 BULLET: [first supporting point]
 BULLET: [second supporting point]
 BULLET: [third supporting point]"""
-        
-        response_msg = llm.invoke(highlight_prompt)
-        response = response_msg.content if hasattr(response_msg, 'content') else str(response_msg)
-        response = response.strip()
-        
-        # Parse response
-        main_point = ""
-        sub_points = []
-        
-        for line in response.split('\n'):
-            line = line.strip()
-            if line.startswith('MAIN:'):
-                main_point = line.replace('MAIN:', '').strip()
-            elif line.startswith('BULLET:'):
-                bullet = line.replace('BULLET:', '').strip()
-                if bullet:
-                    sub_points.append(bullet)
-        
-        # Fallback
-        if not main_point:
-            lines = [l.strip() for l in response.split('\n') if l.strip()]
-            main_point = lines[0] if lines else "Key discussion point"
-            sub_points = lines[1:4] if len(lines) > 1 else ["Important topic covered in this section"]
-        
-        highlights.append({
-            "timestamp": timestamp,
-            "main_point": main_point,
-            "sub_points": sub_points[:4]
-        })
-    
+
+    highlight = parse_highlight(invoke_llm(llm, highlight_prompt))
     return {
+        "timestamp": format_timestamp(segment["start_time"]),
+        **highlight
+    }
+
+
+def format_highlight(highlight: Dict) -> str:
+    """Render a highlight as a single line of text for the reduce step"""
+    details = "; ".join(highlight["sub_points"])
+    return f"[{highlight['timestamp']}] {highlight['main_point']}" + (f" ({details})" if details else "")
+
+
+def reduce_summaries(llm: "ChatOllama", parts: List[str], executor: ThreadPoolExecutor) -> str:
+    """
+    Reduce step: hierarchically combine partial summaries into the overall summary.
+
+    Parts are merged SUMMARY_REDUCE_FAN_IN at a time (in parallel) until a
+    single prompt can hold them all.
+    """
+    def combine(group: List[str]) -> str:
+        combine_prompt = f"""Combine these consecutive notes from a YouTube video into one short paragraph (max 80 words) that keeps the key points in order.
+
+Notes:
+{chr(10).join(group)}
+
+Combined notes:"""
+        return invoke_llm(llm, combine_prompt)
+
+    while len(parts) > SUMMARY_REDUCE_FAN_IN:
+        groups = [parts[i:i + SUMMARY_REDUCE_FAN_IN] for i in range(0, len(parts), SUMMARY_REDUCE_FAN_IN)]
+        parts = list(executor.map(combine, groups))
+
+    overall_prompt = f"""Below are timestamped notes covering an entire YouTube video from start to finish. Provide a comprehensive 2-3 sentence summary that captures the main theme and key discussion points.
+
+Notes:
+{chr(10).join(parts)}
+
+Summary:"""
+    return invoke_llm(llm, overall_prompt)
+
+
+def iter_summary_events(video_id: str, priority: str = "summary",
+                        should_stop: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Generate the summary for a video as a stream of events.
+
+    1. Groups the full transcript into time-based segments
+    2. Map: generates bullet-point highlights for every segment in parallel,
+       yielding ("highlight", ...) as soon as each segment's LLM call returns
+    3. Reduce: hierarchically combines the highlights into the overall summary
+       and yields ("summary", ...) with the complete result
+
+    Segments are submitted in timestamp order, so highlights mostly arrive
+    in order; each event carries its segment index for the client to sort.
+    Segment highlights are cached, so repeated or partially failed runs only
+    pay for the segments that are still missing.
+
+    Args:
+        video_id: ID of the video to summarize
+        priority: Scheduler class of the LLM calls
+        should_stop: Checked before each LLM call; when it returns True the
+            run raises SummaryCancelled (highlights done so far stay cached)
+
+    Yields:
+        Tuple[str, Dict]: (event name, payload)
+    """
+    if video_id not in video_transcripts:
+        raise ValueError("Video not found. Please process the video first.")
+
+    if video_id in video_summaries:
+        cached = video_summaries[video_id]
+        total = len(cached["highlights"])
+        for index, highlight in enumerate(cached["highlights"]):
+            yield "highlight", {"index": index, "total": total, **highlight}
+        yield "summary", cached
+        return
+
+    transcript_data = video_transcripts[video_id]
+
+    # Create LLM
+    llm = chat_model(temperature=0.3, priority=priority)
+
+    def check_cancelled():
+        if should_stop is not None and should_stop():
+            raise SummaryCancelled(f"Summary of {video_id} cancelled")
+
+    # Group transcript into segments covering the whole video
+    interval = get_summary_interval(transcript_data)
+    segments = group_transcript_by_time(transcript_data, interval_seconds=interval)
+    segment_cache = summary_segments.get(video_id, {})
+    cache_lock = threading.Lock()
+
+    def cached_segment(segment: Dict) -> Dict:
+        key = f"{interval}:{segment['start_time']}"
+        with cache_lock:
+            highlight = segment_cache.get(key)
+        if highlight is None:
+            check_cancelled()
+            highlight = summarize_segment(llm, segment)
+            # Write back so the cache is shared (and persisted by the sqlite backend); the
+            # copy is taken under the lock so serializing it never races another worker
+            with cache_lock:
+                segment_cache[key] = highlight
+                summary_segments[video_id] = dict(segment_cache)
+        return highlight
+
+    executor = ThreadPoolExecutor(max_workers=SUMMARY_MAX_WORKERS)
+    try:
+        # Map: highlights for every segment, emitted as they complete
+        futures = {executor.submit(cached_segment, segment): index for index, segment in enumerate(segments)}
+        highlights = [None] * len(segments)
+        for future in as_completed(futures):
+            index = futures[future]
+            highlights[index] = future.result()
+            yield "highlight", {"index": index, "total": len(segments), **highlights[index]}
+
+        # Reduce: overall summary from the highlights
+        check_cancelled()
+        overall_summary = reduce_summaries(llm, [format_highlight(h) for h in highlights], executor)
+    finally:
+        # Stop queued segment work if the consumer goes away (e.g. client disconnect)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    result = {
         "video_id": video_id,
         "overall_summary": overall_summary,
         "highlights": highlights,
         "status": "success"
     }
+    video_summaries[video_id] = result
+    yield "summary", result
+
+
+def generate_summary(video_id: str, priority: str = "summary",
+                     should_stop: Optional[Callable[[], bool]] = None) -> Dict:
+    """
+    Generate comprehensive timestamped summary for a video.
+
+    Runs the map-reduce pipeline of iter_summary_events to completion.
+
+    Args:
+        video_id: ID of the video to summarize
+        priority: Scheduler class of the LLM calls
+        should_stop: Cancellation check, see iter_summary_events
+
+    Returns:
+        Dict: Structured summary object
+    """
+    for event, payload in iter_summary_events(video_id, priority=priority, should_stop=should_stop):
+        if event == "summary":
+            return payload
@@ -1,17 +1,31 @@
 """Video processing service"""
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_ollama import OllamaEmbeddings
-from langchain_community.vectorstores import FAISS
-from typing import Dict, Any, List
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 from app.core.config import (
+    CHUNKER,
     CHUNK_SIZE, 
-    CHUNK_OVERLAP, 
-    OLLAMA_EMBEDDING_MODEL, 
-    OLLAMA_BASE_URL
+    CHUNK_OVERLAP,
+    CHUNK_MIN_CHARS,
+    CAPTION_CLEANING,
+    DEDUP_THRESHOLD,
+    INGEST_EMBEDDING_MODE
 )
+from app.core.ollama_pool import embedding_model
+from app.core.scheduler import scheduler, SchedulerFullError
 from app.core.storage import vector_stores, video_info, video_transcripts, video_metadata
 from app.utils.youtube_utils import extract_video_id, fetch_youtube_metadata
+from app.utils.transcript_chunker import chunk_transcript, chunk_recursive
+from app.utils.rag_utils import get_chunk_lookup
+from app.utils.caption_cleaner import clean_snippets, dedupe_chunks
+from app.services.search_service import build_transcript_index
+from app.utils.source_cache import get_cached_transcript, cache_transcript, get_cached_metadata, cache_metadata
+
+EMBEDDING_MODES = ("eager", "lazy", "background")
+
+# One lock per video, so a deferred index is built once per worker
+_build_locks: Dict[str, threading.Lock] = {}
+_build_locks_guard = threading.Lock()
+_scheduled_builds = set()  # Videos with a background build thread
 
 # Helper function to create metadata documents (refactored from utils or kept inline if simple)
 def create_metadata_documents(metadata: Dict[str, Any], video_id: str):
@@ -57,113 +71,284 @@ def create_metadata_documents(metadata: Dict[str, Any], video_id: str):
         
     return docs
 
-def process_video(video_url: str) -> Dict[str, Any]:
+def load_metadata(video_id: str) -> Dict[str, Any]:
+    """Video metadata from the source cache, fetched from YouTube on a miss"""
+    metadata = get_cached_metadata(video_id)
+    if metadata is not None:
+        print(f"Using cached metadata for video {video_id}")
+        return metadata
+    
+    print(f"Fetching metadata for video {video_id}...")
+    metadata = fetch_youtube_metadata(video_id)
+    # Placeholder metadata means the fetch failed; try again next time
+    if metadata.get("title") != "Unknown Title":
+        cache_metadata(video_id, metadata)
+    return metadata
+
+def load_transcript(video_id: str, language: str = "en") -> List[Dict]:
+    """Transcript snippets (text, start, duration) from the source cache, fetched from YouTube on a miss"""
+    snippets = get_cached_transcript(video_id, language)
+    if snippets is not None:
+        print(f"Using cached transcript for video {video_id}")
+        return snippets
+    
+    from youtube_transcript_api import YouTubeTranscriptApi
+    
+    api = YouTubeTranscriptApi()
+    transcript_obj = api.fetch(video_id, languages=[language])
+    snippets = [
+        {"text": snippet.text, "start": snippet.start, "duration": snippet.duration}
+        for snippet in transcript_obj.snippets
+    ]
+    cache_transcript(video_id, language, snippets)
+    return snippets
+
+def process_video(video_url: str, embedding_mode: Optional[str] = None) -> Dict[str, Any]:
     """
     Process a YouTube video and create vector store.
     
     1. Extracts video ID
-    2. Fetches metadata
-    3. Fetches transcript
-    4. Chunks transcript
-    5. Creates embeddings and vector store
+    2. Fetches metadata (or reads it from the source cache)
+    3. Fetches transcript (or reads it from the source cache)
+    4. Stores them (the video can now be summarized and keyword-searched)
+    5. Builds the vector index (build_vector_store), now or later
     
     Args:
         video_url: URL of the YouTube video
+        embedding_mode: When to build the vector index (default INGEST_EMBEDDING_MODE):
+            "eager" before returning, "lazy" on the first question,
+            "background" at background priority after returning
         
     Returns:
         Dict: Processing results and status
     """
+    embedding_mode = embedding_mode or INGEST_EMBEDDING_MODE
+    if embedding_mode not in EMBEDDING_MODES:
+        raise ValueError(f"embedding_mode must be one of {', '.join(EMBEDDING_MODES)}")
+    
     # Extract video ID
     video_id = extract_video_id(video_url)
     
     # Check if already processed
-    if video_id in vector_stores:
+    if video_id in video_info:
+        if embedding_mode == "eager":
+            get_vector_store(video_id)  # Deferred earlier, wanted now
         return {
             "video_id": video_id,
             "title": video_info[video_id].get("title", "Unknown"),
             "transcript_length": video_info[video_id].get("transcript_length", 0),
             "chunks_created": video_info[video_id].get("chunks_created", 0),
-            "status": "already_processed"
+            "status": "already_processed",
+            "indexed": video_id in vector_stores
         }
     
     # Fetch metadata
-    print(f"Fetching metadata for video {video_id}...")
-    metadata = fetch_youtube_metadata(video_id)
+    metadata = load_metadata(video_id)
     video_metadata[video_id] = metadata
     
     # Get transcript
+    from youtube_transcript_api import TranscriptsDisabled
+    
     try:
-        api = YouTubeTranscriptApi()
-        transcript_obj = api.fetch(video_id, languages=["en"])
-        
         # Store transcript with timestamps
-        transcript_with_timestamps = []
-        for snippet in transcript_obj.snippets:
-            transcript_with_timestamps.append({
-                "text": snippet.text,
-                "start": snippet.start,
-                "duration": snippet.duration
-            })
+        transcript_with_timestamps = load_transcript(video_id)
         video_transcripts[video_id] = transcript_with_timestamps
-        
-        transcript = " ".join(snippet.text for snippet in transcript_obj.snippets)
     except TranscriptsDisabled:
         raise ValueError("No captions available for this video")
     except Exception as e:
         raise ValueError(f"Error fetching transcript: {str(e)}")
     
-    # Split transcript into chunks
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        separators=["\n\n", "\n", ". ", " ", ""]
-    )
-    transcript_chunks = splitter.create_documents([transcript])
-    
-    # Add metadata to chunks
-    for idx, chunk in enumerate(transcript_chunks):
-        chunk.metadata.update({
-            "video_id": video_id,
-            "type": "transcript",
-            "source": "youtube_transcript",
-            "chunk_index": idx,
-            "total_chunks": len(transcript_chunks)
-        })
-    
-    # Create metadata documents
-    metadata_docs = create_metadata_documents(metadata, video_id)
-    
-    # Combine all documents
-    all_documents = transcript_chunks + metadata_docs
-    
-    print(f"Created {len(transcript_chunks)} transcript chunks and {len(metadata_docs)} metadata documents")
-    
-    # Create embeddings and vector store using Ollama
-    embeddings = OllamaEmbeddings(
-        model=OLLAMA_EMBEDDING_MODEL,
-        base_url=OLLAMA_BASE_URL
-    )
-    
-    vector_store = FAISS.from_documents(all_documents, embeddings)
-    
-    # Store results
-    vector_stores[video_id] = vector_store
+    # Store results (video info last: its presence marks the video as processed)
+    transcript = " ".join(snippet["text"] for snippet in _snippets_to_index(transcript_with_timestamps))
     video_info[video_id] = {
         "title": metadata.get("title", f"Video {video_id}"),
         "transcript_length": len(transcript),
-        "chunks_created": len(all_documents),
+        "chunks_created": 0,  # Set when the vector index is built
+        "duplicate_chunks": 0,
         "url": video_url,
         "channel": metadata.get("channel_name", "Unknown"),
         "publish_date": metadata.get("publish_date", "Unknown"),
         "description": metadata.get("description", "")[:200]
     }
+    # Keyword search index (cheap next to embedding; rebuilt on demand by other workers)
+    build_transcript_index(video_id)
+    
+    if embedding_mode == "eager":
+        get_vector_store(video_id)
+    elif embedding_mode == "background":
+        schedule_index_build(video_id)
     
     return {
         "video_id": video_id,
         "title": video_info[video_id]["title"],
         "transcript_length": len(transcript),
-        "chunks_created": len(all_documents),
+        "chunks_created": video_info[video_id]["chunks_created"],
         "status": "processed",
         "channel": video_info[video_id].get("channel"),
-        "publish_date": video_info[video_id].get("publish_date")
+        "publish_date": video_info[video_id].get("publish_date"),
+        "indexed": video_id in vector_stores
     }
+
+
+def _snippets_to_index(snippets: List[Dict]) -> List[Dict]:
+    """The stored transcript stays verbatim; only the text to embed is cleaned"""
+    return clean_snippets(snippets) if CAPTION_CLEANING else snippets
+
+
+def build_documents(snippets: List[Dict], metadata: Dict[str, Any], video_id: str,
+                    chunker: str = CHUNKER, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP,
+                    min_chars: int = CHUNK_MIN_CHARS,
+                    dedup_threshold: float = DEDUP_THRESHOLD) -> Tuple[List, List, int]:
+    """
+    The documents ingestion embeds for a transcript and its metadata.
+    
+    1. Strips caption noise and chunks the transcript
+    2. Merges near-duplicate chunks (one embedding per cluster)
+    3. Creates the metadata documents
+    
+    The chunker settings default to the configured ones; scripts/retrieval_eval.py
+    passes others to compare them.
+    
+    Returns:
+        Tuple: transcript chunks, metadata documents and the number of merged duplicates
+    """
+    snippets = _snippets_to_index(snippets)
+    
+    # Split transcript into chunks
+    if chunker == "snippet":
+        # Snippet-aligned, no overlap, with start/end times per chunk
+        transcript_chunks = chunk_transcript(snippets, video_id, max_chars=chunk_size, min_chars=min_chars)
+    else:
+        transcript_chunks = chunk_recursive(snippets, video_id, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    
+    # Repeated intros, choruses and loops are embedded once
+    transcript_chunks, duplicate_chunks = dedupe_chunks(transcript_chunks, threshold=dedup_threshold)
+    
+    return transcript_chunks, create_metadata_documents(metadata, video_id), duplicate_chunks
+
+
+def build_vector_store(video_id: str, priority: str = "embed"):
+    """
+    Chunk, embed and index a stored transcript and its metadata.
+    
+    1. Builds the documents (build_documents)
+    2. Creates embeddings and vector store
+    
+    Args:
+        video_id: ID of a video whose transcript and metadata are stored
+        priority: Scheduler class of the embedding calls
+        
+    Returns:
+        The FAISS vector store (also stored in vector_stores)
+    """
+    transcript_chunks, metadata_docs, duplicate_chunks = build_documents(
+        video_transcripts[video_id], video_metadata.get(video_id, {}), video_id
+    )
+    
+    # Combine all documents
+    all_documents = transcript_chunks + metadata_docs
+    
+    print(f"Created {len(transcript_chunks)} transcript chunks ({duplicate_chunks} near-duplicates merged) "
+          f"and {len(metadata_docs)} metadata documents")
+    
+    # Create embeddings and vector store using Ollama
+    from langchain_community.vectorstores import FAISS
+    
+    embeddings = embedding_model(priority=priority)
+    
+    vector_store = FAISS.from_documents(all_documents, embeddings)
+    # Later searches embed user questions, which are interactive
+    vector_store.embedding_function = embedding_model()
+    
+    info = video_info[video_id]
+    info.update({"chunks_created": len(all_documents), "duplicate_chunks": duplicate_chunks})
+    video_info[video_id] = info
+    vector_stores[video_id] = vector_store
+    return vector_store
+
+
+def _build_lock(video_id: str) -> threading.Lock:
+    with _build_locks_guard:
+        return _build_locks.setdefault(video_id, threading.Lock())
+
+
+def get_vector_store(video_id: str, priority: str = "embed"):
+    """
+    The video's vector store, built first if ingestion deferred it.
+    
+    Concurrent callers in a worker wait for a single build.
+    
+    Raises:
+        ValueError: If the video has not been processed
+    """
+    if video_id in vector_stores:
+        return vector_stores[video_id]
+    if video_id not in video_info:
+        raise ValueError("Video not found. Please process the video first.")
+    
+    with _build_lock(video_id):
+        if video_id in vector_stores:  # Built while this caller waited
+            return vector_stores[video_id]
+        return build_vector_store(video_id, priority)
+
+
+def schedule_index_build(video_id: str, priority: str = "background") -> bool:
+    """
+    Build a deferred vector index in a background thread.
+    
+    Returns:
+        bool: False if the index exists or is already being built
+    """
+    with _build_locks_guard:
+        if video_id in _scheduled_builds or video_id in vector_stores:
+            return False
+        _scheduled_builds.add(video_id)
+    
+    def build():
+        try:
+            with scheduler.admit(priority):
+                get_vector_store(video_id, priority)
+        except SchedulerFullError:
+            pass  # Built on the first question instead
+        except Exception as e:
+            print(f"Index build failed for {video_id}: {e}")
+        finally:
+            with _build_locks_guard:
+                _scheduled_builds.discard(video_id)
+    
+    threading.Thread(target=build, name=f"index-{video_id}", daemon=True).start()
+    return True
+
+
+def index_build_scheduled(video_id: str) -> bool:
+    """A background build of the video's index is queued or running in this worker"""
+    with _build_locks_guard:
+        return video_id in _scheduled_builds
+
+
+def get_chunks(video_id: str, chunk_ids: List[int]) -> List[Dict[str, Any]]:
+    """
+    Text and timestamps of transcript chunks, by the chunk_id used in compact answers.
+
+    Args:
+        video_id: ID of a processed video
+        chunk_ids: Chunk indexes; unknown ones are skipped
+
+    Returns:
+        List[Dict]: chunk_id, text, start and end per chunk, in the requested order
+
+    Raises:
+        ValueError: If the video has not been processed
+    """
+    lookup = get_chunk_lookup(get_vector_store(video_id))
+    chunks = []
+    for chunk_id in dict.fromkeys(chunk_ids):
+        doc = lookup.get(chunk_id)
+        if doc is not None:
+            chunks.append({
+                "chunk_id": chunk_id,
+                "text": doc.page_content,
+                "start": doc.metadata.get("start"),
+                "end": doc.metadata.get("end")
+            })
+    return chunks
@@ -0,0 +1,120 @@
+"""Caption noise removal and near-duplicate chunk detection before embedding"""
+import html
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from app.core.config import DEDUP_THRESHOLD, DEDUP_SHINGLE_WORDS, DEDUP_PERMUTATIONS
+
+# Non-speech annotations in auto-generated captions: [Music], [Applause], [ __ ] ...
+NOISE_TAG = re.compile(r"\[[^\]]{0,40}\]")
+MUSIC_SYMBOLS = re.compile(r"[♪♫♬♩]+")
+SPEAKER_CHANGE = re.compile(r"(^|\s)>>+\s*")
+
+_PRIME = 4294967311  # Smallest prime above 2**32, the range of crc32
+_LSH_ROWS = 4        # Signature rows per LSH band
+
+
+def clean_caption_text(text: str) -> str:
+    """Strip non-speech tags, music symbols and speaker-change markers from a caption"""
+    text = html.unescape(text)
+    text = NOISE_TAG.sub(" ", text)
+    text = MUSIC_SYMBOLS.sub(" ", text)
+    text = SPEAKER_CHANGE.sub(" ", text)
+    return " ".join(text.split())
+
+
+def clean_snippets(snippets: List[Dict]) -> List[Dict]:
+    """Cleaned copies of transcript snippets; snippets with no words left are dropped"""
+    cleaned = []
+    for snippet in snippets:
+        text = clean_caption_text(snippet["text"])
+        if re.search(r"\w", text):
+            cleaned.append({**snippet, "text": text})
+    return cleaned
+
+
+def _shingle_hashes(text: str, size: int) -> np.ndarray:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def minhash_signatures(texts: List[str], num_perm: int = DEDUP_PERMUTATIONS,
+                       shingle_words: int = DEDUP_SHINGLE_WORDS) -> np.ndarray:
+    """
+    MinHash signatures of word shingles, one row per text.
+
+    The fraction of equal positions in two rows estimates the Jaccard
+    similarity of the texts' shingle sets.
+    """
+    rng = np.random.RandomState(1)  # Fixed, so signatures are comparable across runs
+    a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for row, text in enumerate(texts):
+        hashes = _shingle_hashes(text, shingle_words)
+        # a * x + b stays below 2**64 because a, b < 2**31 and x < 2**32
+        signatures[row] = ((a[:, None] * hashes[None, :] + b[:, None]) % _PRIME).min(axis=1)
+    return signatures
+
+
+def dedupe_chunks(chunks: List[Document], threshold: float = DEDUP_THRESHOLD) -> Tuple[List[Document], int]:
+    """
+    Keep one representative per cluster of near-duplicate chunks.
+
+    Candidates come from LSH banding of MinHash signatures and join the
+    earliest representative whose estimated Jaccard similarity reaches
+    threshold. The representative gets an "occurrences" metadata entry
+    (start, end) for every chunk of its cluster, so the timestamps of
+    repeated intros or choruses are not lost. Kept chunks are renumbered
+    (chunk_index, total_chunks) so neighbours stay adjacent for
+    get_window_chunks.
+
+    Args:
+        chunks: Transcript chunks in order
+        threshold: Estimated Jaccard similarity for a duplicate (0 disables)
+
+    Returns:
+        Tuple: (chunks to embed, number of chunks merged into another)
+    """
+    if threshold <= 0 or len(chunks) < 2:
+        return chunks, 0
+
+    signatures = minhash_signatures([chunk.page_content for chunk in chunks])
+    bands = signatures.shape[1] // _LSH_ROWS
+    buckets = defaultdict(list)  # (band, band signature) -> representative positions
+    clusters: Dict[int, List[int]] = {}
+
+    for position, signature in enumerate(signatures):
+        keys = [(band, signature[band * _LSH_ROWS:(band + 1) * _LSH_ROWS].tobytes()) for band in range(bands)]
+        candidates = sorted({rep for key in keys for rep in buckets.get(key, ())})
+        match = next((rep for rep in candidates if np.mean(signatures[rep] == signature) >= threshold), None)
+        if match is not None:
+            clusters[match].append(position)
+            continue
+        clusters[position] = [position]
+        for key in keys:
+            buckets[key].append(position)
+
+    kept = []
+    for rep, members in clusters.items():
+        chunk = chunks[rep]
+        if len(members) > 1:
+            chunk.metadata["occurrences"] = [
+                {key: chunks[m].metadata[key] for key in ("start", "end") if key in chunks[m].metadata}
+                for m in members
+            ]
+        kept.append(chunk)
+
+    if len(kept) < len(chunks):
+        for index, chunk in enumerate(kept):
+            if "chunk_index" in chunk.metadata:
+                chunk.metadata["chunk_index"] = index
+                chunk.metadata["total_chunks"] = len(kept)
+    return kept, len(chunks) - len(kept)
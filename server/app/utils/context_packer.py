@@ -0,0 +1,167 @@
+"""Token-budget-aware context packing for RAG prompts"""
+import math
+import re
+from functools import lru_cache
+from typing import List, Optional
+from langchain_core.documents import Document
+from app.core.config import OLLAMA_MODEL, CHUNK_OVERLAP, CONTEXT_TOKEN_BUDGET, CHARS_PER_TOKEN
+
+# Average characters per token for common Ollama model families (English text).
+# Used when CHARS_PER_TOKEN is not configured explicitly.
+MODEL_CHARS_PER_TOKEN = {
+    "llama3": 4.2,
+    "llama": 3.7,
+    "mistral": 3.6,
+    "mixtral": 3.6,
+    "qwen": 4.0,
+    "gemma": 4.2,
+    "phi": 3.7,
+}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Shortest prefix/suffix match treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 10
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Appended to truncated text (each "." is a token of its own)
+TRUNCATION_MARKER = "..."
+
+
+@lru_cache(maxsize=16)
+def chars_per_token(model: str = OLLAMA_MODEL) -> float:
+    """Characters-per-token ratio for the given model"""
+    if CHARS_PER_TOKEN:
+        return CHARS_PER_TOKEN
+
+    name = model.lower()
+    # Longest family name first so "llama3" wins over "llama"
+    for family in sorted(MODEL_CHARS_PER_TOKEN, key=len, reverse=True):
+        if name.startswith(family):
+            return MODEL_CHARS_PER_TOKEN[family]
+    return DEFAULT_CHARS_PER_TOKEN
+
+
+def count_tokens(text: str, model: str = OLLAMA_MODEL) -> int:
+    """
+    Estimate the number of tokens the model will see for a piece of text.
+
+    Words and punctuation are counted as BPE pieces: every piece costs at
+    least one token and long words cost one token per chars_per_token
+    characters.
+    """
+    if not text:
+        return 0
+    ratio = chars_per_token(model)
+    return sum(max(1, math.ceil(len(piece) / ratio)) for piece in TOKEN_PATTERN.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = OLLAMA_MODEL) -> str:
+    """Cut text at a word boundary so it fits in max_tokens, "..." marker included"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    # The marker is part of the budget; below its cost the text is cut without it
+    marker_tokens = count_tokens(TRUNCATION_MARKER, model)
+    marker = TRUNCATION_MARKER if max_tokens > marker_tokens else ""
+    budget = max_tokens - (marker_tokens if marker else 0)
+
+    ratio = chars_per_token(model)
+    used = 0
+    end = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        used += max(1, math.ceil(len(match.group()) / ratio))
+        if used > budget:
+            break
+        end = match.end()
+    return text[:end].rstrip() + marker
+
+
+def strip_overlap(previous: str, following: str, max_overlap: int = CHUNK_OVERLAP) -> str:
+    """Remove the prefix of `following` that repeats the end of `previous`"""
+    longest = min(len(previous), len(following), max_overlap)
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(following[:size]):
+            return following[size:].lstrip()
+    return following
+
+
+def _position(doc: Document):
+    """Sort key: metadata documents first, then transcript order"""
+    index = doc.metadata.get("chunk_index")
+    return (0, 0) if index is None else (1, index)
+
+
+def build_passages(docs: List[Document], max_overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Order documents by transcript position and merge adjacent chunks into passages.
+
+    Consecutive chunks (chunk_index i and i+1) are joined into a single
+    passage with their overlapping text removed; everything else becomes
+    its own passage.
+    """
+    passages = []
+    previous = None
+    for doc in sorted(docs, key=_position):
+        index = doc.metadata.get("chunk_index")
+        prev_index = previous.metadata.get("chunk_index") if previous is not None else None
+        if index is not None and prev_index is not None and index == prev_index + 1:
+            passages[-1] += " " + strip_overlap(previous.page_content, doc.page_content, max_overlap)
+        else:
+            passages.append(doc.page_content)
+        previous = doc
+    return passages
+
+
+def pack_passages(docs: List[Document], token_budget: int = CONTEXT_TOKEN_BUDGET,
+                  max_tokens_per_doc: Optional[int] = None,
+                  model: str = OLLAMA_MODEL) -> List[str]:
+    """
+    Select documents that fit the token budget and return them as passages.
+
+    Documents are considered in the order given (retrieval relevance) and
+    de-duplicated; a document is added only if the packed context, with
+    overlap stripped and in transcript order, still fits. The first
+    document that does not fit is truncated to the remaining budget when
+    nothing else has been selected yet, so the top hit is never dropped.
+
+    Args:
+        docs: Retrieved documents, most relevant first
+        token_budget: Maximum tokens of packed context
+        max_tokens_per_doc: Optional cap applied to each document first
+        model: Model whose tokenizer is approximated
+
+    Returns:
+        List[str]: Passages in transcript order
+    """
+    selected: List[Document] = []
+    seen = set()
+
+    def packed_tokens(candidates: List[Document]) -> int:
+        return sum(count_tokens(p, model) for p in build_passages(candidates))
+
+    for doc in docs:
+        key = doc.metadata.get("chunk_index")
+        key = ("chunk", key) if key is not None else ("text", doc.page_content)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        if max_tokens_per_doc and count_tokens(doc.page_content, model) > max_tokens_per_doc:
+            doc = Document(page_content=truncate_to_tokens(doc.page_content, max_tokens_per_doc, model),
+                           metadata=doc.metadata)
+
+        if packed_tokens(selected + [doc]) <= token_budget:
+            selected.append(doc)
+        elif not selected:
+            selected.append(Document(page_content=truncate_to_tokens(doc.page_content, token_budget, model),
+                                     metadata=doc.metadata))
+
+    return build_passages(selected)
+
+
+def pack_context(docs: List[Document], token_budget: int = CONTEXT_TOKEN_BUDGET,
+                 max_tokens_per_doc: Optional[int] = None,
+                 model: str = OLLAMA_MODEL) -> str:
+    """Pack documents into a single prompt context string within the token budget"""
+    return "\n\n".join(pack_passages(docs, token_budget, max_tokens_per_doc, model))
@@ -1,14 +1,76 @@
 """RAG pipeline utilities"""
-from typing import List, Dict, Any
+import re
+import weakref
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
 from langchain_core.documents import Document
-from langchain_community.llms import Ollama
 from app.models.models import ConversationMessage
 from app.core.config import (
-    OLLAMA_BASE_URL, OLLAMA_MODEL, MAX_CONTEXT_LENGTH, 
-    MAX_CONVERSATION_MESSAGES, DEFAULT_K, MAX_K, MIN_K,
-    WEB_SEARCH_TOP_PAGES
+    MAX_CONTEXT_TOKENS, COMPRESSION_INPUT_TOKEN_BUDGET,
+    COMPRESSION_MODE, EXTRACTIVE_SENTENCE_WORDS, OLLAMA_EMBEDDING_MODEL,
+    ROUTER_MODE, ROUTER_COVERAGE_THRESHOLD, ROUTER_MIN_COVERAGE, ROUTER_INTENT_MARGIN, ROUTER_MIN_CHUNKS,
+    MAX_CONVERSATION_MESSAGES, DEFAULT_K, MAX_K, MIN_K, CHUNK_WINDOW_SIZE,
+    WEB_SEARCH_TOP_PAGES, DEADLINE_WEB_SEARCH_SECONDS, DEADLINE_WEB_PAGE_SECONDS, DEADLINE_COMPRESSION_SECONDS
 )
+from app.core.deadline import Deadline
+from app.core.ollama_pool import chat_model
 from app.utils.web_utils import search_web, fetch_webpage_content
+from app.utils.context_packer import count_tokens, truncate_to_tokens
+
+# Video-specific indicators
+VIDEO_INDICATORS = [
+    "in this video", "in the video", "speaker says", "speaker mentions",
+    "what does the speaker", "according to the video", "video explains",
+    "video discusses", "mentioned in", "talked about", "presenter says",
+    "host says", "in this episode", "in this conversation"
+]
+
+# External knowledge indicators
+EXTERNAL_INDICATORS = [
+    "is this correct", "is this true", "compare with", "real-world examples",
+    "how does this compare", "what are other", "alternative to",
+    "in general", "scientific evidence", "research shows",
+    "according to experts", "fact check", "verify", "true or false"
+]
+
+# Example questions per intent; their mean embeddings are the router's centroids
+INTENT_EXAMPLES = {
+    "video_content": [
+        "What does the speaker say about this topic?",
+        "Can you summarize what was explained in the video?",
+        "What example did the presenter give?",
+        "What did they talk about at the beginning?",
+        "How does the host describe the process?",
+        "What is the main point of this episode?",
+        "Why does he recommend this approach?",
+        "What steps were shown in the tutorial?",
+    ],
+    "external_knowledge": [
+        "Is this claim actually true?",
+        "What does scientific research say about this?",
+        "How does this compare to other approaches?",
+        "What are some real-world examples of this?",
+        "What are the alternatives to this product?",
+        "What is the latest news about this topic?",
+        "Fact check this statement for me.",
+        "What do experts generally think about this?",
+    ],
+}
+
+_intent_centroids: Dict[str, Dict[str, np.ndarray]] = {}  # Centroids keyed by embedding model
+_chunk_lookups = weakref.WeakKeyDictionary()  # Per vector store: chunk_index -> Document
+_chunk_matrices = weakref.WeakKeyDictionary()  # Per vector store: unit-length transcript chunk vectors
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors (or a single vector) to unit length"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def normalize_question(question: str) -> str:
+    """Case, punctuation and whitespace-insensitive key for a question"""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
 
 
 def classify_question(question: str) -> str:
@@ -25,37 +87,125 @@ def classify_question(question: str) -> str:
     Returns:
         str: Classification label ('video_content' or 'external_knowledge').
     """
-    # Video-specific indicators
-    video_indicators = [
-        "in this video", "in the video", "speaker says", "speaker mentions",
-        "what does the speaker", "according to the video", "video explains",
-        "video discusses", "mentioned in", "talked about", "presenter says",
-        "host says", "in this episode", "in this conversation"
-    ]
-    
-    # External knowledge indicators
-    external_indicators = [
-        "is this correct", "is this true", "compare with", "real-world examples",
-        "how does this compare", "what are other", "alternative to",
-        "in general", "scientific evidence", "research shows",
-        "according to experts", "fact check", "verify", "true or false"
-    ]
-    
     question_lower = question.lower()
     
     # Check for video-specific questions
-    for indicator in video_indicators:
+    for indicator in VIDEO_INDICATORS:
         if indicator in question_lower:
             return "video_content"
     
     # Check for external knowledge questions
-    for indicator in external_indicators:
+    for indicator in EXTERNAL_INDICATORS:
         if indicator in question_lower:
             return "external_knowledge"
     
     return "video_content"
 
 
+def get_intent_centroids(embeddings) -> Dict[str, np.ndarray]:
+    """Unit-length centroid embedding per intent, computed once per embedding model"""
+    if OLLAMA_EMBEDDING_MODEL not in _intent_centroids:
+        labels = list(INTENT_EXAMPLES)
+        examples = [text for label in labels for text in INTENT_EXAMPLES[label]]
+        vectors = _normalize(np.asarray(embeddings.embed_documents(examples), dtype=np.float32))
+        
+        centroids = {}
+        offset = 0
+        for label in labels:
+            count = len(INTENT_EXAMPLES[label])
+            centroids[label] = _normalize(vectors[offset:offset + count].mean(axis=0))
+            offset += count
+        _intent_centroids[OLLAMA_EMBEDDING_MODEL] = centroids
+    
+    return _intent_centroids[OLLAMA_EMBEDDING_MODEL]
+
+
+def get_chunk_matrix(vector_store) -> np.ndarray:
+    """Unit-length vectors of a FAISS vector store's transcript chunks (cached per store)"""
+    matrix = _chunk_matrices.get(vector_store)
+    if matrix is None:
+        positions = [
+            position for position, doc_id in vector_store.index_to_docstore_id.items()
+            if getattr(vector_store.docstore.search(doc_id), "metadata", {}).get("chunk_index") is not None
+        ]
+        vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+        matrix = _normalize(np.asarray(vectors[sorted(positions)], dtype=np.float32))
+        _chunk_matrices[vector_store] = matrix
+    return matrix
+
+
+def coverage_score(vector_store, question_embedding: List[float]) -> Optional[float]:
+    """
+    How well a video covers a question, relative to the video itself.
+    
+    Raw cosine similarities depend on the embedding model and on how much
+    generic vocabulary the question shares with every chunk, so the score
+    is the number of standard deviations by which the best chunk stands
+    above the question's median chunk. None when the video has fewer than
+    ROUTER_MIN_CHUNKS chunks.
+    """
+    matrix = get_chunk_matrix(vector_store)
+    if len(matrix) < ROUTER_MIN_CHUNKS:
+        return None
+    
+    scores = matrix @ _normalize(np.asarray(question_embedding, dtype=np.float32))
+    spread = float(scores.std())
+    if spread == 0:
+        return 0.0
+    return float((scores.max() - np.median(scores)) / spread)
+
+
+def route_question(question: str, question_embedding: List[float], embeddings, coverage: Optional[float],
+                   min_coverage: float = ROUTER_MIN_COVERAGE,
+                   coverage_threshold: float = ROUTER_COVERAGE_THRESHOLD) -> str:
+    """
+    Route a question to video-only retrieval or the web-augmented path.
+    
+    Reuses the question embedding: it is compared against intent centroids
+    and combined with coverage (see coverage_score), which compares the
+    question's best chunk with its typical chunk in this video. The web
+    path is taken only when the video clearly lacks coverage, i.e. coverage
+    is very low, or it is low and the question looks like it asks for
+    outside facts.
+    Falls back to keyword classification when ROUTER_MODE is "keyword",
+    coverage is unknown (very short videos) or the centroids cannot be
+    computed.
+    
+    Args:
+        question: The user query string.
+        question_embedding: Embedding of the question.
+        embeddings: Embeddings used for the video index.
+        coverage: Relative coverage of the question by the video, or None.
+        min_coverage: Coverage below which the web path is always taken.
+        coverage_threshold: Coverage below which outside-fact questions take the web path.
+        
+    Returns:
+        str: Classification label ('video_content' or 'external_knowledge').
+    """
+    if ROUTER_MODE == "keyword" or coverage is None:
+        return classify_question(question)
+    
+    # An explicit reference to the video always stays on the video path
+    question_lower = question.lower()
+    if any(indicator in question_lower for indicator in VIDEO_INDICATORS):
+        return "video_content"
+    
+    try:
+        centroids = get_intent_centroids(embeddings)
+    except Exception as e:
+        print(f"Router centroid error: {e}")
+        return classify_question(question)
+    
+    query_vector = _normalize(np.asarray(question_embedding, dtype=np.float32))
+    intent_margin = float(query_vector @ centroids["external_knowledge"] - query_vector @ centroids["video_content"])
+    
+    if coverage < min_coverage:
+        return "external_knowledge"
+    if coverage < coverage_threshold and intent_margin >= ROUTER_INTENT_MARGIN:
+        return "external_knowledge"
+    return "video_content"
+
+
 def get_optimal_k(video_length: int, question: str) -> int:
     """Dynamically determine optimal k based on video length and question complexity"""
     k = DEFAULT_K
@@ -93,27 +243,91 @@ def format_conversation_history(history: List[ConversationMessage], max_messages
     return formatted + "\n"
 
 
-def compress_context(context_chunks: List[str], question: str, max_length: int = MAX_CONTEXT_LENGTH) -> str:
-    """Compress retrieved context chunks using LLM summarization"""
+def split_sentences(text: str, max_words: int = EXTRACTIVE_SENTENCE_WORDS) -> List[str]:
+    """
+    Split text into sentences.
+    
+    Auto-generated captions often have no punctuation, so any sentence
+    longer than max_words is further split into fixed-size word windows.
+    """
+    sentences = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        words = sentence.split()
+        for i in range(0, len(words), max_words):
+            sentences.append(" ".join(words[i:i + max_words]))
+    return sentences
+
+
+def extractive_compress(context_chunks: List[str], question_embedding: List[float], embeddings,
+                        max_tokens: int = MAX_CONTEXT_TOKENS) -> str:
+    """
+    Compress context by keeping the sentences most similar to the question.
+    
+    Sentences are embedded in a single batch call and scored by cosine
+    similarity against the question embedding; the best ones are kept
+    until max_tokens and returned in their original order. No LLM call.
+    """
+    sentences = []
+    for chunk in context_chunks:
+        sentences.extend(split_sentences(chunk))
+    
+    sentence_vectors = np.asarray(embeddings.embed_documents(sentences), dtype=np.float32)
+    query_vector = np.asarray(question_embedding, dtype=np.float32)
+    
+    norms = np.linalg.norm(sentence_vectors, axis=1) * np.linalg.norm(query_vector)
+    scores = sentence_vectors @ query_vector / np.where(norms == 0, 1.0, norms)
+    
+    kept = []
+    used = 0
+    for idx in np.argsort(-scores):
+        cost = count_tokens(sentences[idx])
+        if used + cost > max_tokens:
+            continue
+        kept.append(int(idx))
+        used += cost
+    
+    return " ".join(sentences[idx] for idx in sorted(kept))
+
+
+def compress_context(context_chunks: List[str], question: str, max_tokens: int = MAX_CONTEXT_TOKENS,
+                     question_embedding: Optional[List[float]] = None, embeddings=None,
+                     priority: str = "interactive", deadline: Optional[Deadline] = None) -> str:
+    """
+    Compress retrieved context chunks to fit max_tokens.
+    
+    Uses extractive sentence selection when COMPRESSION_MODE is "extractive"
+    and the question embedding is available, otherwise LLM summarization
+    (scheduled in the given priority class). When the deadline leaves less
+    than DEADLINE_COMPRESSION_SECONDS, LLM summarization is replaced by
+    truncation.
+    """
+    deadline = deadline or Deadline()
     if not context_chunks:
         return ""
     
     combined_context = "\n\n".join(context_chunks)
-    if len(combined_context) <= max_length:
+    if count_tokens(combined_context) <= max_tokens:
         return combined_context
     
-    llm = Ollama(
-        model=OLLAMA_MODEL,
-        temperature=0.1,
-        base_url=OLLAMA_BASE_URL
-    )
+    if COMPRESSION_MODE == "extractive" and question_embedding is not None and embeddings is not None:
+        try:
+            return extractive_compress(context_chunks, question_embedding, embeddings, max_tokens)
+        except Exception as e:
+            print(f"Extractive compression error: {e}")
+            return truncate_to_tokens(combined_context, max_tokens)
+    
+    if not deadline.allows(DEADLINE_COMPRESSION_SECONDS):
+        deadline.shortcut("compression_skipped")
+        return truncate_to_tokens(combined_context, max_tokens)
+    
+    llm = chat_model(temperature=0.1, priority=priority, timeout=deadline.timeout())
     
     compression_prompt = f"""You are a context compression assistant. Your job is to summarize and condense the following context chunks while preserving all key information relevant to the question.
 
 Question: {question}
 
 Context chunks to compress:
-{combined_context[:3000]}
+{truncate_to_tokens(combined_context, COMPRESSION_INPUT_TOKEN_BUDGET)}
 
 Provide a concise but complete summary that includes:
 1. All facts and details relevant to the question
@@ -125,42 +339,78 @@ Compressed context (max 400 words):"""
     
     try:
         compressed = llm.invoke(compression_prompt)
-        if isinstance(compressed, dict):
-            compressed = compressed.get('response', '') or str(compressed)
-        compressed_text = str(compressed).strip()
+        compressed_text = str(compressed.content if hasattr(compressed, 'content') else compressed).strip()
         
-        if len(compressed_text) > max_length:
-            compressed_text = compressed_text[:max_length] + "..."
-        
-        return compressed_text
+        return truncate_to_tokens(compressed_text, max_tokens)
     except Exception as e:
         print(f"Context compression error: {e}")
-        return combined_context[:max_length] + "..."
+        return truncate_to_tokens(combined_context, max_tokens)
 
 
-def get_window_chunks(retrieved_docs: List[Document], vector_store, window_size: int = 1) -> List[Document]:
-    """Retrieve neighboring chunks for better context"""
-    all_docs = []
-    seen_indices = set()
+def search_by_vectors(vector_store, query_vectors: List[List[float]], k: int) -> List[List[Tuple[Document, float]]]:
+    """
+    Batched similarity search on a FAISS vector store.
+    
+    Runs one FAISS search for all query vectors and returns, per query, the
+    documents with their cosine similarity to the query (computed from the
+    stored vectors, so it is meaningful whatever the index metric).
+    """
+    queries = np.asarray(query_vectors, dtype=np.float32)
+    _, indices = vector_store.index.search(queries, k)
+    
+    results = []
+    for query, row in zip(_normalize(queries), indices):
+        hits = []
+        for i in row:
+            if i < 0:
+                continue
+            doc = vector_store.docstore.search(vector_store.index_to_docstore_id[int(i)])
+            stored = _normalize(vector_store.index.reconstruct(int(i)))
+            hits.append((doc, float(stored @ query)))
+        results.append(hits)
+    return results
+
+
+def get_chunk_lookup(vector_store) -> Dict[int, Document]:
+    """Transcript chunks of a FAISS vector store keyed by chunk_index (cached per store)"""
+    lookup = _chunk_lookups.get(vector_store)
+    if lookup is None:
+        lookup = {}
+        for doc_id in vector_store.index_to_docstore_id.values():
+            doc = vector_store.docstore.search(doc_id)
+            if isinstance(doc, Document) and doc.metadata.get("chunk_index") is not None:
+                lookup[doc.metadata["chunk_index"]] = doc
+        _chunk_lookups[vector_store] = lookup
+    return lookup
+
+
+def get_window_chunks(retrieved_docs: List[Document], vector_store, window_size: int = CHUNK_WINDOW_SIZE) -> List[Document]:
+    """
+    Add the neighbouring chunks of each retrieved transcript chunk.
+
+    Retrieved documents keep their relevance order and come first; the
+    neighbours (up to window_size on each side) follow, so a token budget
+    drops context before hits.
+    """
+    if window_size <= 0:
+        return retrieved_docs
+    
+    lookup = get_chunk_lookup(vector_store)
+    seen_indices = {doc.metadata.get("chunk_index") for doc in retrieved_docs} - {None}
+    neighbours = []
     
     for doc in retrieved_docs:
         chunk_index = doc.metadata.get("chunk_index")
-        total_chunks = doc.metadata.get("total_chunks")
-        
         if chunk_index is None:
-            all_docs.append(doc)
             continue
         
-        start_idx = max(0, chunk_index - window_size)
-        end_idx = min(total_chunks - 1, chunk_index + window_size)
-        
-        for idx in range(start_idx, end_idx + 1):
-            if idx not in seen_indices:
-                seen_indices.add(idx)
-                if idx == chunk_index:
-                    all_docs.append(doc)
+        for offset in range(1, window_size + 1):
+            for idx in (chunk_index - offset, chunk_index + offset):
+                if idx not in seen_indices and idx in lookup:
+                    seen_indices.add(idx)
+                    neighbours.append(lookup[idx])
     
-    return retrieved_docs
+    return retrieved_docs + neighbours
 
 
 def create_metadata_documents(metadata: Dict[str, Any], video_id: str) -> List[Document]:
@@ -204,13 +454,25 @@ def create_metadata_documents(metadata: Dict[str, Any], video_id: str) -> List[D
     return docs
 
 
-def create_web_documents(question: str, video_context: str = "") -> List[Document]:
-    """Create documents from web search results"""
+def create_web_documents(question: str, video_context: str = "", deadline: Optional[Deadline] = None) -> List[Document]:
+    """
+    Create documents from web search results.
+    
+    With a deadline, the search is skipped when less than
+    DEADLINE_WEB_SEARCH_SECONDS remain, result pages are only fetched while
+    DEADLINE_WEB_PAGE_SECONDS remain, and every request is bounded by the
+    remaining budget.
+    """
+    deadline = deadline or Deadline()
+    if not deadline.allows(DEADLINE_WEB_SEARCH_SECONDS):
+        deadline.shortcut("web_search_skipped")
+        return []
+    
     search_query = question
     if video_context:
         search_query = f"{question} {video_context[:100]}"
     
-    search_results = search_web(search_query)
+    search_results = search_web(search_query, timeout=deadline.timeout(10))
     
     docs = []
     for i, result in enumerate(search_results):
@@ -227,7 +489,10 @@ def create_web_documents(question: str, video_context: str = "") -> List[Documen
         ))
         
         if i < WEB_SEARCH_TOP_PAGES:
-            webpage_content = fetch_webpage_content(result.get("url", ""))
+            if not deadline.allows(DEADLINE_WEB_PAGE_SECONDS):
+                deadline.shortcut("web_pages_skipped")
+                continue
+            webpage_content = fetch_webpage_content(result.get("url", ""), timeout=deadline.timeout(10))
             if webpage_content:
                 docs.append(Document(
                     page_content=webpage_content,
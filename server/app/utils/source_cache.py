@@ -0,0 +1,64 @@
+"""On-disk cache of raw YouTube transcripts and metadata.
+
+Entries are JSON files under SOURCE_CACHE_DIR, keyed by video ID (and
+language for transcripts), and expire after SOURCE_CACHE_TTL_SECONDS.
+Re-ingesting a video (after its index was deleted or the chunk settings
+changed) then needs no network access.
+"""
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+from app.core.config import SOURCE_CACHE_DIR, SOURCE_CACHE_TTL_SECONDS
+
+
+def _path(kind: str, key: str) -> str:
+    # Video IDs and language codes are plain tokens; anything else is replaced
+    return os.path.join(SOURCE_CACHE_DIR, kind, re.sub(r"[^\w.-]", "_", key) + ".json")
+
+
+def _read(kind: str, key: str) -> Optional[Any]:
+    if SOURCE_CACHE_TTL_SECONDS <= 0:
+        return None
+    try:
+        with open(_path(kind, key), encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("fetched_at", 0) < time.time() - SOURCE_CACHE_TTL_SECONDS:
+        return None
+    return entry.get("data")
+
+
+def _write(kind: str, key: str, data: Any) -> None:
+    if SOURCE_CACHE_TTL_SECONDS <= 0:
+        return
+    path = _path(kind, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": time.time(), "data": data}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # The cache is an optimization; ingestion works without it
+        print(f"Source cache write error: {e}")
+
+
+def get_cached_transcript(video_id: str, language: str) -> Optional[List[Dict]]:
+    """Cached transcript snippets (text, start, duration) or None"""
+    return _read("transcripts", f"{video_id}.{language}")
+
+
+def cache_transcript(video_id: str, language: str, snippets: List[Dict]) -> None:
+    _write("transcripts", f"{video_id}.{language}", snippets)
+
+
+def get_cached_metadata(video_id: str) -> Optional[Dict[str, Any]]:
+    """Cached video metadata or None"""
+    return _read("metadata", video_id)
+
+
+def cache_metadata(video_id: str, metadata: Dict[str, Any]) -> None:
+    _write("metadata", video_id, metadata)
@@ -0,0 +1,122 @@
+"""Transcript-native chunking along caption snippet boundaries"""
+import bisect
+import re
+from typing import Dict, List
+from langchain_core.documents import Document
+from app.core.config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_MIN_CHARS, CHUNK_PAUSE_SECONDS
+
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*$")
+
+
+def _is_boundary(snippet: Dict, next_snippet: Dict, pause_seconds: float) -> bool:
+    """A sentence ends with this snippet or the speaker pauses before the next one"""
+    if SENTENCE_END.search(snippet["text"].strip()):
+        return True
+    gap = next_snippet["start"] - (snippet["start"] + snippet.get("duration", 0.0))
+    return gap >= pause_seconds
+
+
+def chunk_transcript(snippets: List[Dict], video_id: str, max_chars: int = CHUNK_SIZE,
+                     min_chars: int = CHUNK_MIN_CHARS,
+                     pause_seconds: float = CHUNK_PAUSE_SECONDS) -> List[Document]:
+    """
+    Group caption snippets into chunks that end at sentence or pause boundaries.
+
+    A chunk is closed at the first boundary after it reaches min_chars, or
+    before a snippet that would take it past max_chars. Chunks do not
+    overlap (neighbouring chunks are added at query time instead), and each
+    carries the exact start and end time of its snippets.
+
+    Args:
+        snippets: Transcript snippets with text, start and duration (seconds)
+        video_id: Video the transcript belongs to
+        max_chars: Upper bound on chunk length (a single longer snippet is kept whole)
+        min_chars: Length from which a chunk may end at a boundary
+        pause_seconds: Silence between snippets treated as a boundary
+
+    Returns:
+        List[Document]: Transcript chunks in order
+    """
+    groups: List[List[Dict]] = []
+    current: List[Dict] = []
+    length = 0
+
+    for i, snippet in enumerate(snippets):
+        text = snippet["text"].strip()
+        if not text:
+            continue
+        if current and length + 1 + len(text) > max_chars:
+            groups.append(current)
+            current, length = [], 0
+
+        current.append(snippet)
+        length += len(text) + (1 if length else 0)
+
+        next_snippet = snippets[i + 1] if i + 1 < len(snippets) else None
+        if next_snippet is not None and length >= min_chars and _is_boundary(snippet, next_snippet, pause_seconds):
+            groups.append(current)
+            current, length = [], 0
+
+    if current:
+        groups.append(current)
+
+    chunks = []
+    for idx, group in enumerate(groups):
+        last = group[-1]
+        chunks.append(Document(
+            page_content=" ".join(s["text"].strip() for s in group),
+            metadata={
+                "video_id": video_id,
+                "type": "transcript",
+                "source": "youtube_transcript",
+                "chunk_index": idx,
+                "total_chunks": len(groups),
+                "start": round(group[0]["start"], 2),
+                "end": round(last["start"] + last.get("duration", 0.0), 2)
+            }
+        ))
+    return chunks
+
+
+def chunk_recursive(snippets: List[Dict], video_id: str, chunk_size: int = CHUNK_SIZE,
+                    chunk_overlap: int = CHUNK_OVERLAP) -> List[Document]:
+    """
+    Split the joined transcript with RecursiveCharacterTextSplitter (CHUNKER="recursive").
+
+    Chunks may cut through snippets and overlap; their start and end times are
+    those of the snippets holding their first and last characters.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    offsets = []  # Character offset of each snippet in the joined transcript
+    position = 0
+    for snippet in snippets:
+        offsets.append(position)
+        position += len(snippet["text"]) + 1
+    transcript = " ".join(snippet["text"] for snippet in snippets)
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ". ", " ", ""],
+        add_start_index=True
+    )
+    chunks = splitter.create_documents([transcript])
+
+    def snippet_at(offset: int) -> Dict:
+        return snippets[max(0, bisect.bisect_right(offsets, offset) - 1)]
+
+    for idx, chunk in enumerate(chunks):
+        start_index = chunk.metadata.pop("start_index")
+        first = snippet_at(start_index)
+        last = snippet_at(start_index + len(chunk.page_content) - 1)
+        chunk.metadata.update({
+            "video_id": video_id,
+            "type": "transcript",
+            "source": "youtube_transcript",
+            "chunk_index": idx,
+            "total_chunks": len(chunks),
+            "start": round(first["start"], 2),
+            "end": round(last["start"] + last.get("duration", 0.0), 2)
+        })
+    return chunks
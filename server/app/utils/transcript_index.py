@@ -0,0 +1,124 @@
+"""Positional inverted index over a transcript for exact phrase and prefix search"""
+import bisect
+import re
+import sys
+from array import array
+from typing import Dict, List
+from app.utils.caption_cleaner import clean_caption_text
+
+TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; queries and transcripts are tokenized the same way"""
+    return TOKEN.findall(clean_caption_text(text).lower())
+
+
+class TranscriptIndex:
+    """
+    Word positions across the whole transcript, so phrases match across snippet boundaries.
+
+    Every token gets a global position; postings map a term to its positions
+    and a parallel array maps each position back to its snippet, whose start
+    time is the match timestamp.
+    """
+
+    def __init__(self, snippets: List[Dict]):
+        self.snippets = snippets
+        self.vocab: Dict[str, int] = {}
+        self.tokens = array("I")          # Term ID at each position
+        self.token_snippet = array("I")   # Snippet index at each position
+        postings: Dict[int, array] = {}
+
+        for snippet_index, snippet in enumerate(snippets):
+            for term in tokenize(snippet["text"]):
+                term_id = self.vocab.setdefault(term, len(self.vocab))
+                postings.setdefault(term_id, array("I")).append(len(self.tokens))
+                self.tokens.append(term_id)
+                self.token_snippet.append(snippet_index)
+
+        self.postings = postings
+        self.terms = sorted(self.vocab)  # For prefix lookups
+        self.term_names = list(self.vocab)  # Term ID -> term (IDs follow insertion order)
+
+    def nbytes(self) -> int:
+        """Memory held by the index itself (the snippets belong to the transcript)"""
+        arrays = [self.tokens, self.token_snippet, *self.postings.values()]
+        size = sum(sys.getsizeof(a) for a in arrays)
+        size += sum(sys.getsizeof(term) for term in self.terms)
+        for container in (self.vocab, self.postings, self.terms, self.term_names):
+            size += sys.getsizeof(container)
+        return size
+
+    def _prefix_ids(self, prefix: str) -> List[int]:
+        ids = []
+        for i in range(bisect.bisect_left(self.terms, prefix), len(self.terms)):
+            if not self.terms[i].startswith(prefix):
+                break
+            ids.append(self.vocab[self.terms[i]])
+        return ids
+
+    def search(self, query: str, prefix: bool = False, limit: int = 50) -> Dict:
+        """
+        Find every occurrence of the query's words as a consecutive phrase.
+
+        Args:
+            query: Words to find, in order (case and punctuation are ignored)
+            prefix: Match the last word as a prefix ("gradient desc")
+            limit: Maximum matches returned (total counts all of them)
+
+        Returns:
+            Dict: total and matches in transcript order, each with start_ms,
+                end_ms, the matched snippet text and the first snippet's index
+        """
+        words = tokenize(query)
+        if not words:
+            return {"total": 0, "matches": []}
+
+        exact = words[:-1] if prefix else words
+        if any(word not in self.vocab for word in exact):
+            return {"total": 0, "matches": []}
+        term_ids = [self.vocab[word] for word in exact]
+        last_ids = set(self._prefix_ids(words[-1])) if prefix else None
+        if prefix and not last_ids:
+            return {"total": 0, "matches": []}
+
+        # Walk the rarest exact term's postings and check the rest of the phrase around it
+        if term_ids:
+            anchor = min(range(len(term_ids)), key=lambda i: len(self.postings[term_ids[i]]))
+            candidates = (p - anchor for p in self.postings[term_ids[anchor]])
+        else:
+            candidates = sorted(p for term_id in last_ids for p in self.postings[term_id])
+
+        length = len(words)
+        starts = []
+        for start in candidates:
+            if start < 0 or start + length > len(self.tokens):
+                continue
+            if any(self.tokens[start + i] != term_id for i, term_id in enumerate(term_ids)):
+                continue
+            if last_ids is not None and self.tokens[start + length - 1] not in last_ids:
+                continue
+            starts.append(start)
+
+        matches = []
+        for start in starts[:limit]:
+            first = self.token_snippet[start]
+            last = self.token_snippet[start + length - 1]
+            end_snippet = self.snippets[last]
+            matches.append({
+                "start_ms": int(round(self.snippets[first]["start"] * 1000)),
+                "end_ms": int(round((end_snippet["start"] + end_snippet.get("duration", 0.0)) * 1000)),
+                "text": " ".join(clean_caption_text(self.snippets[i]["text"]) for i in range(first, last + 1)),
+                "snippet_index": first
+            })
+        return {"total": len(starts), "matches": matches}
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """Transcript words starting with prefix, most frequent first"""
+        words = tokenize(prefix)
+        if not words:
+            return []
+        ids = self._prefix_ids(words[-1])
+        ranked = sorted(ids, key=lambda term_id: -len(self.postings[term_id]))[:limit]
+        return [{"term": self.term_names[term_id], "count": len(self.postings[term_id])} for term_id in ranked]
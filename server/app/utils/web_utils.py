@@ -1,24 +1,24 @@
 """Web search and scraping utilities"""
-import requests
-from bs4 import BeautifulSoup
 from typing import List, Dict
-from duckduckgo_search import DDGS
 from app.core.config import WEB_SEARCH_RESULTS, MAX_WEBPAGE_CONTENT
 
 
-def search_web(query: str, num_results: int = WEB_SEARCH_RESULTS) -> List[Dict[str, str]]:
+def search_web(query: str, num_results: int = WEB_SEARCH_RESULTS, timeout: float = 10) -> List[Dict[str, str]]:
     """
     Perform a web search using DuckDuckGo.
     
     Args:
         query: Search query string.
         num_results: Max number of results to return.
+        timeout: Seconds allowed for the search request.
     
     Returns:
         List[Dict]: List of search results with title, body, and URL.
     """
     try:
-        ddgs = DDGS()
+        from duckduckgo_search import DDGS
+        
+        ddgs = DDGS(timeout=max(1, int(timeout)))
         results = []
         
         search_results = ddgs.text(query, max_results=num_results)
@@ -36,15 +36,19 @@ def search_web(query: str, num_results: int = WEB_SEARCH_RESULTS) -> List[Dict[s
         return []
 
 
-def fetch_webpage_content(url: str) -> str:
+def fetch_webpage_content(url: str, timeout: float = 10) -> str:
     """Fetch and extract text content from a webpage"""
     try:
+        import requests
+        
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
-        response = requests.get(url, headers=headers, timeout=10)
+        response = requests.get(url, headers=headers, timeout=timeout)
         
         if response.status_code == 200:
+            from bs4 import BeautifulSoup
+            
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # Remove script and style elements
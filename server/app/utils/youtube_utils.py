@@ -1,6 +1,5 @@
 """YouTube video utilities"""
 import re
-import requests
 from typing import Dict, Any
 from app.core.config import YOUTUBE_API_KEY
 
@@ -75,6 +74,8 @@ def fetch_youtube_metadata(video_id: str) -> Dict[str, Any]:
     
     # Fallback: scrape basic info from YouTube page
     try:
+        import requests
+        
         url = f"https://www.youtube.com/watch?v={video_id}"
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -1,4 +1,9 @@
 if __name__ == "__main__":
     import uvicorn
-    # Run the app from app.main
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8001, reload=True)
+    from app.core.config import WORKERS, STORAGE_BACKEND
+
+    if WORKERS > 1 and STORAGE_BACKEND == "memory":
+        print("Warning: in-memory storage is per process; set STORAGE_BACKEND=sqlite to share videos across workers")
+
+    # Run the app from app.main (auto-reload only works with a single worker)
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8001, reload=WORKERS == 1, workers=WORKERS)
@@ -0,0 +1,270 @@
+"""Concurrent mixed-workload load test for the YT-AI-QA backend.
+
+Starts stub Ollama servers and one backend per configuration, then drives a
+mix of interactive askers (/questions/ask) and summary users
+(/summaries/generate) for a fixed duration. Reports throughput and
+p50/p95/p99 latency per endpoint and writes a comparison table across
+configurations.
+
+Usage (from server/):
+    python scripts/load_test.py --duration 60 --ask-users 50 --summary-users 2
+    python scripts/load_test.py --config baseline: --config four_workers:workers=4
+    python scripts/load_test.py --config tuned:workers=2,SOME_ENV_VAR=value
+    python scripts/load_test.py --stub-backends 3 --stub-parallel 1   # Ollama pool over 3 stubs
+
+A configuration is "name:key=value,...". The "workers" key sets the number of
+uvicorn worker processes; every other key is passed to the backend as an
+environment variable, so any setting read from app/core/config.py can be
+compared. Multi-worker configurations default to STORAGE_BACKEND=sqlite
+(in a fresh temporary STORAGE_DIR) so all workers serve the seeded video.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import requests
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUESTIONS = [
+    "What is attention?",
+    "How does gradient descent work according to the video?",
+    "What does the speaker say about retrieval augmented generation?",
+    "Why do embeddings place similar meanings close together?",
+    "How does FAISS find nearest neighbours?",
+    "What is the downside of quantization?",
+    "Is this true that the context window limits the input?",
+    "How should a model be evaluated in general?",
+    "Summarize what the video says about vector indexes",
+    "What happens in part 3?",
+]
+
+DEFAULT_CONFIGS = ["baseline:", "four_workers:workers=4"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def parse_config(spec: str) -> Dict:
+    """Parse "name:key=value,key=value" into a configuration dict"""
+    name, _, rest = spec.partition(":")
+    config = {"name": name or "config", "workers": 1, "env": {}}
+    for item in filter(None, rest.split(",")):
+        key, _, value = item.partition("=")
+        if key == "workers":
+            config["workers"] = int(value)
+        else:
+            config["env"][key] = value
+    return config
+
+
+def wait_for(url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Thread-safe latency/status collector keyed by endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+
+    def record(self, endpoint: str, latency: float, status: int):
+        with self.lock:
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            if 200 <= status < 300:
+                self.samples.setdefault(endpoint, []).append(latency)
+            else:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, Dict]:
+        report = {}
+        for endpoint in sorted(set(self.samples) | set(self.errors)):
+            values = sorted(self.samples.get(endpoint, []))
+            report[endpoint] = {
+                "ok": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "statuses": self.statuses.get(endpoint, {}),
+                "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": (values[-1] * 1000) if values else 0.0,
+            }
+        return report
+
+
+def user_loop(base_url: str, endpoint: str, video_id: str, stop: threading.Event,
+              recorder: Recorder, seed: int, request_timeout: float):
+    """One simulated user issuing requests back-to-back until stopped"""
+    rng = random.Random(seed)
+    session = requests.Session()
+    while not stop.is_set():
+        if endpoint == "/questions/ask":
+            payload = {"question": rng.choice(QUESTIONS), "video_id": video_id}
+        else:
+            payload = {"video_id": video_id}
+
+        started = time.perf_counter()
+        try:
+            status = session.post(base_url + endpoint, json=payload, timeout=request_timeout).status_code
+        except requests.RequestException:
+            status = 599
+        recorder.record(endpoint, time.perf_counter() - started, status)
+
+
+def run_config(config: Dict, args, ollama_url: str) -> Dict:
+    """Start a backend for one configuration and drive the mixed workload"""
+    port = free_port()
+    env = dict(os.environ)
+    env["OLLAMA_BASE_URL"] = ollama_url.split(",")[0]
+    env["OLLAMA_BASE_URLS"] = ollama_url
+    env.pop("OLLAMA_EMBEDDING_BASE_URLS", None)
+    env.update(config["env"])
+    env["YOUTUBE_API_KEY"] = ""
+    if config["workers"] > 1:
+        env.setdefault("STORAGE_BACKEND", "sqlite")
+    env.setdefault("STORAGE_DIR", tempfile.mkdtemp(prefix=f"loadtest-{config['name']}-"))
+
+    cmd = [sys.executable, "-m", "uvicorn", "scripts.load_test_server:app",
+           "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(config["workers"]), "--log-level", "warning"]
+    server = subprocess.Popen(cmd, cwd=SERVER_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        wait_for(base_url + "/health", timeout=args.startup_timeout)
+        video_id = requests.get(base_url + "/videos/list", timeout=10).json()["videos"][0]["video_id"]
+
+        recorder = Recorder()
+        stop = threading.Event()
+        threads = []
+        for i in range(args.ask_users):
+            threads.append(threading.Thread(
+                target=user_loop,
+                args=(base_url, "/questions/ask", video_id, stop, recorder, i, args.request_timeout)))
+        for i in range(args.summary_users):
+            threads.append(threading.Thread(
+                target=user_loop,
+                args=(base_url, "/summaries/generate", video_id, stop, recorder, 10_000 + i, args.request_timeout)))
+
+        print(f"[{config['name']}] {args.ask_users} ask users + {args.summary_users} summary users "
+              f"for {args.duration}s ({config['workers']} worker(s))")
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {"name": config["name"], "workers": config["workers"], "env": config["env"],
+                "elapsed_s": elapsed, "endpoints": recorder.report(elapsed)}
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def comparison_table(results: List[Dict]) -> str:
+    """Markdown table comparing every configuration and endpoint"""
+    lines = [
+        "| Config | Workers | Settings | Endpoint | OK | Errors | Throughput (req/s) | p50 (ms) | p95 (ms) | p99 (ms) |",
+        "|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for result in results:
+        settings = ", ".join(f"{k}={v}" for k, v in result["env"].items()) or "-"
+        for endpoint, stats in result["endpoints"].items():
+            lines.append(
+                f"| {result['name']} | {result['workers']} | {settings} | {endpoint} | {stats['ok']} | "
+                f"{stats['errors']} | {stats['throughput_rps']:.2f} | {stats['p50_ms']:.0f} | "
+                f"{stats['p95_ms']:.0f} | {stats['p99_ms']:.0f} |"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed-workload load test for YT-AI-QA")
+    parser.add_argument("--config", action="append", help='Configuration "name:key=value,..." (repeatable)')
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load per configuration")
+    parser.add_argument("--ask-users", type=int, default=50)
+    parser.add_argument("--summary-users", type=int, default=2)
+    parser.add_argument("--request-timeout", type=float, default=300.0)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--ollama-url", help="Use existing Ollama (or stub) servers, comma-separated, "
+                                             "instead of starting stubs")
+    parser.add_argument("--stub-backends", type=int, default=1, help="Stub Ollama servers to load-balance over")
+    parser.add_argument("--stub-token-ms", type=float, default=15.0)
+    parser.add_argument("--stub-parallel", type=int, default=4)
+    parser.add_argument("--output", default="load_test_results.md", help="Markdown comparison table")
+    parser.add_argument("--json-output", default="load_test_results.json")
+    args = parser.parse_args()
+
+    configs = [parse_config(spec) for spec in (args.config or DEFAULT_CONFIGS)]
+
+    stubs = []
+    ollama_url = args.ollama_url
+    if not ollama_url:
+        urls = []
+        for _ in range(args.stub_backends):
+            stub_port = free_port()
+            stubs.append(subprocess.Popen([
+                sys.executable, os.path.join(SERVER_DIR, "scripts", "stub_ollama.py"),
+                "--port", str(stub_port), "--token-ms", str(args.stub_token_ms),
+                "--parallel", str(args.stub_parallel)
+            ]))
+            urls.append(f"http://127.0.0.1:{stub_port}")
+            wait_for(urls[-1] + "/api/tags", timeout=30)
+        ollama_url = ",".join(urls)
+
+    try:
+        results = [run_config(config, args, ollama_url) for config in configs]
+    finally:
+        for stub in stubs:
+            stub.terminate()
+
+    table = comparison_table(results)
+    print("\n" + table)
+    with open(args.output, "w") as f:
+        f.write(f"# Load test results\n\n{args.ask_users} ask users, {args.summary_users} summary users, "
+                f"{args.duration:.0f}s per configuration\n\n{table}")
+    with open(args.json_output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.output} and {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""App entry point for load tests.
+
+Wraps app.main:app and seeds a synthetic video at startup so the server can be
+exercised without reaching YouTube. Web search and page fetches return canned
+results, so questions routed to the web path never leave the machine. Point
+OLLAMA_BASE_URL at scripts/stub_ollama.py to keep the LLM side offline as well.
+
+    uvicorn scripts.load_test_server:app --port 8101
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+# Never mix the synthetic transcript into the real source cache
+os.environ.setdefault("SOURCE_CACHE_TTL_SECONDS", "0")
+
+# Make the "app" package importable when launched from server/ or server/scripts/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.core.warmup import wait_for_warmup
+from app.services import video_service
+from app.utils import rag_utils, web_utils
+
+SYNTHETIC_VIDEO_ID = "loadtest001"
+SYNTHETIC_MINUTES = int(os.getenv("LOADTEST_VIDEO_MINUTES", "30"))
+
+TOPICS = [
+    "transformers use attention to weigh every token against every other token",
+    "gradient descent updates the weights a little bit in the direction that reduces the loss",
+    "retrieval augmented generation grounds the answer in documents fetched at query time",
+    "embeddings map text into vectors so that similar meaning lands close together",
+    "a vector index such as FAISS finds the nearest neighbours of a query quickly",
+    "quantization shrinks the model so it fits on a smaller GPU with little quality loss",
+    "the context window limits how much text the model can read at once",
+    "evaluation needs a held out set of questions with known answers",
+]
+
+
+def synthetic_snippets(minutes: int = SYNTHETIC_MINUTES):
+    """Deterministic caption snippets, roughly one every four seconds"""
+    snippets = []
+    t = 0.0
+    i = 0
+    while t < minutes * 60:
+        topic = TOPICS[(i // 12) % len(TOPICS)]
+        snippets.append(SimpleNamespace(
+            text=f"so in part {i // 12} we see that {topic}",
+            start=round(t, 2),
+            duration=3.8
+        ))
+        t += 4.0
+        i += 1
+    return snippets
+
+
+class SyntheticTranscriptApi:
+    """Drop-in for YouTubeTranscriptApi that serves the synthetic transcript"""
+
+    def fetch(self, video_id, languages=None):
+        return SimpleNamespace(snippets=synthetic_snippets())
+
+
+def synthetic_metadata(video_id: str):
+    return {
+        "title": "Load Test Lecture: Building Local RAG Systems",
+        "description": "A synthetic lecture used to load test the YT-AI-QA backend.",
+        "channel_name": "Load Test Channel",
+        "publish_date": "2024-01-01",
+        "tags": ["rag", "llm", "faiss"],
+        "category": "27",
+        "view_count": 1000,
+        "like_count": 100
+    }
+
+
+def synthetic_search_results(query: str, num_results: int = 5, timeout: float = 10):
+    """Stands in for the DuckDuckGo search: results derived from the query, no network"""
+    return [
+        {
+            "title": f"Result {rank} for {query[:60]}",
+            "body": f"A canned search result about {query[:120]} used by the load test. {TOPICS[rank % len(TOPICS)]}.",
+            "url": f"https://example.invalid/search/{rank}"
+        }
+        for rank in range(1, num_results + 1)
+    ]
+
+
+def synthetic_webpage(url: str, timeout: float = 10) -> str:
+    """Stands in for fetching and scraping a result page"""
+    return " ".join(f"Canned page text from {url}: {topic}." for topic in TOPICS)
+
+
+# chat_service reaches these through rag_utils, which imported them by name
+for module in (web_utils, rag_utils):
+    module.search_web = synthetic_search_results
+    module.fetch_webpage_content = synthetic_webpage
+
+
+@app.on_event("startup")
+def seed_synthetic_video():
+    # Startup hooks run before requests, so the request middleware cannot hold this back
+    wait_for_warmup()
+    # video_service imports the transcript API on first use, so patch it at the source
+    import youtube_transcript_api
+    youtube_transcript_api.YouTubeTranscriptApi = SyntheticTranscriptApi
+    video_service.fetch_youtube_metadata = synthetic_metadata
+    result = video_service.process_video(f"https://www.youtube.com/watch?v={SYNTHETIC_VIDEO_ID}")
+    print(f"Seeded synthetic video {SYNTHETIC_VIDEO_ID}: {result['chunks_created']} chunks")
@@ -0,0 +1,326 @@
+"""Offline retrieval evaluation for chunking and k tuning.
+
+Loads fixtures of (transcript, question, gold timestamp), builds the index
+each chunker configuration would produce at ingestion (the documents come
+from video_service.build_documents, the function process_video uses:
+caption cleaning, chunking, near-duplicate merging, metadata documents;
+then FAISS) and retrieves
+for every question at every k. Embeddings come from the same deterministic
+feature-hashing embedder as the stub Ollama server, so runs are repeatable
+and need no model.
+
+A question counts as found when a chunk's [start, end] span (or one of its
+merged duplicates' spans) contains a gold timestamp, within --tolerance
+seconds. Reported per configuration:
+- recall@k: found among the k retrieved chunks
+- context recall: found among the chunks sent to the LLM (retrieved plus
+  CHUNK_WINDOW_SIZE neighbours)
+- MRR: mean reciprocal rank of the first retrieved hit
+- context tokens: mean tokens of the context passages (before packing or
+  compression), i.e. the prompt cost of the setting
+- retrieval latency: p50/p95 of query embedding plus FAISS search
+
+k "auto" uses get_optimal_k, the heuristic the app uses.
+
+--routing calibrates the question router instead: with the snippet chunker
+at the first --chunk-size (the fixture video is short, so the default 300
+gives it enough chunks for coverage_score) it scores every question's coverage (coverage_score) and reports,
+for a grid of ROUTER_MIN_COVERAGE / ROUTER_COVERAGE_THRESHOLD values, the
+share of on-topic questions kept on the video path and of off-topic
+questions ("off_topic_questions" in the fixtures) sent to the web path.
+
+Usage (from server/):
+    python scripts/retrieval_eval.py
+    python scripts/retrieval_eval.py --chunk-size 300,600,900 --k 1,2,3,4,6,auto
+    python scripts/retrieval_eval.py --chunker recursive --chunk-overlap 0,100 --window 0
+    python scripts/retrieval_eval.py --fixtures my_videos.json --tolerance 2
+    python scripts/retrieval_eval.py --routing
+
+Fixture format (see scripts/fixtures/retrieval_eval.json):
+    {"videos": [{"video_id": ..., "metadata": {"title": ..., "description": ...},
+                 "transcript": [{"text": ..., "start": 12.3, "duration": 2.1}, ...],
+                 "questions": [{"question": ..., "gold": [12.3]}, ...],
+                 "off_topic_questions": [...]}]}
+
+Results are printed and written to retrieval_eval_results.md/.json.
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from load_test import SERVER_DIR
+from stub_ollama import hash_embed, EMBEDDING_DIM
+
+sys.path.insert(0, SERVER_DIR)
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+from app.core.config import (  # noqa: E402
+    CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_MIN_CHARS, CHUNK_WINDOW_SIZE,
+    CAPTION_CLEANING, DEDUP_THRESHOLD, ROUTER_MIN_COVERAGE, ROUTER_COVERAGE_THRESHOLD
+)
+from app.utils.caption_cleaner import clean_snippets  # noqa: E402
+from app.utils.context_packer import build_passages, count_tokens  # noqa: E402
+from app.utils.rag_utils import (  # noqa: E402
+    get_optimal_k, get_window_chunks, search_by_vectors, coverage_score, route_question
+)
+from app.services.video_service import build_documents  # noqa: E402
+
+DEFAULT_FIXTURES = os.path.join(SERVER_DIR, "scripts", "fixtures", "retrieval_eval.json")
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic local embedder (the stub Ollama server's feature hashing)"""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [hash_embed(text, self.dim) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return hash_embed(text, self.dim)
+
+
+def build_index(video: Dict, chunker: str, chunk_size: int, chunk_overlap: int,
+                embeddings: Embeddings, dedup_threshold: float) -> Dict:
+    """Index one fixture video with build_documents, as process_video would with these chunker settings"""
+    from langchain_community.vectorstores import FAISS
+
+    video_id = video["video_id"]
+    min_chars = round(chunk_size * CHUNK_MIN_CHARS / CHUNK_SIZE)  # Same proportion as the defaults
+    chunks, metadata_docs, duplicates = build_documents(
+        video["transcript"], video.get("metadata", {}), video_id, chunker=chunker, chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap, min_chars=min_chars, dedup_threshold=dedup_threshold
+    )
+    documents = chunks + metadata_docs
+    snippets = clean_snippets(video["transcript"]) if CAPTION_CLEANING else video["transcript"]
+
+    started = time.perf_counter()
+    vector_store = FAISS.from_documents(documents, embeddings)
+    return {
+        "vector_store": vector_store,
+        "transcript_length": len(" ".join(snippet["text"] for snippet in snippets)),
+        "chunks": len(chunks),
+        "duplicates": duplicates,
+        "index_ms": 1000 * (time.perf_counter() - started)
+    }
+
+
+def is_hit(doc: Document, gold: List[float], tolerance: float) -> bool:
+    """A transcript chunk (or one of its merged duplicates) spans a gold timestamp"""
+    spans = doc.metadata.get("occurrences") or [doc.metadata]
+    return any(
+        "start" in span and span["start"] - tolerance <= t <= span["end"] + tolerance
+        for span in spans for t in gold
+    )
+
+
+def evaluate(index: Dict, questions: List[Dict], k_setting: str, window: int,
+             embeddings: Embeddings, tolerance: float) -> List[Dict]:
+    """Retrieve for every question and score the result against its gold timestamps"""
+    vector_store = index["vector_store"]
+    outcomes = []
+    for item in questions:
+        question = item["question"]
+        k = get_optimal_k(index["transcript_length"], question) if k_setting == "auto" else int(k_setting)
+
+        started = time.perf_counter()
+        query_vector = embeddings.embed_query(question)
+        retrieved = [doc for doc, _ in search_by_vectors(vector_store, [query_vector], k)[0]]
+        latency_ms = 1000 * (time.perf_counter() - started)
+
+        context_docs = get_window_chunks(retrieved, vector_store, window_size=window)
+        rank = next((i + 1 for i, doc in enumerate(retrieved) if is_hit(doc, item["gold"], tolerance)), None)
+        outcomes.append({
+            "question": question,
+            "k": k,
+            "hit": rank is not None,
+            "context_hit": any(is_hit(doc, item["gold"], tolerance) for doc in context_docs),
+            "reciprocal_rank": 1.0 / rank if rank else 0.0,
+            "context_tokens": count_tokens("\n\n".join(build_passages(context_docs))),
+            "latency_ms": latency_ms
+        })
+    return outcomes
+
+
+def evaluate_routing(videos: List[Dict], chunk_size: int, embeddings: Embeddings, dedup_threshold: float,
+                     min_coverages: List[float], thresholds: List[float]) -> List[Dict]:
+    """Route every on-topic and off-topic question under each pair of coverage cutoffs"""
+    scored = []  # (on_topic, question, embedding, coverage, vector store)
+    for video in videos:
+        index = build_index(video, "snippet", chunk_size, 0, embeddings, dedup_threshold)
+        asks = [(True, item["question"]) for item in video["questions"]]
+        asks += [(False, question) for question in video.get("off_topic_questions", [])]
+        for on_topic, question in asks:
+            vector = embeddings.embed_query(question)
+            scored.append((on_topic, question, vector, coverage_score(index["vector_store"], vector)))
+
+    for on_topic, question, _, coverage in scored:
+        label = "on " if on_topic else "off"
+        print(f"  {label} coverage {'n/a' if coverage is None else f'{coverage:5.2f}'}  {question}")
+
+    results = []
+    for min_coverage, threshold in itertools.product(min_coverages, thresholds):
+        if threshold < min_coverage:
+            continue
+        routes = [
+            (on_topic, route_question(question, vector, embeddings, coverage, min_coverage, threshold))
+            for on_topic, question, vector, coverage in scored
+        ]
+        on = [route for on_topic, route in routes if on_topic]
+        off = [route for on_topic, route in routes if not on_topic]
+        results.append({
+            "min_coverage": min_coverage,
+            "coverage_threshold": threshold,
+            "on_topic": len(on),
+            "off_topic": len(off),
+            "on_topic_video": on.count("video_content") / len(on) if on else 0.0,
+            "off_topic_web": off.count("external_knowledge") / len(off) if off else 0.0
+        })
+    return results
+
+
+def routing_table(results: List[Dict]) -> str:
+    """Markdown table of routing accuracy per pair of coverage cutoffs"""
+    lines = [
+        "| Min coverage | Coverage threshold | On-topic kept on video | Off-topic sent to web |",
+        "|---|---|---|---|",
+    ]
+    for r in results:
+        lines.append(
+            f"| {r['min_coverage']:g} | {r['coverage_threshold']:g} | "
+            f"{r['on_topic_video']:.2f} ({r['on_topic']}) | {r['off_topic_web']:.2f} ({r['off_topic']}) |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(setting: Dict, indexes: List[Dict], outcomes: List[Dict]) -> Dict:
+    latencies = [o["latency_ms"] for o in outcomes]
+    return {
+        **setting,
+        "chunks": sum(index["chunks"] for index in indexes),
+        "duplicates": sum(index["duplicates"] for index in indexes),
+        "questions": len(outcomes),
+        "mean_k": statistics.mean(o["k"] for o in outcomes),
+        "recall": statistics.mean(o["hit"] for o in outcomes),
+        "context_recall": statistics.mean(o["context_hit"] for o in outcomes),
+        "mrr": statistics.mean(o["reciprocal_rank"] for o in outcomes),
+        "context_tokens": statistics.mean(o["context_tokens"] for o in outcomes),
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "index_ms": sum(index["index_ms"] for index in indexes),
+        "misses": [o["question"] for o in outcomes if not o["context_hit"]]
+    }
+
+
+def comparison_table(results: List[Dict]) -> str:
+    """Markdown table comparing every chunker, window and k setting"""
+    lines = [
+        "| Chunker | Size | Overlap | Window | k | Mean k | Chunks | Recall@k | Context recall | MRR | "
+        "Context tokens | p50 (ms) | p95 (ms) |",
+        "|---|---|---|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for r in results:
+        lines.append(
+            f"| {r['chunker']} | {r['chunk_size']} | {r['chunk_overlap']} | {r['window']} | {r['k']} | "
+            f"{r['mean_k']:.1f} | {r['chunks']} | {r['recall']:.2f} | {r['context_recall']:.2f} | {r['mrr']:.2f} | "
+            f"{r['context_tokens']:.0f} | {r['p50_ms']:.2f} | {r['p95_ms']:.2f} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def parse_list(value: str, cast=int) -> List:
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def load_fixtures(paths: List[str]) -> List[Dict]:
+    videos = []
+    for path in paths:
+        with open(path) as f:
+            videos.extend(json.load(f)["videos"])
+    return videos
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline retrieval evaluation for chunking and k tuning")
+    parser.add_argument("--fixtures", action="append", help=f"Fixture JSON file (repeatable, default {DEFAULT_FIXTURES})")
+    parser.add_argument("--chunker", default="snippet,recursive", help="Chunkers to compare (snippet, recursive)")
+    parser.add_argument("--chunk-size", default=f"300,{CHUNK_SIZE},1000", help="Maximum chunk sizes in characters")
+    parser.add_argument("--chunk-overlap", default=f"0,{CHUNK_OVERLAP}", help="Overlaps for the recursive chunker")
+    parser.add_argument("--k", default="1,2,3,4,6,auto", help='Chunks retrieved per question ("auto": get_optimal_k)')
+    parser.add_argument("--window", default=str(CHUNK_WINDOW_SIZE), help="Neighbouring chunks added on each side")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Seconds of slack around chunk spans")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD)
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM, help="Hash embedding dimension")
+    parser.add_argument("--routing", action="store_true", help="Calibrate the question router instead")
+    parser.add_argument("--min-coverage", default=f"0,0.25,{ROUTER_MIN_COVERAGE:g},1",
+                        help="ROUTER_MIN_COVERAGE values for --routing")
+    parser.add_argument("--coverage-threshold", default=f"1,{ROUTER_COVERAGE_THRESHOLD:g},2,3",
+                        help="ROUTER_COVERAGE_THRESHOLD values for --routing")
+    parser.add_argument("--output", default="retrieval_eval_results.md", help="Markdown comparison table")
+    parser.add_argument("--json-output", default="retrieval_eval_results.json")
+    args = parser.parse_args(argv)
+
+    videos = load_fixtures(args.fixtures or [DEFAULT_FIXTURES])
+    embeddings = HashEmbeddings(args.dim)
+    k_settings = args.k.split(",")
+    windows = parse_list(args.window)
+    questions = sum(len(video["questions"]) for video in videos)
+    print(f"{len(videos)} videos, {questions} questions")
+
+    if args.routing:
+        results = evaluate_routing(videos, parse_list(args.chunk_size)[0], embeddings, args.dedup_threshold,
+                                   parse_list(args.min_coverage, float), parse_list(args.coverage_threshold, float))
+        table = routing_table(results)
+        print("\n" + table)
+        with open(args.output, "w") as f:
+            f.write(f"# Routing calibration\n\n{len(videos)} videos, hash embeddings (dim {args.dim})\n\n{table}")
+        with open(args.json_output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output} and {args.json_output}")
+        return
+
+    results = []
+    for chunker, chunk_size in itertools.product(args.chunker.split(","), parse_list(args.chunk_size)):
+        overlaps = parse_list(args.chunk_overlap) if chunker == "recursive" else [0]
+        for chunk_overlap in overlaps:
+            if chunk_overlap >= chunk_size:
+                continue
+            indexes = [build_index(video, chunker, chunk_size, chunk_overlap, embeddings, args.dedup_threshold)
+                       for video in videos]
+            for window, k_setting in itertools.product(windows, k_settings):
+                outcomes = []
+                for video, index in zip(videos, indexes):
+                    outcomes.extend(evaluate(index, video["questions"], k_setting, window, embeddings, args.tolerance))
+                setting = {"chunker": chunker, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap,
+                           "window": window, "k": k_setting}
+                results.append(summarize(setting, indexes, outcomes))
+                r = results[-1]
+                print(f"{chunker} size={chunk_size} overlap={chunk_overlap} window={window} k={k_setting}: "
+                      f"recall@k {r['recall']:.2f}, context recall {r['context_recall']:.2f}, "
+                      f"{r['context_tokens']:.0f} tokens")
+
+    table = comparison_table(results)
+    print("\n" + table)
+    with open(args.output, "w") as f:
+        f.write(f"# Retrieval evaluation\n\n{len(videos)} videos, {questions} questions, "
+                f"hash embeddings (dim {args.dim}), tolerance {args.tolerance:g}s\n\n{table}")
+    with open(args.json_output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.output} and {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()
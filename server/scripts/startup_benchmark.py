@@ -0,0 +1,165 @@
+"""Cold-start benchmark for the YT-AI-QA backend.
+
+Measures, over several runs:
+- how long `import app.main` takes, with the slowest top-level imports
+  (parsed from `python -X importtime`),
+- how long a fresh uvicorn process takes to answer /health,
+- how long the background warm-up of heavy dependencies takes
+  (from /health/startup).
+
+Usage (from server/):
+    python scripts/startup_benchmark.py --runs 5
+    python scripts/startup_benchmark.py --max-import-ms 1000   # exit 1 on regression
+
+Results are printed and written to startup_benchmark_results.md/.json.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import requests
+
+from load_test import SERVER_DIR, free_port
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(env: Dict[str, str]) -> Dict:
+    """Import app.main in a fresh interpreter and return total and per-module cumulative times (ms)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    total = 0.0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000.0
+        depth = (len(match.group(3)) - 1) // 2
+        name = match.group(4)
+        if name == "app.main":
+            total = cumulative_ms
+        elif depth <= 1:
+            # Direct imports of app.main and top-level packages imported from elsewhere
+            modules[name] = modules.get(name, 0.0) + cumulative_ms
+    return {"total_ms": total, "modules_ms": modules}
+
+
+def measure_server(env: Dict[str, str], timeout: float) -> Dict:
+    """Start uvicorn and time the first /health answer and the end of the warm-up"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        health_ms = None
+        report = {}
+        while time.perf_counter() - started < timeout:
+            try:
+                if health_ms is None:
+                    if requests.get(base_url + "/health", timeout=1).status_code == 200:
+                        health_ms = 1000 * (time.perf_counter() - started)
+                else:
+                    report = requests.get(base_url + "/health/startup", timeout=1).json()
+                    if report.get("warmup_finished") or not report.get("warmup_started"):
+                        break
+            except requests.RequestException:
+                pass
+            time.sleep(0.02)
+        if health_ms is None:
+            raise RuntimeError("Server did not answer /health in time")
+        return {
+            "health_ms": health_ms,
+            "app_import_ms": report.get("app_import_ms"),
+            "warmup_ms": report.get("warmup_ms"),
+            "warmup_errors": report.get("errors", {})
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def median(values: List[float]) -> float:
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Max seconds per server start")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median app.main import exceeds this")
+    parser.add_argument("--output", default="startup_benchmark_results.md")
+    parser.add_argument("--json-output", default="startup_benchmark_results.json")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # No Ollama is needed: nothing at startup talks to it
+    env.setdefault("OLLAMA_BASE_URL", "http://127.0.0.1:9")
+
+    imports, servers = [], []
+    for run in range(args.runs):
+        imports.append(measure_import(env))
+        servers.append(measure_server(env, args.timeout))
+        print(f"Run {run + 1}/{args.runs}: import {imports[-1]['total_ms']:.0f} ms, "
+              f"/health {servers[-1]['health_ms']:.0f} ms, warm-up {servers[-1]['warmup_ms'] or 0:.0f} ms")
+
+    module_samples = defaultdict(list)
+    for sample in imports:
+        for name, ms in sample["modules_ms"].items():
+            module_samples[name].append(ms)
+    slowest = sorted(((median(v), k) for k, v in module_samples.items()), reverse=True)[:args.top]
+
+    summary = {
+        "runs": args.runs,
+        "import_ms": median([s["total_ms"] for s in imports]),
+        "health_ms": median([s["health_ms"] for s in servers]),
+        "warmup_ms": median([s["warmup_ms"] for s in servers]),
+        "slowest_imports_ms": {name: round(ms, 1) for ms, name in slowest},
+        "warmup_errors": servers[-1]["warmup_errors"]
+    }
+
+    lines = [
+        "# Startup benchmark",
+        "",
+        f"Median of {args.runs} runs.",
+        "",
+        "| Metric | ms |",
+        "|---|---|",
+        f"| import app.main | {summary['import_ms']:.0f} |",
+        f"| process start to first /health | {summary['health_ms']:.0f} |",
+        f"| background warm-up | {summary['warmup_ms']:.0f} |",
+        "",
+        "| Slowest imports (cumulative) | ms |",
+        "|---|---|",
+    ] + [f"| {name} | {ms:.0f} |" for ms, name in slowest]
+    table = "\n".join(lines)
+    print("\n" + table)
+
+    with open(args.output, "w") as f:
+        f.write(table + "\n")
+    with open(args.json_output, "w") as f:
+        json.dump({"summary": summary, "imports": imports, "servers": servers}, f, indent=2)
+    print(f"\nWrote {args.output} and {args.json_output}")
+
+    if args.max_import_ms is not None and summary["import_ms"] > args.max_import_ms:
+        print(f"FAIL: import app.main took {summary['import_ms']:.0f} ms (limit {args.max_import_ms:.0f} ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
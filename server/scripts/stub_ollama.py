@@ -0,0 +1,226 @@
+"""Stub Ollama server for load tests and offline benchmarks.
+
+Implements the subset of the Ollama HTTP API used by the app
+(/api/chat, /api/generate, /api/embed, /api/embeddings, /api/tags) with
+deterministic output and configurable latency, so the backend can be driven
+without a GPU.
+
+Usage:
+    python scripts/stub_ollama.py --port 11500 --token-ms 15 --parallel 1
+"""
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+EMBEDDING_DIM = 256
+
+CANNED_RESPONSE = (
+    "MAIN: The speaker explains the core idea of this part of the video.\n"
+    "BULLET: A first supporting detail from the segment.\n"
+    "BULLET: A second supporting detail from the segment.\n"
+    "BULLET: A third supporting detail from the segment.\n"
+)
+
+
+def hash_embed(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Deterministic bag-of-words embedding using signed feature hashing"""
+    vector = [0.0] * dim
+    for token in re.findall(r"\w+", text.lower()):
+        digest = hashlib.md5(token.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        return vector
+    return [v / norm for v in vector]
+
+
+class StubState:
+    """Latency model shared by all request handler threads"""
+
+    def __init__(self, token_ms: float, prefill_ms_per_1k: float, tokens: int,
+                 embed_ms: float, parallel: int):
+        self.token_ms = token_ms
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self.tokens = tokens
+        self.embed_ms = embed_ms
+        # Mirrors OLLAMA_NUM_PARALLEL: requests beyond this wait for a slot
+        self.slots = threading.Semaphore(parallel)
+        self.lock = threading.Lock()
+        self.requests_served = 0
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: StubState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, payload: dict):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path in ("/", ""):
+            body = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path.startswith("/api/tags"):
+            self._send_json({"models": [{"name": "stub", "model": "stub"}]})
+        elif self.path.startswith("/api/version"):
+            self._send_json({"version": "0.0.0-stub"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        payload = self._read_json()
+        path = self.path.rstrip("/")
+
+        with self.state.lock:
+            self.state.requests_served += 1
+
+        if path == "/api/chat":
+            prompt = " ".join(str(m.get("content", "")) for m in payload.get("messages", []))
+            self._generate(payload, prompt, chat=True)
+        elif path == "/api/generate":
+            self._generate(payload, str(payload.get("prompt", "")), chat=False)
+        elif path == "/api/embed":
+            inputs = payload.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            time.sleep(self.state.embed_ms * len(inputs) / 1000.0)
+            self._send_json({
+                "model": payload.get("model", "stub"),
+                "embeddings": [hash_embed(text) for text in inputs]
+            })
+        elif path == "/api/embeddings":
+            time.sleep(self.state.embed_ms / 1000.0)
+            self._send_json({"embedding": hash_embed(str(payload.get("prompt", "")))})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _generate(self, payload: dict, prompt: str, chat: bool):
+        """Simulate prefill + token-by-token decode behind the parallel slots"""
+        options = payload.get("options") or {}
+        num_tokens = self.state.tokens
+        if options.get("num_predict") and options["num_predict"] > 0:
+            num_tokens = min(num_tokens, int(options["num_predict"]))
+
+        words = CANNED_RESPONSE.split(" ")
+        tokens = [(" " if i else "") + words[i % len(words)] for i in range(num_tokens)]
+        model = payload.get("model", "stub")
+        stream = payload.get("stream", True)
+
+        with self.state.slots:
+            time.sleep(len(prompt) / 1000.0 * self.state.prefill_ms_per_1k / 1000.0)
+
+            if not stream:
+                time.sleep(num_tokens * self.state.token_ms / 1000.0)
+                text = "".join(tokens)
+                if chat:
+                    self._send_json({"model": model, "created_at": _now(),
+                                     "message": {"role": "assistant", "content": text},
+                                     "done": True, "done_reason": "stop",
+                                     "prompt_eval_count": len(prompt) // 4, "eval_count": num_tokens})
+                else:
+                    self._send_json({"model": model, "created_at": _now(), "response": text,
+                                     "done": True, "done_reason": "stop", "context": [],
+                                     "prompt_eval_count": len(prompt) // 4, "eval_count": num_tokens})
+                return
+
+            self._start_stream()
+            for token in tokens:
+                time.sleep(self.state.token_ms / 1000.0)
+                if chat:
+                    self._write_chunk({"model": model, "created_at": _now(),
+                                       "message": {"role": "assistant", "content": token}, "done": False})
+                else:
+                    self._write_chunk({"model": model, "created_at": _now(), "response": token, "done": False})
+
+            final = {"model": model, "created_at": _now(), "done": True, "done_reason": "stop",
+                     "prompt_eval_count": len(prompt) // 4, "eval_count": num_tokens}
+            if chat:
+                final["message"] = {"role": "assistant", "content": ""}
+            else:
+                final["response"] = ""
+                final["context"] = []
+            self._write_chunk(final)
+            self._end_stream()
+
+
+def serve(host: str = "127.0.0.1", port: int = 11500, token_ms: float = 15.0,
+          prefill_ms_per_1k: float = 20.0, tokens: int = 60, embed_ms: float = 2.0,
+          parallel: int = 1) -> ThreadingHTTPServer:
+    """Create (but do not start) a stub Ollama HTTP server"""
+    handler = type("BoundStubOllamaHandler", (StubOllamaHandler,), {
+        "state": StubState(token_ms, prefill_ms_per_1k, tokens, embed_ms, parallel)
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--token-ms", type=float, default=15.0, help="Decode latency per generated token")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=20.0, help="Prefill latency per 1000 prompt chars")
+    parser.add_argument("--tokens", type=int, default=60, help="Tokens generated per response")
+    parser.add_argument("--embed-ms", type=float, default=2.0, help="Latency per embedded text")
+    parser.add_argument("--parallel", type=int, default=1, help="Concurrent generations (like OLLAMA_NUM_PARALLEL)")
+    args = parser.parse_args()
+
+    httpd = serve(args.host, args.port, args.token_ms, args.prefill_ms_per_1k,
+                  args.tokens, args.embed_ms, args.parallel)
+    print(f"Stub Ollama listening on http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,28 @@
+import os
+import sys
+
+# Tests import the app package the same way main.py does (from the server directory)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def transcript_doc(index: int, text: str = None, video_id: str = "video1") -> Document:
+    """A transcript chunk as ingestion stores it (ten seconds per chunk)"""
+    return Document(
+        page_content=text or f"Sentence number {index} of the transcript.",
+        metadata={"video_id": video_id, "type": "transcript", "chunk_index": index,
+                  "start": index * 10.0, "end": index * 10.0 + 10.0}
+    )
+
+
+@pytest.fixture
+def make_store():
+    """Build a real FAISS vector store over documents with deterministic fake embeddings"""
+    from langchain_community.vectorstores import FAISS
+
+    def build(docs):
+        return FAISS.from_documents(docs, DeterministicFakeEmbedding(size=16))
+    return build
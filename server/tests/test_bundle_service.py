@@ -0,0 +1,63 @@
+import asyncio
+import io
+import json
+
+import numpy as np
+import pytest
+
+from app.controllers.video_controller import delete_video
+from app.core.storage import vector_stores, video_info, video_transcripts
+from app.services import bundle_service
+from conftest import transcript_doc
+
+
+@pytest.fixture
+def bundle(make_store):
+    """An exported bundle of a small video, which is then removed from storage"""
+    vector_stores["video1"] = make_store([transcript_doc(i) for i in range(3)])
+    video_info["video1"] = {"title": "Test video"}
+    video_transcripts["video1"] = [{"text": "hello", "start": 0.0, "duration": 1.0}]
+    data = bundle_service.export_video("video1")
+    for store in (vector_stores, video_info, video_transcripts):
+        store.pop("video1", None)
+    return data
+
+
+def rewrite(data: bytes, **changes) -> bytes:
+    """The bundle with some of its arrays replaced"""
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        contents = {name: arrays[name] for name in arrays.files}
+    contents.update(changes)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **contents)
+    return buffer.getvalue()
+
+
+def manifest_without(data: bytes, key: str) -> np.ndarray:
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        manifest = json.loads(arrays["manifest"].tobytes().decode("utf-8"))
+    del manifest[key]
+    return np.frombuffer(json.dumps(manifest).encode("utf-8"), dtype=np.uint8)
+
+
+def test_bundle_round_trip(bundle):
+    result = bundle_service.import_bundle(bundle)
+    try:
+        assert result == {"video_id": "video1", "title": "Test video", "chunks": 3, "status": "imported"}
+        assert vector_stores["video1"].index.ntotal == 3
+    finally:
+        asyncio.run(delete_video("video1"))
+
+
+def test_missing_manifest_key_is_a_value_error(bundle):
+    with pytest.raises(ValueError, match="missing: docstore"):
+        bundle_service.import_bundle(rewrite(bundle, manifest=manifest_without(bundle, "docstore")))
+    assert "video1" not in video_info
+
+
+def test_corrupt_index_is_a_value_error(bundle):
+    garbage = np.frombuffer(b"not a faiss index" * 4, dtype=np.uint8)
+
+    with pytest.raises(ValueError, match="Corrupt video bundle"):
+        bundle_service.import_bundle(rewrite(bundle, index=garbage))
+    assert "video1" not in vector_stores and "video1" not in video_info
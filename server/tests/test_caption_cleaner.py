@@ -0,0 +1,61 @@
+from langchain_core.documents import Document
+
+from app.utils.caption_cleaner import clean_caption_text, clean_snippets, dedupe_chunks, minhash_signatures
+from app.utils.rag_utils import get_window_chunks
+from conftest import transcript_doc
+
+
+def test_clean_caption_text_strips_noise():
+    assert clean_caption_text("[Music] ♪ la la ♪ >> so today &amp; tomorrow") == "la la so today & tomorrow"
+    assert clean_caption_text("  plain   text ") == "plain text"
+
+
+def test_clean_snippets_drops_snippets_without_words():
+    snippets = [{"text": "[Applause]", "start": 0.0}, {"text": ">> hello", "start": 1.0, "duration": 1.0}]
+    assert clean_snippets(snippets) == [{"text": "hello", "start": 1.0, "duration": 1.0}]
+    assert snippets[1]["text"] == ">> hello"  # The stored transcript stays verbatim
+
+
+def test_minhash_estimates_similarity():
+    text = " ".join(f"word{i}" for i in range(60))
+    other = " ".join(f"other{i}" for i in range(60))
+    signatures = minhash_signatures([text, text, other])
+    assert (signatures[0] == signatures[1]).all()
+    assert (signatures[0] == signatures[2]).mean() < 0.2
+
+
+def test_dedupe_chunks_merges_repeats_and_keeps_their_timestamps():
+    chorus = " ".join(f"chorus{i}" for i in range(40))
+    chunks = [transcript_doc(0, chorus), transcript_doc(1, "a verse about something else entirely here"),
+              transcript_doc(2, chorus), transcript_doc(3, "the closing words of the song")]
+
+    kept, merged = dedupe_chunks(chunks, threshold=0.8)
+
+    assert merged == 1
+    assert [doc.page_content for doc in kept] == [chorus, chunks[1].page_content, chunks[3].page_content]
+    assert kept[0].metadata["occurrences"] == [{"start": 0.0, "end": 10.0}, {"start": 20.0, "end": 30.0}]
+    assert "occurrences" not in kept[1].metadata
+    # Renumbered so neighbours stay adjacent; timestamps are kept
+    assert [doc.metadata["chunk_index"] for doc in kept] == [0, 1, 2]
+    assert all(doc.metadata["total_chunks"] == 3 for doc in kept)
+    assert kept[2].metadata["start"] == 30.0
+
+
+def test_window_expands_across_a_removed_duplicate(make_store):
+    chorus = " ".join(f"chorus{i}" for i in range(40))
+    chunks = [transcript_doc(0, chorus), transcript_doc(1, "the verse before the repeat"),
+              transcript_doc(2, chorus), transcript_doc(3, "the verse after the repeat")]
+    kept, _ = dedupe_chunks(chunks, threshold=0.8)
+    store = make_store(kept)
+
+    windowed = get_window_chunks([kept[1]], store, window_size=1)
+
+    assert [doc.page_content for doc in windowed] == [
+        "the verse before the repeat", chorus, "the verse after the repeat"
+    ]
+
+
+def test_dedupe_disabled_or_trivial():
+    chunks = [transcript_doc(0, "same text"), transcript_doc(1, "same text")]
+    assert dedupe_chunks(chunks, threshold=0) == (chunks, 0)
+    assert dedupe_chunks(chunks[:1]) == (chunks[:1], 0)
@@ -0,0 +1,44 @@
+import pytest
+from fastapi import BackgroundTasks
+
+from app.controllers import chat_controller
+from app.core.config import REQUEST_DEADLINE_SECONDS
+from app.core.storage import video_info
+from app.models.models import QuestionRequest
+from app.services import memory_service
+
+
+@pytest.fixture
+def deadlines(monkeypatch):
+    """Deadlines /ask passes to answer_question"""
+    seen = []
+
+    def fake_answer(question, video_id, deadline, **kwargs):
+        seen.append(deadline)
+        return {"question": question, "answer": "answer", "sources": [], "video_id": video_id}
+
+    video_info["video1"] = {"title": "Test video"}
+    monkeypatch.setattr(chat_controller, "answer_question", fake_answer)
+    yield seen
+    video_info.pop("video1", None)
+    for session_id in memory_service.get_video_sessions("video1"):
+        memory_service.delete_session(session_id)
+
+
+def ask(timeout):
+    request = QuestionRequest(question="What is it about?", video_id="video1")
+    return chat_controller.ask_question_endpoint(request, BackgroundTasks(), x_request_timeout=timeout)
+
+
+def test_request_timeout_header_sets_the_budget(deadlines):
+    ask(5)
+    assert 0 < deadlines[0].remaining() <= 5
+
+
+@pytest.mark.parametrize("timeout", [None, 0, -3])
+def test_missing_or_non_positive_timeout_uses_the_default(deadlines, timeout):
+    response = ask(timeout)
+
+    assert response.answer == "answer"
+    assert not deadlines[0].expired
+    assert REQUEST_DEADLINE_SECONDS - 1 < deadlines[0].remaining() <= REQUEST_DEADLINE_SECONDS
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from app.core.deadline import Deadline
+from app.core.storage import vector_stores, video_info
+from app.services import chat_service
+from conftest import transcript_doc
+
+
+@pytest.fixture
+def indexed_video(make_store):
+    docs = [transcript_doc(i) for i in range(10)]
+    vector_stores["video1"] = make_store(docs)
+    video_info["video1"] = {"title": "Test video", "transcript_length": 1000}
+    yield docs
+    vector_stores.pop("video1", None)
+    video_info.pop("video1", None)
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    """Prompts the answer LLM receives"""
+    seen = []
+
+    def fake_chat_model(**kwargs):
+        return RunnableLambda(lambda prompt: seen.append(prompt.to_string()) or "answer")
+
+    monkeypatch.setattr(chat_service, "chat_model", fake_chat_model)
+    return seen
+
+
+def test_pipeline_uses_given_context(indexed_video, prompts):
+    chain, _ = chat_service.create_rag_pipeline("video1", context_text="Prepared context.")
+
+    assert chain.invoke("What is said?") == "answer"
+    assert "Context: Prepared context." in prompts[0]
+    assert "Sentence number" not in prompts[0]
+
+
+def test_answer_from_retrieval_windows_hits_once(indexed_video, prompts):
+    docs = indexed_video
+    store = vector_stores["video1"]
+    question = "What does the video say about it?"
+    embedding = store.embeddings.embed_query(question)
+
+    result = chat_service.answer_from_retrieval(question, "video1", embedding, [(docs[5], 0.9)],
+                                                store.embeddings)
+
+    assert [source["chunk_id"] for source in result["sources"]] == [5, 4, 6]
+    assert "Sentence number 4 " in prompts[0] and "Sentence number 6 " in prompts[0]
+    assert "Sentence number 3 " not in prompts[0] and "Sentence number 7 " not in prompts[0]
+
+
+def test_answer_prompt_uses_compressed_context(indexed_video, prompts, monkeypatch):
+    docs = indexed_video
+    store = vector_stores["video1"]
+    question = "What does the video say about it?"
+    embedding = store.embeddings.embed_query(question)
+    monkeypatch.setattr(chat_service, "compress_context", lambda *args, **kwargs: "Compressed context.")
+
+    result = chat_service.answer_from_retrieval(question, "video1", embedding,
+                                                [(docs[2], 0.9), (docs[6], 0.8)], store.embeddings)
+
+    assert result["context"] == ["Compressed context."]
+    assert "Context: Compressed context." in prompts[0]
+    assert "Sentence number" not in prompts[0]
+
+
+def test_expired_deadline_answers_without_the_llm(indexed_video, prompts):
+    docs = indexed_video
+    store = vector_stores["video1"]
+    question = "What does the video say about it?"
+    embedding = store.embeddings.embed_query(question)
+    deadline = Deadline(0.001)
+    time.sleep(0.01)
+
+    result = chat_service.answer_from_retrieval(question, "video1", embedding, [(docs[5], 0.9)],
+                                                store.embeddings, deadline=deadline)
+
+    assert prompts == []
+    assert "Sentence number 5 " in result["answer"]
+    assert "answer_extractive" in result["shortcuts"]
@@ -0,0 +1,89 @@
+from langchain_core.documents import Document
+
+from app.utils.context_packer import (
+    build_passages, count_tokens, pack_context, pack_passages, strip_overlap, truncate_to_tokens
+)
+from conftest import transcript_doc
+
+
+def test_count_and_truncate_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("hello, world") == count_tokens("hello") + count_tokens(",") + count_tokens("world")
+    assert count_tokens(",") == 1
+
+    text = " ".join(f"word{i}" for i in range(100))
+    truncated = truncate_to_tokens(text, 20)
+    assert truncated.endswith("...") and text.startswith(truncated[:-3])
+    assert truncate_to_tokens("short text", 20) == "short text"
+
+
+def test_truncation_marker_fits_in_the_budget():
+    text = " ".join(f"w{i}" for i in range(200))
+    for budget in range(1, 40):
+        assert count_tokens(truncate_to_tokens(text, budget)) <= budget
+    assert not truncate_to_tokens(text, 2).endswith("...")  # No room for the marker
+
+
+def test_packed_context_stays_within_the_budget():
+    docs = [transcript_doc(i, " ".join(f"c{i}w{j}" for j in range(80))) for i in (3, 8, 1)]
+    for budget in (5, 30, 100, 250):
+        assert count_tokens(pack_context(docs, token_budget=budget)) <= budget
+
+
+def test_strip_overlap_removes_repeated_prefix():
+    previous = "the quick brown fox jumps over the lazy dog"
+    assert strip_overlap(previous, "over the lazy dog and runs away") == "and runs away"
+    # Shorter than MIN_OVERLAP_CHARS: treated as coincidence
+    assert strip_overlap("ends with dog", "dog park") == "dog park"
+
+
+def test_build_passages_orders_and_merges_adjacent_chunks():
+    title = Document(page_content="Video Title: Test", metadata={"type": "metadata"})
+    docs = [
+        transcript_doc(5, "five is here and the overlap text"),
+        transcript_doc(4, "four comes first then the overlap text"),
+        transcript_doc(1, "one stands alone"),
+        title,
+    ]
+    docs[0].page_content = "the overlap text and five follows"
+
+    assert build_passages(docs) == [
+        "Video Title: Test",
+        "one stands alone",
+        "four comes first then the overlap text and five follows",
+    ]
+
+
+def test_pack_passages_keeps_relevance_order_within_budget():
+    docs = [transcript_doc(i, " ".join(f"chunk{i}word{j}" for j in range(30))) for i in (7, 2, 9)]
+
+    chunk_tokens = count_tokens(docs[0].page_content)
+    passages = pack_passages(docs, token_budget=2 * chunk_tokens + 5)
+
+    # The two most relevant chunks fit, in transcript order; the third is dropped
+    assert passages == [docs[1].page_content, docs[0].page_content]
+
+
+def test_pack_passages_truncates_a_top_hit_that_does_not_fit():
+    doc = transcript_doc(3, " ".join(f"word{j}" for j in range(100)))
+
+    passages = pack_passages([doc, transcript_doc(4)], token_budget=10)
+
+    assert len(passages) == 1 and passages[0].endswith("...")
+    assert passages[0].startswith("word0 word1")
+
+
+def test_pack_passages_deduplicates_chunks():
+    doc = transcript_doc(2)
+    assert pack_passages([doc, transcript_doc(2), doc], token_budget=100) == [doc.page_content]
+
+
+def test_pack_context_caps_each_document():
+    docs = [Document(page_content=" ".join(f"w{i}x{j}" for j in range(50)), metadata={"url": str(i)})
+            for i in range(2)]
+
+    context = pack_context(docs, token_budget=100, max_tokens_per_doc=10)
+
+    passages = context.split("\n\n")
+    assert len(passages) == 2
+    assert all(passage.endswith("...") and count_tokens(passage) <= 10 for passage in passages)
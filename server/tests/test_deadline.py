@@ -0,0 +1,25 @@
+import math
+
+from app.core.deadline import Deadline
+
+
+def test_unbounded_deadline():
+    deadline = Deadline()
+    assert deadline.remaining() == math.inf
+    assert not deadline.expired
+    assert deadline.allows(1e9)
+    assert Deadline(0).remaining() == math.inf
+
+
+def test_bounded_deadline():
+    deadline = Deadline(30)
+    assert 29 < deadline.remaining() <= 30
+    assert deadline.allows(10) and not deadline.allows(60)
+    assert deadline.timeout(5) == 5
+
+
+def test_shortcuts_are_recorded_once():
+    deadline = Deadline(30)
+    deadline.shortcut("answer_capped")
+    deadline.shortcut("answer_capped")
+    assert deadline.shortcuts == ["answer_capped"]
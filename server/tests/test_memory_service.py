@@ -0,0 +1,51 @@
+import pytest
+
+from app.core.storage import chat_sessions
+from app.services import memory_service
+
+
+@pytest.fixture
+def sweeps(monkeypatch):
+    """Count full session-table sweeps; the first create_session is due one"""
+    count = []
+    evict = memory_service.evict_expired_sessions
+    monkeypatch.setattr(memory_service, "evict_expired_sessions", lambda: count.append(1) or evict())
+    monkeypatch.setattr(memory_service, "_next_sweep", 0.0)
+    created = []
+    yield count, created
+    for session_id in created:
+        memory_service.delete_session(session_id)
+
+
+def test_sessions_are_swept_at_most_once_per_interval(sweeps, monkeypatch):
+    count, created = sweeps
+    created += [memory_service.create_session("video1", "prefix") for _ in range(5)]
+    assert len(count) == 1
+
+    monkeypatch.setattr(memory_service, "_next_sweep", 0.0)  # Interval elapsed
+    created.append(memory_service.create_session("video1", "prefix"))
+    assert len(count) == 2
+
+
+def test_expired_session_is_refused_before_the_sweep(sweeps):
+    _, created = sweeps
+    session_id = memory_service.create_session("video1", "prefix")
+    created.append(session_id)
+    session = chat_sessions[session_id]
+    session["last_access"] -= memory_service.SESSION_TTL_SECONDS + 1
+    chat_sessions[session_id] = session
+
+    assert memory_service.get_session(session_id) is None
+    assert session_id not in chat_sessions
+
+
+def test_sweep_evicts_expired_sessions(sweeps):
+    _, created = sweeps
+    stale, fresh = (memory_service.create_session("video1", "prefix") for _ in range(2))
+    created += [stale, fresh]
+    session = chat_sessions[stale]
+    session["last_access"] -= memory_service.SESSION_TTL_SECONDS + 1
+    chat_sessions[stale] = session
+
+    assert memory_service.evict_expired_sessions() == 1
+    assert stale not in chat_sessions and fresh in chat_sessions
@@ -0,0 +1,60 @@
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.core.scheduler import Scheduler
+from app.core.storage import vector_stores, video_info
+from app.services import prefetch_service
+from app.utils.rag_utils import normalize_question
+from conftest import transcript_doc
+
+
+@pytest.fixture
+def embed_priorities(monkeypatch, make_store):
+    vector_stores["video1"] = make_store([transcript_doc(i) for i in range(5)])
+    video_info["video1"] = {"title": "Test video"}
+    priorities = []
+
+    def fake_embedding_model(priority="interactive"):
+        priorities.append(priority)
+        return DeterministicFakeEmbedding(size=16)
+
+    monkeypatch.setattr(prefetch_service, "embedding_model", fake_embedding_model)
+    yield priorities
+    prefetch_service.drop_prefetched("video1")
+    vector_stores.pop("video1", None)
+    video_info.pop("video1", None)
+
+
+def test_prefetch_embeds_in_embed_class(embed_priorities):
+    assert prefetch_service.prefetch("video1", "what is the main topic") == "prefetched"
+    assert embed_priorities == ["embed"]
+
+    assert prefetch_service.prefetch("video1", "What is the main topic?") == "cached"
+    assert embed_priorities == ["embed"]
+
+    embedding, hits = prefetch_service.get_prefetched("video1", "what is the main topic", 2)
+    assert len(embedding) == 16 and len(hits) == 2
+
+
+def test_expired_entry_is_prefetched_again(embed_priorities):
+    prefetch_service.prefetch("video1", "first draft question")
+    prefetch_service.prefetch("video1", "second draft question")
+    # The expired entry is at the hot end of the LRU, so eviction does not reach it
+    prefetch_service._cache[("video1", normalize_question("second draft question"))]["expires"] = 0
+
+    assert prefetch_service.get_prefetched("video1", "second draft question", 2) is None
+    assert prefetch_service.prefetch("video1", "second draft question") == "prefetched"
+    assert prefetch_service.get_prefetched("video1", "second draft question", 2) is not None
+
+
+def test_full_embed_class_skips(embed_priorities, monkeypatch):
+    scheduler = Scheduler(max_concurrency=4, queue_limits={"embed": 1})
+    monkeypatch.setattr(prefetch_service, "scheduler", scheduler)
+
+    with scheduler.admit("embed"):  # An ingestion holds the only embed slot
+        assert prefetch_service.prefetch("video1", "a question nobody waits for") == "skipped"
+    assert embed_priorities == []
+    assert prefetch_service.prefetch_status()["in_flight"] == 0
+
+    assert prefetch_service.prefetch("video1", "a question nobody waits for") == "prefetched"
+    assert scheduler.metrics()["classes"]["embed"]["jobs_in_flight"] == 0
@@ -0,0 +1,138 @@
+import numpy as np
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.core.deadline import Deadline
+from app.utils import rag_utils
+from app.utils.context_packer import count_tokens
+from conftest import transcript_doc
+
+
+class FakeLLM:
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return type("Message", (), {"content": self.reply})()
+
+
+def long_chunks(count=6, words=120):
+    return [" ".join(f"chunk{i}word{j}" for j in range(words)) for i in range(count)]
+
+
+def test_compress_context_returns_short_context_unchanged():
+    chunks = ["first chunk.", "second chunk."]
+    assert rag_utils.compress_context(chunks, "question?") == "first chunk.\n\nsecond chunk."
+
+
+def test_compress_context_llm_mode(monkeypatch):
+    llm = FakeLLM("  the compressed summary  ")
+    calls = []
+
+    def fake_chat_model(**kwargs):
+        calls.append(kwargs)
+        return llm
+
+    monkeypatch.setattr(rag_utils, "COMPRESSION_MODE", "llm")
+    monkeypatch.setattr(rag_utils, "chat_model", fake_chat_model)
+
+    result = rag_utils.compress_context(long_chunks(), "What is said?", max_tokens=50,
+                                        priority="summary", deadline=Deadline(60))
+
+    assert result == "the compressed summary"
+    assert calls[0]["priority"] == "summary"
+    assert "What is said?" in llm.prompts[0]
+
+
+def test_compress_context_without_question_embedding_uses_llm(monkeypatch):
+    llm = FakeLLM("summary")
+    monkeypatch.setattr(rag_utils, "chat_model", lambda **kwargs: llm)
+
+    assert rag_utils.compress_context(long_chunks(), "q", max_tokens=50) == "summary"
+    assert len(llm.prompts) == 1
+
+
+def test_compress_context_truncates_when_llm_fails(monkeypatch):
+    class FailingLLM:
+        def invoke(self, prompt):
+            raise RuntimeError("ollama down")
+
+    monkeypatch.setattr(rag_utils, "chat_model", lambda **kwargs: FailingLLM())
+
+    result = rag_utils.compress_context(long_chunks(), "q", max_tokens=50)
+    assert result.startswith("chunk0word0 ") and result.endswith("...")
+    assert count_tokens(result) <= 50
+
+
+def test_compress_context_truncates_near_deadline(monkeypatch):
+    def unexpected_chat_model(**kwargs):
+        raise AssertionError("LLM compression must be skipped")
+
+    monkeypatch.setattr(rag_utils, "chat_model", unexpected_chat_model)
+    deadline = Deadline(1)
+
+    result = rag_utils.compress_context(long_chunks(), "q", max_tokens=50, deadline=deadline)
+    assert result.endswith("...") and count_tokens(result) <= 50
+    assert "compression_skipped" in deadline.shortcuts
+
+
+
+def test_extractive_compression_keeps_the_most_similar_sentences(monkeypatch):
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    embeddings = DeterministicFakeEmbedding(size=64)
+    question = "Where was the treasure hidden?"
+    target = "The treasure was hidden under the old oak tree."
+    filler = [f"Filler sentence number {i} talks about unrelated things at length." for i in range(30)]
+    chunks = [" ".join(filler[:15]), target + " " + " ".join(filler[15:])]
+    monkeypatch.setattr(rag_utils, "chat_model", lambda **kwargs: FakeLLM("must not be used"))
+
+    result = rag_utils.compress_context(chunks, question, max_tokens=20,
+                                        question_embedding=embeddings.embed_query(target),
+                                        embeddings=embeddings)
+
+    assert target in result
+    assert count_tokens(result) <= 20
+
+
+def outside_facts_intent(monkeypatch, question_embedding):
+    """Make the intent centroids say the question asks for outside facts"""
+    vector = rag_utils._normalize(np.asarray(question_embedding, dtype=np.float32))
+    monkeypatch.setattr(rag_utils, "get_intent_centroids",
+                        lambda embeddings: {"external_knowledge": vector, "video_content": -vector})
+
+
+def test_on_topic_question_stays_on_the_video(monkeypatch, make_store):
+    docs = [transcript_doc(i, f"Part {i} explains topic {i} with its own vocabulary {i * 7}.") for i in range(12)]
+    metadata = Document(page_content="Title: a lecture", metadata={"video_id": "video1", "type": "metadata"})
+    store = make_store(docs + [metadata])
+    question_embedding = DeterministicFakeEmbedding(size=16).embed_query(docs[3].page_content)
+    outside_facts_intent(monkeypatch, question_embedding)
+
+    coverage = rag_utils.coverage_score(store, question_embedding)
+
+    assert len(rag_utils.get_chunk_matrix(store)) == 12  # The metadata document is not a chunk
+    assert coverage >= rag_utils.ROUTER_COVERAGE_THRESHOLD
+    assert rag_utils.route_question("What does part three explain?", question_embedding,
+                                    None, coverage) == "video_content"
+
+
+def test_poorly_covered_question_takes_the_web_path(monkeypatch):
+    question_embedding = [1.0] + [0.0] * 15
+    outside_facts_intent(monkeypatch, question_embedding)
+
+    route = rag_utils.route_question("Who won the world cup in 2022?", question_embedding, None,
+                                     coverage=rag_utils.ROUTER_COVERAGE_THRESHOLD - 0.1)
+    assert route == "external_knowledge"
+
+
+def test_short_video_falls_back_to_keyword_routing(monkeypatch, make_store):
+    store = make_store([transcript_doc(i) for i in range(rag_utils.ROUTER_MIN_CHUNKS - 1)])
+    question_embedding = DeterministicFakeEmbedding(size=16).embed_query("anything")
+
+    assert rag_utils.coverage_score(store, question_embedding) is None
+    monkeypatch.setattr(rag_utils, "classify_question", lambda question: "keyword route")
+    assert rag_utils.route_question("q", question_embedding, None, None) == "keyword route"
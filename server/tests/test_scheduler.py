@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from app.core.scheduler import Scheduler, SchedulerFullError
+
+
+def test_admit_rejects_beyond_the_class_limit():
+    scheduler = Scheduler(max_concurrency=2, queue_limits={"interactive": 2})
+    first, second = scheduler.admit("interactive"), scheduler.admit("interactive")
+
+    with pytest.raises(SchedulerFullError) as excinfo:
+        scheduler.admit("interactive")
+    assert excinfo.value.priority == "interactive"
+    assert excinfo.value.retry_after >= 1
+
+    first.finish()
+    scheduler.admit("interactive").finish()
+    second.finish()
+
+    metrics = scheduler.metrics()["classes"]["interactive"]
+    assert metrics["admitted"] == 3 and metrics["rejected"] == 1 and metrics["jobs_in_flight"] == 0
+
+
+def test_zero_limit_is_unbounded_and_classes_are_independent():
+    scheduler = Scheduler(max_concurrency=1, queue_limits={"interactive": 1, "summary": 0})
+    jobs = [scheduler.admit("summary") for _ in range(50)]
+
+    with scheduler.admit("interactive"):
+        with pytest.raises(SchedulerFullError):
+            scheduler.admit("interactive")
+    scheduler.admit("interactive").finish()  # Released by the context manager
+
+    for job in jobs:
+        job.finish()
+        job.finish()  # Finishing twice releases once
+    assert scheduler.metrics()["classes"]["summary"]["jobs_in_flight"] == 0
+
+
+def test_unknown_class():
+    with pytest.raises(ValueError):
+        Scheduler().admit("urgent")
+
+
+def test_is_idle_looks_at_higher_classes_only():
+    scheduler = Scheduler(max_concurrency=1, queue_limits={})
+    job = scheduler.admit("summary")
+    assert scheduler.is_idle("background") is False
+    assert scheduler.is_idle("summary") is True
+
+    job.finish()
+    assert scheduler.is_idle("background") is True
+
+
+def test_acquire_times_out_when_no_slot_frees():
+    scheduler = Scheduler(max_concurrency=1, queue_limits={})
+    scheduler.acquire("summary")
+
+    with pytest.raises(TimeoutError):
+        scheduler.acquire("summary", timeout=0.05)
+    scheduler.release("summary")
+    scheduler.acquire("summary", timeout=0.05)
+
+
+def test_waiting_calls_are_served_by_priority():
+    scheduler = Scheduler(max_concurrency=1, queue_limits={})
+    scheduler.acquire("background")
+    served = []
+
+    def call(priority):
+        scheduler.acquire(priority, timeout=5)
+        served.append(priority)
+        scheduler.release(priority)
+
+    threads = [threading.Thread(target=call, args=(priority,)) for priority in ("background", "summary", "interactive")]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)  # Queue them in order: lowest priority first
+    scheduler.release("background")
+    for thread in threads:
+        thread.join()
+
+    assert served == ["interactive", "summary", "background"]
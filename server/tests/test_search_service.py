@@ -0,0 +1,57 @@
+import pytest
+
+from app.core.storage import video_info, video_transcripts
+from app.services import search_service
+
+SNIPPETS = [
+    {"text": "Welcome to the show", "start": 0.0, "duration": 2.0},
+    {"text": "today we talk about gradient descent", "start": 2.0, "duration": 3.0},
+    {"text": "and gradient boosting", "start": 5.0, "duration": 2.0},
+]
+
+
+@pytest.fixture
+def processed_video():
+    video_transcripts["video1"] = SNIPPETS
+    video_info["video1"] = {"title": "Test video", "url": "https://youtu.be/video1",
+                            "transcript_length": 75, "chunks_created": 0}
+    yield
+    search_service.drop_transcript_index("video1")
+    video_transcripts.pop("video1", None)
+    video_info.pop("video1", None)
+
+
+def test_phrase_and_prefix_search(processed_video):
+    result = search_service.search_transcript("video1", "Gradient descent")
+    assert result["total"] == 1
+    assert result["matches"][0]["start_ms"] == 2000
+
+    assert search_service.search_transcript("video1", "gradient boo", prefix=True)["total"] == 1
+    assert search_service.complete_transcript_terms("video1", "gra")["completions"][0]["term"] == "gradient"
+
+
+def test_building_the_vector_index_keeps_the_keyword_index(processed_video):
+    index = search_service.get_transcript_index("video1")
+
+    info = video_info["video1"]
+    info["chunks_created"] = 4  # Deferred embedding finished
+    video_info["video1"] = info
+
+    assert search_service.get_transcript_index("video1") is index
+
+
+def test_new_transcript_rebuilds_the_keyword_index(processed_video):
+    index = search_service.get_transcript_index("video1")
+
+    video_transcripts["video1"] = SNIPPETS[:2]
+    info = video_info["video1"]
+    info["transcript_length"] = 56
+    video_info["video1"] = info
+
+    assert search_service.get_transcript_index("video1") is not index
+    assert search_service.search_transcript("video1", "boosting")["total"] == 0
+
+
+def test_unknown_video():
+    with pytest.raises(ValueError):
+        search_service.search_transcript("missing", "anything")
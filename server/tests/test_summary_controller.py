@@ -0,0 +1,51 @@
+import gc
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.controllers import summary_controller
+from app.core.scheduler import Scheduler, SchedulerFullError
+from app.core.storage import video_transcripts
+
+
+@pytest.fixture
+def one_summary_slot(monkeypatch):
+    scheduler = Scheduler(max_concurrency=1, queue_limits={"summary": 1})
+    monkeypatch.setattr(summary_controller, "scheduler", scheduler)
+    video_transcripts["video1"] = [{"text": "hello", "start": 0.0, "duration": 1.0}]
+    yield scheduler
+    video_transcripts.pop("video1", None)
+
+
+def jobs_in_flight(scheduler):
+    return scheduler.metrics()["classes"]["summary"]["jobs_in_flight"]
+
+
+def test_unread_stream_releases_its_slot(one_summary_slot):
+    response = summary_controller.generate_summary_stream_endpoint({"video_id": "video1"})
+    assert jobs_in_flight(one_summary_slot) == 1
+    with pytest.raises(SchedulerFullError):
+        summary_controller.generate_summary_stream_endpoint({"video_id": "video1"})
+
+    del response  # Client went away before the body was iterated
+    gc.collect()
+
+    assert jobs_in_flight(one_summary_slot) == 0
+    summary_controller.generate_summary_stream_endpoint({"video_id": "video1"})
+
+
+def test_finished_stream_releases_its_slot_once(one_summary_slot, monkeypatch):
+    def fake_events(video_id):
+        yield "summary", {"video_id": video_id, "overall_summary": "overall", "highlights": [],
+                          "status": "success"}
+
+    monkeypatch.setattr(summary_controller, "iter_summary_events", fake_events)
+    app = FastAPI()
+    app.include_router(summary_controller.router)
+
+    with TestClient(app) as client:
+        for _ in range(2):
+            response = client.post("/summaries/generate/stream", json={"video_id": "video1"})
+            assert "event: summary" in response.text
+            assert jobs_in_flight(one_summary_slot) == 0
@@ -0,0 +1,64 @@
+import json
+import time
+
+import pytest
+
+from app.core.storage import video_transcripts, video_summaries
+from app.services import summary_service
+
+
+class SerializingStore(dict):
+    """Serializes values slowly on write, as the sqlite backend does"""
+
+    def __setitem__(self, key, value):
+        encoded = []
+        for item_key in value:  # Raises if another thread resizes the dict meanwhile
+            time.sleep(0.001)
+            encoded.append(json.dumps([item_key, value[item_key]]))
+        super().__setitem__(key, value)
+
+
+def highlight(segment):
+    return {"timestamp": str(segment["start_time"]), "main_point": segment["text"], "sub_points": []}
+
+
+@pytest.fixture
+def long_video(monkeypatch):
+    # One snippet per ten minutes: ten segments summarized in parallel
+    video_transcripts["video1"] = [{"text": f"part {i}", "start": i * 600.0, "duration": 600.0} for i in range(10)]
+    store = SerializingStore()
+    monkeypatch.setattr(summary_service, "summary_segments", store)
+    monkeypatch.setattr(summary_service, "chat_model", lambda **kwargs: None)
+    monkeypatch.setattr(summary_service, "reduce_summaries", lambda llm, parts, executor: "overall")
+    yield store
+    video_transcripts.pop("video1", None)
+    video_summaries.pop("video1", None)
+
+
+def test_parallel_segments_share_the_cache_safely(long_video, monkeypatch):
+    def slow_summary(llm, segment):
+        time.sleep(0.005)
+        return highlight(segment)
+
+    monkeypatch.setattr(summary_service, "summarize_segment", slow_summary)
+
+    result = summary_service.generate_summary("video1")
+
+    assert [h["main_point"].strip() for h in result["highlights"]] == [f"part {i}" for i in range(10)]
+    assert len(long_video["video1"]) == 10
+
+
+def test_cached_segments_are_not_summarized_again(long_video, monkeypatch):
+    calls = []
+
+    def counting_summary(llm, segment):
+        calls.append(segment["start_time"])
+        return highlight(segment)
+
+    monkeypatch.setattr(summary_service, "summarize_segment", counting_summary)
+    summary_service.generate_summary("video1")
+    video_summaries.pop("video1")
+
+    summary_service.generate_summary("video1")
+
+    assert len(calls) == 10
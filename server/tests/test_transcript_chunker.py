@@ -0,0 +1,62 @@
+from app.utils.transcript_chunker import chunk_transcript, chunk_recursive
+
+
+def snippet(text, start, duration=2.0):
+    return {"text": text, "start": start, "duration": duration}
+
+
+def test_chunks_end_at_sentence_boundaries():
+    snippets = [snippet("first part of a sentence", 0), snippet("that ends here.", 2),
+                snippet("second sentence starts", 4), snippet("and ends.", 6)]
+
+    chunks = chunk_transcript(snippets, "video1", max_chars=200, min_chars=10, pause_seconds=5)
+
+    assert [c.page_content for c in chunks] == ["first part of a sentence that ends here.",
+                                                 "second sentence starts and ends."]
+    assert [(c.metadata["start"], c.metadata["end"]) for c in chunks] == [(0, 4.0), (4, 8.0)]
+    assert [c.metadata["chunk_index"] for c in chunks] == [0, 1]
+    assert all(c.metadata["total_chunks"] == 2 for c in chunks)
+
+
+def test_pause_is_a_boundary():
+    snippets = [snippet("no punctuation here", 0), snippet("after a long pause", 20)]
+
+    chunks = chunk_transcript(snippets, "video1", max_chars=200, min_chars=5, pause_seconds=3)
+
+    assert len(chunks) == 2
+
+
+def test_min_chars_holds_chunks_open():
+    snippets = [snippet("Short.", 0), snippet("Also short.", 2), snippet("End.", 4)]
+
+    chunks = chunk_transcript(snippets, "video1", max_chars=200, min_chars=15, pause_seconds=5)
+
+    assert [c.page_content for c in chunks] == ["Short. Also short.", "End."]
+
+
+def test_max_chars_splits_and_long_snippets_stay_whole():
+    snippets = [snippet("a" * 30, 0), snippet("b" * 30, 2), snippet("c" * 80, 4), snippet("", 6)]
+
+    chunks = chunk_transcript(snippets, "video1", max_chars=50, min_chars=40, pause_seconds=5)
+
+    assert [c.page_content for c in chunks] == ["a" * 30, "b" * 30, "c" * 80]
+
+
+def test_empty_transcript():
+    assert chunk_transcript([], "video1") == []
+
+
+def test_recursive_chunks_carry_the_times_of_their_snippets():
+    snippets = [snippet(f"snippet {i} says something", 2.0 * i) for i in range(10)]
+
+    chunks = chunk_recursive(snippets, "video1", chunk_size=60, chunk_overlap=0)
+
+    assert len(chunks) > 1
+    assert chunks[0].metadata["start"] == 0
+    assert chunks[-1].metadata["end"] == 20.0
+    starts = [chunk.metadata["start"] for chunk in chunks]
+    assert starts == sorted(starts)
+    for chunk in chunks:
+        # Snippets are two seconds long and back to back
+        assert chunk.metadata["start"] % 2 == 0 and chunk.metadata["end"] % 2 == 0
+        assert chunk.metadata["start"] < chunk.metadata["end"]
@@ -0,0 +1,42 @@
+import asyncio
+
+from app.controllers.video_controller import delete_video
+from app.core.storage import (
+    vector_stores, video_info, video_transcripts, video_metadata, chat_sessions, conversation_sessions
+)
+from app.services import memory_service
+from app.services.footprint_service import memory_report
+from conftest import transcript_doc
+
+SNIPPETS = [{"text": "hello there", "start": 0.0, "duration": 2.0}]
+
+
+def footprint_ids():
+    return [entry["video_id"] for entry in memory_report()["videos"]]
+
+
+def test_memory_report_counts_videos_without_video_info():
+    video_transcripts["orphan1"] = SNIPPETS
+    try:
+        assert "orphan1" in footprint_ids()
+        assert memory_report("orphan1")["videos"][0]["bytes"]["transcript"] > 0
+    finally:
+        video_transcripts.pop("orphan1", None)
+
+
+def test_delete_video_releases_everything_held_for_it(make_store):
+    video_info["video2"] = {"title": "Test video"}
+    video_transcripts["video2"] = SNIPPETS
+    video_metadata["video2"] = {"title": "Test video"}
+    vector_stores["video2"] = make_store([transcript_doc(0, video_id="video2")])
+    session_id = memory_service.create_session("video2", "prefix")
+    other_session = memory_service.create_session("video3", "prefix")
+
+    asyncio.run(delete_video("video2"))
+
+    assert "video2" not in footprint_ids()
+    for mapping in (video_info, video_transcripts, video_metadata, vector_stores):
+        assert "video2" not in mapping
+    assert session_id not in chat_sessions and session_id not in conversation_sessions
+    assert other_session in chat_sessions
+    memory_service.delete_session(other_session)
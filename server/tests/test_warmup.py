@@ -0,0 +1,20 @@
+from fastapi.testclient import TestClient
+
+import app.main as main
+
+
+def test_requests_are_refused_while_warming(monkeypatch):
+    monkeypatch.setattr(main, "warmup_pending", lambda: True)
+    client = TestClient(main.app)
+
+    response = client.get("/videos/list", headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(main.WARMUP_RETRY_AFTER)
+    assert response.headers["access-control-allow-origin"]
+    assert client.get("/health/startup").status_code == 200
+
+
+def test_requests_pass_once_warm(monkeypatch):
+    monkeypatch.setattr(main, "warmup_pending", lambda: False)
+
+    assert TestClient(main.app).get("/videos/list").status_code == 200
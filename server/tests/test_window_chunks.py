@@ -0,0 +1,54 @@
+from langchain_core.documents import Document
+
+from app.utils.rag_utils import get_window_chunks
+from conftest import transcript_doc
+
+
+def chunk_indices(docs):
+    return [doc.metadata.get("chunk_index") for doc in docs]
+
+
+def test_hits_come_first_then_neighbours(make_store):
+    docs = [transcript_doc(i) for i in range(10)]
+    store = make_store(docs)
+
+    windowed = get_window_chunks([docs[5], docs[2]], store, window_size=1)
+
+    assert chunk_indices(windowed) == [5, 2, 4, 6, 1, 3]
+
+
+def test_neighbours_are_not_repeated(make_store):
+    docs = [transcript_doc(i) for i in range(10)]
+    store = make_store(docs)
+
+    windowed = get_window_chunks([docs[4], docs[5]], store, window_size=2)
+
+    indices = chunk_indices(windowed)
+    assert indices[:2] == [4, 5]
+    assert sorted(indices) == [2, 3, 4, 5, 6, 7]
+    assert len(indices) == len(set(indices))
+
+
+def test_window_stops_at_transcript_edges(make_store):
+    docs = [transcript_doc(i) for i in range(3)]
+    store = make_store(docs)
+
+    assert chunk_indices(get_window_chunks([docs[0]], store, window_size=2)) == [0, 1, 2]
+
+
+def test_documents_without_chunk_index_pass_through(make_store):
+    docs = [transcript_doc(i) for i in range(3)]
+    title = Document(page_content="Video Title: Test", metadata={"type": "metadata", "source": "title"})
+    store = make_store(docs + [title])
+
+    windowed = get_window_chunks([title, docs[1]], store, window_size=1)
+
+    assert windowed[0] is title
+    assert chunk_indices(windowed) == [None, 1, 0, 2]
+
+
+def test_zero_window_returns_hits_only(make_store):
+    docs = [transcript_doc(i) for i in range(5)]
+    store = make_store(docs)
+
+    assert get_window_chunks([docs[2]], store, window_size=0) == [docs[2]]